@@ -0,0 +1,333 @@
+"""
+Streaming audit of a scar chain's WAL.
+
+verify_chain() only checks the latest proof. The auditor replays the
+whole log instead and checks every transition:
+
+- sequence numbers are contiguous;
+- ADD:          value_i == value_{i-1} ^ p_i (mod N)
+- ADD_BATCH:    one group sharing a value, value == before ^ prod(p)
+- REMOVE(_BATCH): before == value ^ prod(p), checkable without the trapdoor;
+- with a scar source (scar hashes in chain order, genesis first), each
+  added prime is re-derived from its scar hash (with the chain's prime
+  scheme) and the logged scar id must match the hash; records without
+  an element (migrated from the text WAL) are checked with the derived
+  prime. With only a genesis hash, just the first record is tied to it.
+  Primes without a scar hash are checked for primality.
+
+Records are streamed (WALTailer, read-only) and grouped into chunks that
+are checked in a process pool, with a bounded number of chunks in flight,
+so memory does not grow with the chain. Chunks are independent: each
+starts from the value logged just before it. Every transition is checked
+with a full exponentiation rather than a randomized batch test, which
+only checks values up to sign mod N (see batch_check).
+
+Results come back in chain order; the first failing chunk gives the first
+divergence. After each verified chunk a checkpoint (seq, value, scars
+consumed) is written, and a later run resumes from it.
+"""
+
+import json
+import math
+import os
+import time
+from collections import deque
+from itertools import chain, repeat
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
+
+from accumulator.modexp import FAST_BACKEND, get_backend
+from accumulator.params import LEGACY_PRIME_SCHEME, AccumulatorParams, params_path
+from accumulator.primes import derive_prime, is_strong_probable_prime
+from storage.wal_accumulator import WALTailer
+from storage.wal_format import WALRecord
+
+
+ADDS = ("ADD", "ADD_BATCH")
+BATCHES = ("ADD_BATCH", "REMOVE_BATCH")
+
+# (first seq, operation, value before, value after, primes, scar ids,
+#  scar hashes or None; a None hash is not checked)
+Transition = Tuple[int, str, int, int, List[int], List[Optional[str]], Optional[List[Optional[bytes]]]]
+
+
+@dataclass
+class Divergence:
+    seq: int
+    reason: str
+
+
+@dataclass
+class AuditCheckpoint:
+    """Verified prefix of the log: up to seq, ending in value."""
+    seq: int
+    value: int
+    scars: int = 0  # scar hashes consumed from the scar source
+
+    def save(self, path: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"seq": self.seq, "value": hex(self.value), "scars": self.scars}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["AuditCheckpoint"]:
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return cls(seq=data["seq"], value=int(data["value"], 16), scars=data.get("scars", 0))
+
+
+@dataclass
+class AuditResult:
+    start_seq: int
+    verified_seq: int
+    value: int
+    records: int
+    seconds: float
+    divergence: Optional[Divergence] = None
+    # The log starts after seq 1 (retired segments) and no checkpoint covers the gap
+    unverified_prefix: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.divergence is None
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["value"] = hex(self.value)
+        return data
+
+
+def _check_transition(
+    N: int, backend, transition: Transition, scheme: str, bits: int
+) -> Optional[Tuple[int, str]]:
+    """(seq, reason) of the first problem in the transition, or None."""
+    seq, operation, before, after, primes, scar_ids, hashes = transition
+    if operation == "GAP":
+        return seq, "missing records"
+    if operation == "SCARS":
+        return seq, "scar source ends before the log"
+    if after >= N or after <= 1:
+        return seq, "accumulator value out of range"
+    checked = []
+    for i, prime in enumerate(primes):
+        scar_hash = hashes[i] if hashes is not None else None
+        if scar_hash is None:
+            if prime is None:
+                return seq + i, "record without an element prime or scar hash"
+            if not is_strong_probable_prime(prime):
+                return seq + i, "logged element is not prime"
+            checked.append(prime)
+            continue
+        if scar_ids[i] is not None and scar_hash.hex()[:8] != scar_ids[i]:
+            return seq + i, f"scar id {scar_ids[i]} does not match scar hash {scar_hash.hex()[:8]}"
+        # Records migrated from the text WAL carry no element: use the derived prime
+        derived = derive_prime(scar_hash, scheme, bits)
+        if prime is not None and derived != prime:
+            return seq + i, f"prime does not match scar {scar_hash.hex()[:8]}"
+        checked.append(derived)
+
+    exponent = math.prod(checked)
+    if operation in ADDS:
+        if backend.pow(before, exponent) != after:
+            return seq, f"{operation}: value != previous ^ prime"
+    elif backend.pow(after, exponent) != before:
+        return seq, f"{operation}: value ^ prime != previous"
+    return None
+
+
+def check_chunk(
+    N: int,
+    transitions: List[Transition],
+    scheme: str = "nonce",
+    bits: int = 256,
+    backend: str = FAST_BACKEND
+) -> Optional[Tuple[int, str]]:
+    """First (seq, reason) that fails in a chunk, or None (process-pool entry point)."""
+    engine = get_backend(backend, N)
+    for transition in transitions:
+        failure = _check_transition(N, engine, transition, scheme, bits)
+        if failure is not None:
+            return failure
+    return None
+
+
+class ChainAuditor:
+    """Replays a WAL against its modulus (and optionally its scar source)."""
+
+    def __init__(
+        self,
+        wal_path: str,
+        params: Optional[AccumulatorParams] = None,
+        scars: Optional[Iterable[bytes]] = None,
+        genesis: Optional[bytes] = None,
+        prime_scheme: Optional[str] = None,
+        prime_bits: int = 256,
+        chunk_size: int = 4096,
+        workers: Optional[int] = None,
+        checkpoint_path: Optional[str] = None,
+        in_flight: Optional[int] = None
+    ):
+        if params is None:
+            params = AccumulatorParams.load(params_path(wal_path))
+        self.N = params.N
+        self.g = params.g
+        self.wal_path = wal_path
+        self.scars = scars
+        self.genesis = genesis
+        # Default: the scheme recorded with the chain (see AccumulatorParams)
+        self.prime_scheme = prime_scheme or params.prime_scheme or LEGACY_PRIME_SCHEME
+        self.prime_bits = prime_bits
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count() or 1
+        self.checkpoint_path = checkpoint_path
+        # Chunks queued in the pool at once: bounds memory
+        self.in_flight = in_flight or 2 * self.workers
+
+    def _records(self, start_seq: int) -> Iterator[WALRecord]:
+        tailer = WALTailer(self.wal_path, start_seq=start_seq)
+        while True:
+            records = tailer.poll(limit=self.chunk_size)
+            if not records:
+                return
+            yield from records
+
+    def _transitions(
+        self, records: Iterator[WALRecord], before: int, scars: Optional[Iterator[bytes]]
+    ) -> Iterator[Transition]:
+        """
+        Group records into transitions. A gap in sequence numbers or a
+        scar source that runs out ends the stream with a transition that
+        fails its check (operation "GAP" or "SCARS").
+        """
+        group: List[WALRecord] = []
+
+        def emit(records: List[WALRecord]) -> Iterator[Transition]:
+            nonlocal before
+            hashes = None
+            if scars is not None and records[0].operation in ADDS:
+                hashes = [scar for _, scar in zip(records, scars)]
+                if len(hashes) < len(records):
+                    yield (records[0].seq + len(hashes), "SCARS", before, 0, [], [], None)
+                    return
+            yield (
+                records[0].seq, records[0].operation, before, records[-1].value,
+                [r.element for r in records], [r.scar_id for r in records], hashes
+            )
+            before = records[-1].value
+
+        expected = None
+        for record in records:
+            if expected is not None and record.seq != expected:
+                yield from emit(group)
+                yield (expected, "GAP", before, 0, [], [], None)
+                return
+            expected = record.seq + 1
+            if group and (record.operation != group[-1].operation
+                          or record.operation not in BATCHES
+                          or record.value != group[-1].value):
+                yield from emit(group)
+                group = []
+            group.append(record)
+        if group:
+            yield from emit(group)
+
+    def run(self, executor: Optional[Executor] = None) -> AuditResult:
+        """Audit from the checkpoint (or seq 1) to the end of the log."""
+        started = time.perf_counter()
+        checkpoint = AuditCheckpoint.load(self.checkpoint_path) if self.checkpoint_path else None
+        start_seq, before, consumed = 1, self.g, 0
+        if checkpoint is not None:
+            start_seq, before, consumed = checkpoint.seq + 1, checkpoint.value, checkpoint.scars
+        result = AuditResult(start_seq, start_seq - 1, before, 0, 0.0)
+
+        genesis = self.genesis
+        records = self._records(start_seq)
+        first = next(records, None)
+        if first is not None and first.seq != start_seq:
+            if checkpoint is not None or self.scars is not None:
+                result.divergence = Divergence(start_seq, f"log continues at seq {first.seq}")
+                result.seconds = time.perf_counter() - started
+                return result
+            # Older segments were retired: trust the first remaining value
+            genesis = None
+            result.unverified_prefix = True
+            result.start_seq = first.seq + 1
+            result.verified_seq, result.value = first.seq, first.value
+            before = first.value
+        elif first is not None:
+            records = _prepend(first, records)
+
+        # Scar source: genesis first; only the genesis is checked without one
+        scars = None
+        if self.scars is not None or genesis is not None:
+            head = [genesis] if genesis is not None else []
+            tail = self.scars if self.scars is not None else repeat(None)
+            scars = chain(head, tail)
+            for _ in zip(range(consumed), scars):
+                pass
+
+        own_pool = executor is None
+        pool = executor or ProcessPoolExecutor(max_workers=self.workers)
+        pending: Deque = deque()
+
+        def settle() -> bool:
+            """Collect the oldest chunk; False once it has a divergence."""
+            future, end_seq, end_value, scars_after, count = pending.popleft()
+            failure = future.result()
+            if failure is not None:
+                result.divergence = Divergence(*failure)
+                return False
+            result.verified_seq, result.value = end_seq, end_value
+            result.records += count
+            if self.checkpoint_path:
+                AuditCheckpoint(end_seq, end_value, scars_after).save(self.checkpoint_path)
+            return True
+
+        try:
+            chunk: List[Transition] = []
+            count = 0
+            for transition in self._transitions(records, before, scars):
+                chunk.append(transition)
+                count += len(transition[4])
+                if transition[6] is not None:
+                    consumed += len(transition[6])
+                if count >= self.chunk_size:
+                    pending.append(self._submit(pool, chunk, count, consumed))
+                    chunk, count = [], 0
+                    while len(pending) >= self.in_flight:
+                        if not settle():
+                            return result
+            if chunk:
+                pending.append(self._submit(pool, chunk, count, consumed))
+            while pending:
+                if not settle():
+                    return result
+            return result
+        finally:
+            for entry in pending:
+                entry[0].cancel()
+            if own_pool:
+                pool.shutdown(cancel_futures=True)
+            result.seconds = time.perf_counter() - started
+
+    def _submit(self, pool: Executor, chunk: List[Transition], count: int, consumed: int):
+        """Queue a chunk: (future, last seq, last value, scars consumed, records)."""
+        last = chunk[-1]
+        return (
+            pool.submit(check_chunk, self.N, chunk, self.prime_scheme, self.prime_bits),
+            last[0] + len(last[4]) - 1,
+            last[3],
+            consumed,
+            count
+        )
+
+
+def _prepend(first: WALRecord, rest: Iterator[WALRecord]) -> Iterator[WALRecord]:
+    yield first
+    yield from rest
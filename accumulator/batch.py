@@ -0,0 +1,108 @@
+"""
+Batch arithmetic for the RSA accumulator.
+"""
+
+import math
+import secrets
+from typing import Dict, List, Sequence
+
+
+def root_factor(base: int, primes: List[int], N: int) -> List[int]:
+    """
+    Membership witnesses for a batch added in one exponentiation.
+
+    For A' = base^(p_1 * ... * p_n) mod N returns w_i = base^(prod_{j != i} p_j),
+    so that w_i^p_i = A'. Divide and conquer: each half's base absorbs the
+    other half's primes, costing O(n log n) exponent bits instead of O(n^2).
+    """
+    if not primes:
+        return []
+    if len(primes) == 1:
+        return [base]
+    mid = len(primes) // 2
+    left, right = primes[:mid], primes[mid:]
+    return (
+        root_factor(pow(base, math.prod(right), N), left, N)
+        + root_factor(pow(base, math.prod(left), N), right, N)
+    )
+
+
+def _window_bits(count: int, exponent_bits: int) -> int:
+    """Bucket width minimizing multiplications for Pippenger's method."""
+    def cost(c: int) -> int:
+        return -(-exponent_bits // c) * (count + (2 << c) + c)
+    return min(range(1, 17), key=cost)
+
+
+def multi_exp(bases: Sequence[int], exponents: Sequence[int], N: int) -> int:
+    """
+    prod(b_i^e_i) mod N with shared squarings (Pippenger's bucket method).
+
+    Costs about max_bits squarings plus count * max_bits / c
+    multiplications instead of count independent exponentiations.
+    """
+    if not bases:
+        return 1 % N
+    exponent_bits = max(e.bit_length() for e in exponents)
+    if exponent_bits == 0:
+        return 1 % N
+    c = _window_bits(len(bases), exponent_bits)
+    mask = (1 << c) - 1
+
+    result = 1
+    for shift in range(((exponent_bits - 1) // c) * c, -1, -c):
+        if result != 1:
+            for _ in range(c):
+                result = result * result % N
+
+        buckets = [1] * (mask + 1)
+        for base, exponent in zip(bases, exponents):
+            digit = (exponent >> shift) & mask
+            if digit:
+                buckets[digit] = buckets[digit] * base % N
+
+        # sum_d d * bucket_d via running products, highest digit first
+        running = window = 1
+        for digit in range(mask, 0, -1):
+            running = running * buckets[digit] % N
+            window = window * running % N
+        result = result * window % N
+    return result % N
+
+
+def batch_check(
+    N: int,
+    witnesses: Sequence[int],
+    primes: Sequence[int],
+    accumulators: Sequence[int],
+    security_bits: int = 64
+) -> bool:
+    """
+    Randomized small-exponent batch test of w_i^p_i == ±A_i (mod N).
+
+    With random r_i of security_bits bits, checks
+        (prod w_i^(r_i * p_i))^2 == (prod A_i^r_i)^2
+    using one multi-exponentiation per side; proofs sharing an
+    accumulator value share one base on the right. Squaring moves the
+    test into the quadratic residues, so sign errors cannot cancel
+    between proofs (two proofs with w^p == -A and odd r_i would
+    otherwise pass together). A proof with w^p == -A is accepted, alone
+    or not: -w is then a valid witness ((-w)^p == -w^p for odd p), so
+    it still certifies membership. A set containing any other invalid
+    proof passes with probability at most 2^-(security_bits - 1).
+    """
+    if not witnesses:
+        return True
+    if len(witnesses) == 1:
+        return pow(witnesses[0], primes[0], N) in (accumulators[0] % N, -accumulators[0] % N)
+
+    coefficients = [secrets.randbits(security_bits) for _ in witnesses]
+
+    rhs: Dict[int, int] = {}
+    for accumulator, r in zip(accumulators, coefficients):
+        accumulator %= N
+        rhs[accumulator] = rhs.get(accumulator, 0) + r
+
+    left = multi_exp(witnesses, [r * p for r, p in zip(coefficients, primes)], N)
+    right = multi_exp(list(rhs), list(rhs.values()), N)
+    return left * left % N == right * right % N
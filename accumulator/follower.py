@@ -0,0 +1,130 @@
+"""
+Read replica of an accumulator: follows a WAL written by another process.
+
+The writer (RSAAccumulator) is the only process that can add scars, but
+verification needs nothing but the public modulus and the current
+value. AccumulatorFollower tails the writer's WAL segments (read-only,
+see WALTailer), keeps (seq, value) up to date and answers verify /
+verify_chain queries, so verification traffic can be spread over other
+processes or hosts that see the same files.
+
+Only records the writer has fsynced are applied: the tailer stops at the
+durable sequence the writer publishes (read_durable_seq), so a crash
+cannot take back state a follower has served. If the log is truncated
+or rewritten anyway (restored, replaced), the published sequence falls
+behind the follower or the records it reads go backwards, and the
+follower re-syncs from the log's durable end.
+
+Staleness is bounded by polling: run() catches up every poll_interval,
+and queries can demand a maximum staleness (ensure_fresh) before they
+are answered. status() reports the sequence number caught up to.
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional, Union
+
+from accumulator.modexp import PowBackend, get_backend
+from accumulator.params import AccumulatorParams, params_path
+from accumulator.rsa_accumulator import AccumulatorProof
+from storage.wal_accumulator import WALTailer, read_durable_seq
+
+
+class AccumulatorFollower:
+    """Read-only accumulator state, caught up from a WAL."""
+
+    def __init__(
+        self,
+        wal_path: str,
+        params: Optional[AccumulatorParams] = None,
+        poll_interval: float = 0.05,
+        backend: Union[str, PowBackend] = "builtin"
+    ):
+        if params is None:
+            params = AccumulatorParams.load(params_path(wal_path))
+        # Only the public part is needed
+        self.N = params.N
+        self.g = params.g
+        self.backend = get_backend(backend, self.N) if isinstance(backend, str) else backend
+        self.wal_path = wal_path
+        self.poll_interval = poll_interval
+
+        self.seq = 0
+        self.value = self.g
+        # time.monotonic() of the last poll that reached the durable end of the log
+        self.caught_up_at: Optional[float] = None
+        self.durable_seq = 0
+        self._tailer = WALTailer(wal_path)
+        self._task: Optional[asyncio.Task] = None
+
+    def catch_up(self) -> int:
+        """Apply every record made durable since the last call; returns how many."""
+        durable = read_durable_seq(self.wal_path)
+        records = self._tailer.poll(end_seq=durable) if durable >= self.seq else []
+        if (durable < self.seq
+                or (records and records[0].seq <= self.seq)
+                or (not records and self.seq < durable)):
+            # The log no longer continues what was applied: start over at its durable end
+            self._tailer = WALTailer(self.wal_path, start_seq=durable)
+            self.seq, self.value = 0, self.g
+            records = self._tailer.poll(end_seq=durable)
+        for record in records:
+            # Records carry the full value; a batch's records share the final one
+            self.seq, self.value = record.seq, record.value
+        self.durable_seq = durable
+        if self.seq >= durable:
+            self.caught_up_at = time.monotonic()
+        return len(records)
+
+    @property
+    def staleness(self) -> float:
+        """Seconds since the follower last saw the end of the log."""
+        if self.caught_up_at is None:
+            return float("inf")
+        return time.monotonic() - self.caught_up_at
+
+    async def ensure_fresh(self, max_staleness: float):
+        """Catch up now if the last catch-up is older than max_staleness."""
+        if self.staleness > max_staleness:
+            await asyncio.to_thread(self.catch_up)
+
+    def start(self):
+        """Catch up every poll_interval on the running loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def run(self):
+        while True:
+            await asyncio.to_thread(self.catch_up)
+            await asyncio.sleep(self.poll_interval)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def verify(self, proof: AccumulatorProof) -> bool:
+        """witness^element == ±accumulator (mod N), as RSAAccumulator.verify."""
+        computed = self.backend.pow(proof.witness, proof.element_hash)
+        return computed in (proof.accumulator % self.N, -proof.accumulator % self.N)
+
+    def verify_chain(self, latest_proof: AccumulatorProof) -> bool:
+        """Valid proof against the latest value this follower has seen."""
+        return self.verify(latest_proof) and latest_proof.accumulator == self.value
+
+    async def verify_chain_fresh(self, latest_proof: AccumulatorProof, max_staleness: float) -> bool:
+        """verify_chain against a state at most max_staleness seconds old."""
+        await self.ensure_fresh(max_staleness)
+        return self.verify_chain(latest_proof)
+
+    def status(self) -> Dict:
+        return {
+            "seq": self.seq,
+            "durable_seq": self.durable_seq,
+            "staleness": self.staleness,
+            "wal": self.wal_path
+        }
@@ -2,36 +2,385 @@
 Incremental proofs for chain of scars.
 """
 
+import asyncio
 import hashlib
-from typing import List, Optional
+from concurrent.futures import Executor
+from typing import List, Optional, Sequence, Union
+from accumulator.batch import root_factor
+from accumulator.mmr import MerkleMountainRange
+from accumulator.params import AccumulatorParams
+from accumulator.poe import ExponentiationProof, prove_exponentiation
 from accumulator.rsa_accumulator import RSAAccumulator, AccumulatorProof
+from storage.wal_format import WALRecord
+from storage.proof_store import ProofStore, TransitionStore
+from storage.snapshot import AccumulatorSnapshot, SnapshotStore
+from storage.witness_store import WitnessStore
 
 
 class IncrementalChainProof:
     """
     Incremental proof for the entire chain of scars.
     Allows adding new scars without recomputing the entire chain.
+
+    With snapshot_every > 0 the durable state and the last
+    snapshot_proofs proofs are snapshotted every snapshot_every scars,
+    and WAL segments covered by the snapshot are retired (deleted, or
+    moved to archive_dir). Restart then replays only the snapshot plus
+    the WAL suffix written after it.
+
+    With poe=True every add_scars() batch also yields a Wesolowski proof
+    of exponentiation (kept in transitions), so an auditor can check the
+    batch transition with two small exponentiations. The proofs are
+    stored in a TransitionStore next to the WAL (transition_path); the
+    ones a crash lost are proven again from the WAL on initialize().
+
+    With witness_path set, every scar's witness is kept in a disk-backed
+    WitnessStore and brought forward as new primes are added, so any
+    historical scar can prove membership against the current value
+    (prove_membership). Only the last snapshot_proofs proofs then stay
+    in memory. New members are synced to disk before add_scar(s)
+    returns (concurrent adders share one sync), and the periodic flush
+    that raises every witness runs in a worker thread.
+
+    With mmr_path set, scar hashes are also appended, in chain order, to
+    a Merkle mountain range (history), with the genesis as leaf 0. It
+    gives ordered inclusion, range and consistency proofs, which the
+    accumulator alone cannot. The MMR is only fsynced at snapshots and
+    close, and the WAL does not hold scar hashes, so initialize() checks
+    its leaf count against the additions in the WAL: missing leaves are
+    taken from history_scars (scar hashes in chain order, genesis first,
+    checked against the logged primes), and without them it raises.
+
+    With columnar_proofs the proofs are kept in a ProofStore (packed
+    columns, views instead of AccumulatorProof objects); with proof_path
+    that store is memory-mapped and kept across restarts.
+
+    math_executor moves the accumulator math off the event loop (see
+    RSAAccumulator).
     """
-    
-    def __init__(self, genesis_hash: bytes, wal_path: str = "chain.wal"):
-        self.accumulator = RSAAccumulator(wal_path=wal_path)
+
+    def __init__(
+        self,
+        genesis_hash: bytes,
+        wal_path: str = "chain.wal",
+        group_commit: bool = False,
+        snapshot_every: int = 0,
+        snapshot_proofs: int = 1024,
+        snapshot_path: Optional[str] = None,
+        archive_dir: Optional[str] = None,
+        poe: bool = False,
+        witness_path: Optional[str] = None,
+        params: Optional[AccumulatorParams] = None,
+        enclave=None,
+        mmr_path: Optional[str] = None,
+        math_executor=None,
+        columnar_proofs: bool = False,
+        proof_path: Optional[str] = None,
+        transition_path: Optional[str] = None
+    ):
+        self.accumulator = RSAAccumulator(
+            wal_path=wal_path,
+            group_commit=group_commit,
+            params=params,
+            enclave=enclave,
+            math_executor=math_executor
+        )
         self.genesis = genesis_hash
-        self.proofs: List[AccumulatorProof] = []
-        
-    async def initialize(self):
-        """Initialize accumulator."""
-        await self.accumulator.initialize()
-        
+        self.proofs: Union[List[AccumulatorProof], ProofStore] = []
+        self.columnar_proofs = columnar_proofs or proof_path is not None
+        self.proof_path = proof_path
+        self.poe = poe
+        self.transitions: Union[List[ExponentiationProof], TransitionStore] = []
+        self.transition_path = transition_path or f"{wal_path}.transitions"
+
+        # Created in initialize(), once the modulus is final
+        self.witness_path = witness_path
+        self.witnesses: Optional[WitnessStore] = None
+        # Serializes witness store updates with syncs running in a thread
+        self._witness_lock = asyncio.Lock()
+        self._witness_writes = self._witness_synced = 0
+        self.mmr_path = mmr_path
+        self.history: Optional[MerkleMountainRange] = None
+        # WAL sequence of the last leaf in history
+        self._history_seq: Optional[int] = None
+
+        self.snapshot_every = snapshot_every
+        self.snapshot_proofs = snapshot_proofs
+        self.archive_dir = archive_dir
+        self.snapshots = SnapshotStore(snapshot_path or f"{wal_path}.snapshot")
+        self._snapshot_seq = 0
+        self._snapshot_lock = asyncio.Lock()
+
+    async def initialize(self, history_scars: Optional[Sequence[bytes]] = None):
+        """
+        Initialize accumulator. history_scars (genesis first) fills MMR
+        leaves the WAL has but the MMR lost or never had.
+        """
+        snapshot = self.snapshots.load() if self.snapshot_every else None
+        await self.accumulator.initialize(snapshot)
+
+        if self.columnar_proofs:
+            self.proofs = ProofStore((self.accumulator.N.bit_length() + 7) // 8, self.proof_path)
+            # Proofs are recorded after their WAL write; drop any the WAL lost
+            self.proofs.truncate_after(self.accumulator.wal.current_seq)
+
+        if self.snapshot_every:
+            await asyncio.to_thread(self._replay, snapshot)
+
+        if self.poe:
+            self.transitions = TransitionStore((self.accumulator.N.bit_length() + 7) // 8, self.transition_path)
+            self.transitions.truncate_after(self.accumulator.wal.current_seq)
+            await asyncio.to_thread(self._catch_up_transitions)
+
+        if self.witness_path:
+            self.witnesses = WitnessStore(self.witness_path, self.accumulator.N)
+            records = self.accumulator.wal.iter_records(start_seq=self.witnesses.synced_seq + 1)
+            await asyncio.to_thread(self.witnesses.catch_up, records)
+
         # If accumulator is empty, add genesis
         if self.accumulator.value == self.accumulator.g:
             await self.accumulator.add(self.genesis)
-        
+
+        if self.mmr_path:
+            self.history = await asyncio.to_thread(MerkleMountainRange, self.mmr_path)
+            await asyncio.to_thread(self._catch_up_history, history_scars or [self.genesis])
+
+    def _catch_up_history(self, scars: Sequence[bytes]):
+        """Bring the MMR to one leaf per addition in the WAL, or raise."""
+        history = self.history
+        # Without a recorded sequence, count the additions from the start
+        if history.synced_seq is None:
+            start_seq, expected = 1, 0
+        else:
+            start_seq, expected = history.synced_seq + 1, history.synced_size
+
+        missing: List[WALRecord] = []
+        last_seq = history.synced_seq
+        for record in self.accumulator.wal.iter_records(start_seq=start_seq):
+            if record.seq != start_seq:
+                raise ValueError(f"WAL records before {record.seq} were retired; "
+                                 f"cannot check {self.mmr_path} against the log")
+            start_seq += 1
+            if record.operation not in ("ADD", "ADD_BATCH"):
+                continue
+            if expected >= len(history):
+                missing.append(record)
+            expected += 1
+            last_seq = record.seq
+
+        # Leaves past the WAL were never acknowledged
+        if len(history) > expected:
+            history.truncate(expected)
+        if missing:
+            first = len(history)
+            if len(scars) < expected:
+                raise ValueError(f"{self.mmr_path} is {len(missing)} leaves behind the WAL "
+                                 f"(from leaf {first}); pass history_scars to replay them")
+            hashes = scars[first:expected]
+            for record, scar_hash in zip(missing, hashes):
+                if record.element is not None and self.accumulator._hash_to_prime(scar_hash) != record.element:
+                    raise ValueError(f"history_scars do not match WAL record {record.seq}")
+            history.extend(hashes)
+            history.flush(last_seq)
+        self._history_seq = last_seq
+
+    def _catch_up_transitions(self):
+        """
+        Prove the add_many() batches in the WAL after the last stored
+        transition (those whose proof was lost in a crash). Batches whose
+        preceding record was retired cannot be proven and are skipped.
+        """
+        known = 0
+        if self.transitions:
+            last = self.transitions[-1]
+            known = last.sequence + last.count - 1
+
+        previous: Optional[int] = None
+        batch: List[WALRecord] = []
+        for record in self.accumulator.wal.iter_records(start_seq=max(known, 1)):
+            if batch and (record.operation != "ADD_BATCH" or record.value != batch[-1].value):
+                self._prove_batch(batch, previous)
+                previous, batch = batch[-1].value, []
+            if record.operation == "ADD_BATCH" and record.seq > known:
+                batch.append(record)
+                continue
+            previous = record.value
+        if batch:
+            self._prove_batch(batch, previous)
+
+    def _prove_batch(self, batch: List[WALRecord], previous: Optional[int]):
+        primes = [record.element for record in batch]
+        if previous is None or None in primes:
+            return
+        self.transitions.append(prove_exponentiation(
+            self.accumulator.N, previous, primes, batch[-1].value, batch[0].seq
+        ))
+
+    def _replay(self, snapshot: Optional[AccumulatorSnapshot]):
+        """
+        Rebuild the proof tail from the snapshot plus the WAL suffix,
+        skipping proofs a persisted proof store already holds.
+        """
+        known = self.proofs[-1].sequence if self.proofs else 0
+        start_seq, previous = 1, self.accumulator.g
+        if snapshot is not None:
+            self.proofs.extend(AccumulatorProof(*proof) for proof in snapshot.proofs if proof[3] > known)
+            self._snapshot_seq = snapshot.seq
+            start_seq, previous = snapshot.seq + 1, snapshot.value
+
+        batch: List[WALRecord] = []
+        for record in self.accumulator.wal.iter_records(start_seq=start_seq):
+            if batch and (record.operation != "ADD_BATCH" or record.value != batch[-1].value):
+                previous = self._replay_batch(batch, previous, known)
+                batch = []
+            if record.operation == "ADD_BATCH":
+                batch.append(record)
+                continue
+
+            # The first addition on an empty accumulator is the genesis
+            if (record.operation == "ADD" and record.element is not None
+                    and previous != self.accumulator.g and record.seq > known):
+                self.proofs.append(AccumulatorProof(
+                    witness=previous,
+                    accumulator=record.value,
+                    element_hash=record.element,
+                    sequence=record.seq
+                ))
+            previous = record.value
+        if batch:
+            self._replay_batch(batch, previous, known)
+
+    def _replay_batch(self, batch: List[WALRecord], previous: int, known: int = 0) -> int:
+        """Recompute the proofs of one add_many() batch from the value before it."""
+        if batch[-1].seq <= known:
+            return batch[-1].value
+        primes = [record.element for record in batch]
+        witnesses = root_factor(previous, primes, self.accumulator.N)
+        self.proofs.extend(
+            AccumulatorProof(
+                witness=witness,
+                accumulator=record.value,
+                element_hash=record.element,
+                sequence=record.seq
+            )
+            for witness, record in zip(witnesses, batch)
+            if record.seq > known
+        )
+        return batch[-1].value
+
     async def add_scar(self, scar_hash: bytes) -> AccumulatorProof:
         """Add scar and return proof."""
         value, proof = await self.accumulator.add(scar_hash)
-        self.proofs.append(proof)
+        await self._record([scar_hash], [proof])
+        await self._maybe_snapshot(proof.sequence)
         return proof
-        
+
+    async def add_scars(self, scar_hashes: List[bytes]) -> List[AccumulatorProof]:
+        """Add many scars with one exponentiation and one WAL fsync."""
+        if self.poe:
+            value, proofs, transition = await self.accumulator.add_many_with_proof(scar_hashes)
+            if proofs:
+                self.transitions.append(transition)
+        else:
+            value, proofs = await self.accumulator.add_many(scar_hashes)
+        await self._record(scar_hashes, proofs)
+        if proofs:
+            await self._maybe_snapshot(proofs[-1].sequence)
+        return proofs
+
+    async def remove_scars(self, scar_hashes: List[bytes]) -> int:
+        """
+        Drop scars (chain reorganization) with one trapdoor root.
+        Stored witnesses of the remaining scars are updated to the new value.
+        """
+        value = await self.accumulator.remove_many(scar_hashes)
+        if self.witnesses is not None and scar_hashes:
+            primes = [self.accumulator._hash_to_prime(h) for h in scar_hashes]
+            async with self._witness_lock:
+                await asyncio.to_thread(
+                    self.witnesses.apply_removal, primes, value, self.accumulator.current_sequence
+                )
+        return value
+
+    async def _record(self, scar_hashes: List[bytes], proofs: List[AccumulatorProof]):
+        """Keep new proofs; with a witness store, also persist their witnesses."""
+        self.proofs.extend(proofs)
+        if self.history is not None and proofs:
+            self.history.extend(scar_hashes)
+            self._history_seq = proofs[-1].sequence
+        if self.witnesses is None or not proofs:
+            return
+        async with self._witness_lock:
+            self.witnesses.add(
+                [(h, p.element_hash, p.witness) for h, p in zip(scar_hashes, proofs)],
+                [p.element_hash for p in proofs],
+                proofs[0].sequence,
+                proofs[-1].accumulator
+            )
+            self._witness_writes += 1
+        if len(self.proofs) > 2 * self.snapshot_proofs:
+            del self.proofs[:-self.snapshot_proofs]
+        await self._sync_witnesses(self._witness_writes)
+
+    async def _sync_witnesses(self, writes: int):
+        """
+        Make witness store writes up to `writes` durable. The WAL does not
+        hold scar hashes, so members not on disk could not be replayed.
+        """
+        async with self._witness_lock:
+            if self._witness_synced >= writes:
+                return
+            writes = self._witness_writes
+            if self.witnesses.flush_due:
+                await asyncio.to_thread(self.witnesses.flush)
+            else:
+                await asyncio.to_thread(self.witnesses.sync)
+            self._witness_synced = writes
+
+    async def _maybe_snapshot(self, sequence: int):
+        """Snapshot once snapshot_every scars were added since the last one."""
+        if (self.snapshot_every
+                and sequence - self._snapshot_seq >= self.snapshot_every
+                and not self._snapshot_lock.locked()):
+            async with self._snapshot_lock:
+                await self.snapshot()
+
+    async def snapshot(self) -> AccumulatorSnapshot:
+        """
+        Snapshot the durable accumulator state and retire WAL segments
+        that the snapshot covers.
+        """
+        wal = self.accumulator.wal
+        await wal.flush()
+
+        # Only state that is already on disk goes into the snapshot
+        seq, value = wal.durable_seq, wal.current_value
+        tail = [p for p in self.proofs[-self.snapshot_proofs:] if p.sequence <= seq]
+        snapshot = AccumulatorSnapshot(
+            seq=seq,
+            value=value,
+            proofs=[(p.witness, p.accumulator, p.element_hash, p.sequence) for p in tail]
+        )
+
+        await asyncio.to_thread(self.snapshots.save, snapshot)
+        if isinstance(self.transitions, TransitionStore):
+            # Transitions of retired batches could not be proven again
+            await asyncio.to_thread(self.transitions.flush)
+        retire_seq = seq
+        if self.history is not None:
+            # Keep the WAL the MMR would have to be checked against
+            history_seq = self._history_seq
+            await asyncio.to_thread(self.history.flush, history_seq)
+            retire_seq = min(retire_seq, history_seq or 0)
+        if self.witnesses is not None:
+            # Keep the WAL the witness store would have to catch up from
+            async with self._witness_lock:
+                await asyncio.to_thread(self.witnesses.flush)
+            retire_seq = min(retire_seq, self.witnesses.synced_seq)
+        await asyncio.to_thread(wal.retire_segments, retire_seq, self.archive_dir)
+        self._snapshot_seq = seq
+        return snapshot
+
     def verify_chain(self, latest_proof: Optional[AccumulatorProof] = None) -> bool:
         """
         Verify entire chain using latest proof.
@@ -41,20 +390,82 @@ class IncrementalChainProof:
             if not self.proofs:
                 return True
             latest_proof = self.proofs[-1]
-        
+
         # Verify the latest proof
         if not self.accumulator.verify(latest_proof):
             return False
-            
+
         # Also verify that accumulator value matches
         return latest_proof.accumulator == self.accumulator.value
-        
+
+    def verify_all(self, executor: Optional[Executor] = None) -> bool:
+        """
+        Audit every proof held by the chain with one batch verification,
+        and check that the latest proof matches the accumulator value.
+        """
+        if not self.proofs:
+            return True
+        return (self.accumulator.batch_verify(self.proofs, executor=executor)
+                and self.proofs[-1].accumulator == self.accumulator.value)
+
+    async def prove_history(self) -> ExponentiationProof:
+        """
+        Proof of exponentiation from the empty accumulator g to the current
+        value over the genesis prime and every scar prime, in order.
+        Needs the full proof list (no snapshot truncation, no removals).
+        """
+        primes = [self.accumulator._hash_to_prime(self.genesis)]
+        primes += [p.element_hash for p in self.proofs]
+        if len(primes) != self.accumulator.current_sequence:
+            raise ValueError("proof history is incomplete; cannot prove from genesis")
+        return await asyncio.to_thread(
+            prove_exponentiation,
+            self.accumulator.N,
+            self.accumulator.g,
+            primes,
+            self.accumulator.value,
+            1
+        )
+
+    def prove_membership(self, scar_hash: bytes) -> Optional[AccumulatorProof]:
+        """
+        Membership proof for any stored scar against the latest value
+        known to the witness store (None if unknown or removed).
+        """
+        if self.witnesses is None:
+            raise ValueError("no witness store configured")
+        entry = self.witnesses.get(scar_hash)
+        if entry is None:
+            return None
+        prime, witness, seq = entry
+        return AccumulatorProof(
+            witness=witness,
+            accumulator=self.witnesses.value,
+            element_hash=prime,
+            sequence=seq
+        )
+
+    async def close(self):
+        """Flush the witness, proof, transition and MMR stores, and close the accumulator."""
+        if self.witnesses is not None:
+            async with self._witness_lock:
+                await asyncio.to_thread(self.witnesses.close)
+            self.witnesses = None
+        if self.history is not None:
+            await asyncio.to_thread(self.history.close, self._history_seq)
+            self.history = None
+        if isinstance(self.proofs, ProofStore):
+            self.proofs.close()
+        if isinstance(self.transitions, TransitionStore):
+            self.transitions.close()
+        await self.accumulator.close()
+
     def get_state_proof(self) -> Optional[AccumulatorProof]:
         """Return proof of current state."""
         if not self.proofs:
             return None
         return self.proofs[-1]
-        
+
     @property
     def accumulator_value(self) -> int:
         """Current accumulator value."""
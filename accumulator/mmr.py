@@ -0,0 +1,283 @@
+"""
+Merkle mountain range (MMR) over scar hashes.
+
+The RSA accumulator proves set membership but not order. The MMR is an
+append-only list of perfect Merkle trees ("mountains") whose peaks are
+bagged into one root, giving:
+
+- inclusion proofs for one leaf (O(log n) hashes),
+- range proofs that leaves start..end-1 are exactly the given hashes,
+- consistency proofs that a root of size m is a prefix of a root of size n.
+
+Nodes are stored in post-order in an append-only file of 32-byte hashes
+(<path>.nodes), so positions never move as the range grows. The leaf
+count and peaks are checkpointed to <path>.peaks on flush() and checked
+against the node file on open. flush(seq) also records the WAL sequence
+of the last leaf, so an owner can tell which log records the durable
+leaves cover (synced_size, synced_seq).
+
+All three proofs are flat hash lists produced by one recursive walk over
+the mountains: subtrees entirely outside the proven leaves contribute
+their hash, subtrees entirely inside are rebuilt by the verifier, and
+the rest are split.
+"""
+
+import hashlib
+import json
+import os
+from typing import Callable, Iterator, List, Optional, Tuple
+
+
+HASH_SIZE = 32
+
+
+def leaf_hash(data: bytes) -> bytes:
+    return hashlib.sha256(b'\x00' + data).digest()
+
+
+def _node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b'\x01' + left + right).digest()
+
+
+def bag_peaks(peaks: List[bytes], size: int) -> bytes:
+    """MMR root: the leaf count and all peaks, left to right."""
+    return hashlib.sha256(b'\x02' + size.to_bytes(8, 'big') + b''.join(peaks)).digest()
+
+
+def mmr_size(leaves: int) -> int:
+    """Number of nodes in an MMR with the given number of leaves."""
+    return 2 * leaves - bin(leaves).count('1')
+
+
+def mountains(leaves: int) -> Iterator[Tuple[int, int, int]]:
+    """(root position, height, first leaf) of each mountain, left to right."""
+    pos = first = 0
+    for height in range(leaves.bit_length() - 1, -1, -1):
+        if leaves >> height & 1:
+            pos += (1 << (height + 1)) - 1
+            yield pos - 1, height, first
+            first += 1 << height
+
+
+def _perfect_root(hashes: List[bytes]) -> bytes:
+    while len(hashes) > 1:
+        hashes = [_node(hashes[i], hashes[i + 1]) for i in range(0, len(hashes), 2)]
+    return hashes[0]
+
+
+def _walk(
+    root: int,
+    height: int,
+    first: int,
+    lo: int,
+    hi: int,
+    outside: Callable[[int], bytes],
+    inside: Callable[[int, int, int], bytes]
+) -> bytes:
+    """
+    Hash of the subtree rooted at position root covering leaves
+    [first, first + 2^height), where leaves [lo, hi) are known:
+    outside(root) supplies subtrees disjoint from them,
+    inside(root, height, first) subtrees fully within them.
+    """
+    width = 1 << height
+    if hi <= first or first + width <= lo:
+        return outside(root)
+    if lo <= first and first + width <= hi:
+        return inside(root, height, first)
+    left = _walk(root - (1 << height), height - 1, first, lo, hi, outside, inside)
+    right = _walk(root - 1, height - 1, first + width // 2, lo, hi, outside, inside)
+    return _node(left, right)
+
+
+def _rebuild_root(size: int, lo: int, hi: int, proof: List[bytes], inside) -> Optional[bytes]:
+    """Verifier side of _walk over all mountains; None if the proof is malformed."""
+    hashes = iter(proof)
+
+    def outside(_pos: int) -> bytes:
+        value = next(hashes, None)
+        if value is None:
+            raise ValueError("proof too short")
+        return value
+
+    try:
+        peaks = [_walk(root, height, first, lo, hi, outside, inside)
+                 for root, height, first in mountains(size)]
+    except (ValueError, IndexError, StopIteration):
+        return None
+    if next(hashes, None) is not None:
+        return None
+    return bag_peaks(peaks, size)
+
+
+def verify_range(root: bytes, size: int, start: int, leaves: List[bytes], proof: List[bytes]) -> bool:
+    """Check that leaf_hash(leaves[i]) sit at positions start + i of the MMR."""
+    end = start + len(leaves)
+    if not leaves or end > size:
+        return False
+    hashed = [leaf_hash(leaf) for leaf in leaves]
+
+    def inside(_root: int, height: int, first: int) -> bytes:
+        return _perfect_root(hashed[first - start:first - start + (1 << height)])
+
+    return _rebuild_root(size, start, end, proof, inside) == root
+
+
+def verify_inclusion(root: bytes, size: int, index: int, leaf: bytes, proof: List[bytes]) -> bool:
+    """Check that leaf is at position index of the MMR."""
+    return verify_range(root, size, index, [leaf], proof)
+
+
+def verify_consistency(
+    old_root: bytes, old_size: int, new_root: bytes, new_size: int, proof: List[bytes]
+) -> bool:
+    """Check that the MMR with old_root is a prefix of the one with new_root."""
+    if not 0 < old_size <= new_size:
+        return False
+    count = len(list(mountains(old_size)))
+    old_peaks, rest = proof[:count], proof[count:]
+    if len(old_peaks) != count or bag_peaks(old_peaks, old_size) != old_root:
+        return False
+    # Subtrees fully inside the old range are exactly the old peaks
+    peaks = iter(old_peaks)
+    return _rebuild_root(new_size, 0, old_size, rest, lambda *_: next(peaks)) == new_root
+
+
+class MerkleMountainRange:
+    """Append-only MMR persisted as a post-order node file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.nodes_path = f"{path}.nodes"
+        self.peaks_path = f"{path}.peaks"
+        self._fd = os.open(self.nodes_path, os.O_RDWR | os.O_CREAT, 0o644)
+        self.size = 0
+        # Leaf count and WAL sequence of the last checkpoint (seq None: unknown)
+        self.synced_size = 0
+        self.synced_seq: Optional[int] = None
+        self._open()
+
+    def _open(self):
+        """Recover the leaf count from the node file and check the checkpoint."""
+        nodes = os.fstat(self._fd).st_size // HASH_SIZE
+        leaves = 0
+        # Largest leaf count whose MMR fits the file; drop a torn tail
+        for bit in range(63, -1, -1):
+            if mmr_size(leaves | (1 << bit)) <= nodes:
+                leaves |= 1 << bit
+        if mmr_size(leaves) * HASH_SIZE != os.fstat(self._fd).st_size:
+            os.ftruncate(self._fd, mmr_size(leaves) * HASH_SIZE)
+        self.size = leaves
+
+        if os.path.exists(self.peaks_path):
+            with open(self.peaks_path, 'r') as f:
+                checkpoint = json.load(f)
+            if checkpoint["size"] > self.size:
+                raise ValueError(f"{self.nodes_path} is shorter than its checkpoint")
+            peaks = [self.node(root) for root, _, _ in mountains(checkpoint["size"])]
+            if [p.hex() for p in peaks] != checkpoint["peaks"]:
+                raise ValueError(f"{self.nodes_path} does not match {self.peaks_path}")
+            self.synced_size = checkpoint["size"]
+            self.synced_seq = checkpoint.get("seq")
+
+    def node(self, pos: int) -> bytes:
+        data = os.pread(self._fd, HASH_SIZE, pos * HASH_SIZE)
+        if len(data) != HASH_SIZE:
+            raise IndexError(f"MMR node {pos} out of range")
+        return data
+
+    def append(self, data: bytes) -> int:
+        """Append one leaf (and the parents it completes); returns its index."""
+        return self.extend([data])
+
+    def extend(self, items: List[bytes]) -> int:
+        """Append leaves with one write; returns the index of the first."""
+        first_index = self.size
+        pos = mmr_size(self.size)
+        new_nodes: List[bytes] = []
+
+        def get(p: int) -> bytes:
+            return new_nodes[p - pos] if p >= pos else self.node(p)
+
+        for data in items:
+            current = leaf_hash(data)
+            new_nodes.append(current)
+            node_pos = pos + len(new_nodes) - 1
+            # Each trailing one bit of the old leaf count closes a mountain
+            height, leaves = 0, self.size
+            while leaves & 1:
+                left = get(node_pos - (1 << (height + 1)) + 1)
+                current = _node(left, current)
+                new_nodes.append(current)
+                node_pos += 1
+                height += 1
+                leaves >>= 1
+            self.size += 1
+
+        os.pwrite(self._fd, b''.join(new_nodes), pos * HASH_SIZE)
+        return first_index
+
+    def peaks(self, size: Optional[int] = None) -> List[bytes]:
+        return [self.node(root) for root, _, _ in mountains(self.size if size is None else size)]
+
+    def root(self, size: Optional[int] = None) -> bytes:
+        size = self.size if size is None else size
+        return bag_peaks(self.peaks(size), size)
+
+    def _prove(self, size: int, lo: int, hi: int) -> List[bytes]:
+        if not 0 <= lo < hi <= size <= self.size:
+            raise IndexError(f"range {lo}..{hi} outside MMR of size {size}")
+        proof: List[bytes] = []
+
+        def outside(pos: int) -> bytes:
+            proof.append(self.node(pos))
+            return b''
+
+        for root, height, first in mountains(size):
+            _walk(root, height, first, lo, hi, outside, lambda *_: b'')
+        return proof
+
+    def inclusion_proof(self, index: int, size: Optional[int] = None) -> List[bytes]:
+        """Hashes proving leaf index against root(size)."""
+        size = self.size if size is None else size
+        return self._prove(size, index, index + 1)
+
+    def range_proof(self, start: int, end: int, size: Optional[int] = None) -> List[bytes]:
+        """Hashes proving leaves start..end-1 against root(size)."""
+        size = self.size if size is None else size
+        return self._prove(size, start, end)
+
+    def consistency_proof(self, old_size: int, new_size: Optional[int] = None) -> List[bytes]:
+        """Old peaks plus the hashes that extend them to root(new_size)."""
+        new_size = self.size if new_size is None else new_size
+        if not 0 < old_size <= new_size:
+            raise IndexError(f"cannot prove {old_size} against {new_size}")
+        return self.peaks(old_size) + self._prove(new_size, 0, old_size)
+
+    def truncate(self, leaves: int):
+        """Drop leaves past the first `leaves` (never below the checkpoint)."""
+        if not self.synced_size <= leaves <= self.size:
+            raise IndexError(f"cannot truncate MMR of size {self.size} to {leaves}")
+        os.ftruncate(self._fd, mmr_size(leaves) * HASH_SIZE)
+        self.size = leaves
+
+    def flush(self, seq: Optional[int] = None):
+        """
+        fsync the node file, then atomically checkpoint size and peaks
+        (and seq, the WAL sequence of the last leaf, if given).
+        """
+        os.fsync(self._fd)
+        tmp_path = f"{self.peaks_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"size": self.size, "peaks": [p.hex() for p in self.peaks()], "seq": seq}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.peaks_path)
+        self.synced_size, self.synced_seq = self.size, seq
+
+    def close(self, seq: Optional[int] = None):
+        self.flush(seq)
+        os.close(self._fd)
+
+    def __len__(self) -> int:
+        return self.size
@@ -0,0 +1,201 @@
+"""
+Pluggable modular exponentiation backends for the accumulator modulus.
+
+Every accumulator operation exponentiates modulo the same N, so the
+backend is bound to one modulus at construction:
+
+- "builtin":    Python's pow().
+- "montgomery": GMP's mpz_powm through gmpy2 (Montgomery-form REDC
+                arithmetic in C). Needs the optional gmpy2 package
+                (requirements-accel.txt); without it, it falls back to
+                builtin pow() and logs a warning (see
+                MontgomeryBackend.available and FAST_BACKEND).
+- "fixed-base": precomputed window tables for hot bases (the current
+                accumulator value, frequently verified witnesses). A
+                base^e lookup costs about bits(e) / window modular
+                multiplications and no squarings. Bases become hot after
+                hot_after uses or by explicit precompute(); everything
+                else goes to the inner backend.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Type
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+logger = logging.getLogger(__name__)
+
+
+class PowBackend:
+    """Builtin pow() under a fixed modulus."""
+
+    name = "builtin"
+
+    def __init__(self, N: int):
+        self.bind(N)
+
+    def bind(self, N: int):
+        """Switch to a new modulus, dropping anything derived from the old one."""
+        self.N = N
+
+    def pow(self, base: int, exponent: int) -> int:
+        """base^exponent mod N (negative exponents invert base)."""
+        return pow(base, exponent, self.N)
+
+    def precompute(self, base: int):
+        """Hint that base will be exponentiated often (no-op here)."""
+
+    def forget(self, base: int):
+        """Drop any precomputation for base (no-op here)."""
+
+
+class MontgomeryBackend(PowBackend):
+    """GMP modular exponentiation (Montgomery reduction) via gmpy2."""
+
+    name = "montgomery"
+    # False when gmpy2 is missing and pow() is used instead
+    available = gmpy2 is not None
+    _warned = False
+
+    def __init__(self, N: int):
+        if not self.available and not MontgomeryBackend._warned:
+            MontgomeryBackend._warned = True
+            logger.warning(
+                "montgomery backend requested but gmpy2 is not installed "
+                "(requirements-accel.txt); using builtin pow()"
+            )
+        super().__init__(N)
+
+    def bind(self, N: int):
+        super().bind(N)
+        self._N = gmpy2.mpz(N) if gmpy2 is not None else None
+
+    def pow(self, base: int, exponent: int) -> int:
+        if self._N is None or exponent < 0:
+            return pow(base, exponent, self.N)
+        return int(gmpy2.powmod(base, exponent, self._N))
+
+
+class FixedBaseTable:
+    """
+    rows[i][d] = base^(d * 2^(window * i)) mod N, so that
+    base^e = prod_i rows[i][digit_i(e)] for exponents below 2^max_bits.
+    """
+
+    def __init__(self, base: int, N: int, max_bits: int = 264, window: int = 6):
+        self.N = N
+        self.window = window
+        self.max_bits = max_bits
+        self.rows: List[List[int]] = []
+
+        radix = 1 << window
+        power = base % N
+        for _ in range(-(-max_bits // window)):
+            row = [1, power]
+            for _ in range(2, radix):
+                row.append(row[-1] * power % N)
+            self.rows.append(row)
+            power = row[-1] * power % N  # base^(radix^(i+1))
+
+    def pow(self, exponent: int) -> int:
+        mask = (1 << self.window) - 1
+        result = 1
+        for row in self.rows:
+            if not exponent:
+                break
+            digit = exponent & mask
+            if digit:
+                result = result * row[digit] % self.N
+            exponent >>= self.window
+        return result
+
+
+class FixedBaseBackend(PowBackend):
+    """LRU of fixed-base tables in front of an inner backend."""
+
+    name = "fixed-base"
+
+    def __init__(
+        self,
+        N: int,
+        inner: Optional[PowBackend] = None,
+        max_tables: int = 16,
+        hot_after: int = 3,
+        max_bits: int = 264,
+        window: int = 6
+    ):
+        self.inner = inner or PowBackend(N)
+        self.max_tables = max_tables
+        self.hot_after = hot_after
+        self.max_bits = max_bits
+        self.window = window
+        self._lock = threading.Lock()
+        super().__init__(N)
+
+    def bind(self, N: int):
+        super().bind(N)
+        self.inner.bind(N)
+        with self._lock:
+            self._tables: "OrderedDict[int, FixedBaseTable]" = OrderedDict()
+            self._uses: Dict[int, int] = {}
+
+    def pow(self, base: int, exponent: int) -> int:
+        if exponent < 0 or exponent.bit_length() > self.max_bits:
+            return self.inner.pow(base, exponent)
+
+        uses = 0
+        with self._lock:
+            table = self._tables.get(base)
+            if table is not None:
+                self._tables.move_to_end(base)
+            elif self.hot_after:
+                uses = self._uses.get(base, 0) + 1
+                self._uses[base] = uses
+                if len(self._uses) > 8 * self.max_tables:
+                    self._uses.clear()
+        if table is None and self.hot_after and uses >= self.hot_after:
+            table = self.precompute(base)
+        if table is None:
+            return self.inner.pow(base, exponent)
+        return table.pow(exponent)
+
+    def precompute(self, base: int) -> FixedBaseTable:
+        with self._lock:
+            table = self._tables.get(base)
+            if table is not None:
+                return table
+        table = FixedBaseTable(base, self.N, self.max_bits, self.window)
+        with self._lock:
+            self._tables[base] = table
+            self._uses.pop(base, None)
+            while len(self._tables) > self.max_tables:
+                self._tables.popitem(last=False)
+        return table
+
+    def forget(self, base: int):
+        with self._lock:
+            self._tables.pop(base, None)
+            self._uses.pop(base, None)
+
+
+BACKENDS: Dict[str, Type[PowBackend]] = {
+    PowBackend.name: PowBackend,
+    MontgomeryBackend.name: MontgomeryBackend,
+    FixedBaseBackend.name: FixedBaseBackend,
+}
+
+# Fastest general-purpose backend this installation really has
+FAST_BACKEND = MontgomeryBackend.name if MontgomeryBackend.available else PowBackend.name
+
+
+def get_backend(name: str, N: int, **kwargs) -> PowBackend:
+    """Backend by name, bound to modulus N."""
+    try:
+        return BACKENDS[name](N, **kwargs)
+    except KeyError:
+        raise ValueError(f"unknown exponentiation backend {name!r}") from None
@@ -0,0 +1,200 @@
+"""
+Accumulator parameters: RSA modulus, generator and (soft mode) trapdoor.
+
+Generating a 2048-bit modulus costs seconds of CPU, and a new N makes an
+existing WAL unverifiable, so parameters are generated once and then
+loaded:
+
+- from a parameter file next to the WAL (<wal>.params), written the first
+  time the accumulator is initialized;
+- from AccumulatorEnclave.create_accumulator();
+- for tests and dev runs, from a pool of pre-generated parameter files
+  (SCM_PARAM_POOL=<dir>). Pool parameters are shared between
+  accumulators and their trapdoor sits on disk: never use them in
+  production.
+
+The parameter file also records the chain's hash-to-prime scheme
+(prime_scheme), since removing an element needs the same prime it was
+added with. Files written before the scheme was recorded carry none;
+those chains were built with "scan" (LEGACY_PRIME_SCHEME).
+
+When a modulus really has to be generated it is done in a worker process,
+so the event loop keeps running.
+"""
+
+import asyncio
+import json
+import os
+import random
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+PARAMS_VERSION = 1
+DEFAULT_GENERATOR = 65537
+# Scheme of chains whose parameters predate the prime_scheme field
+LEGACY_PRIME_SCHEME = "scan"
+
+# Directory of pre-generated parameter files for test and dev runs
+POOL_ENV = "SCM_PARAM_POOL"
+
+
+@dataclass(frozen=True)
+class AccumulatorParams:
+    """Public modulus and generator, plus the trapdoor when it is known."""
+    N: int
+    g: int = DEFAULT_GENERATOR
+    p: Optional[int] = None
+    q: Optional[int] = None
+    phi: Optional[int] = None
+    attestation: Optional[str] = None
+    prime_scheme: Optional[str] = None  # hash-to-prime scheme of the chain
+
+    def __post_init__(self):
+        if self.phi is None and self.p is not None and self.q is not None:
+            object.__setattr__(self, 'phi', (self.p - 1) * (self.q - 1))
+
+    @property
+    def key_size(self) -> int:
+        return self.N.bit_length()
+
+    @property
+    def has_trapdoor(self) -> bool:
+        return self.phi is not None
+
+    def to_dict(self) -> dict:
+        """Convert to dict for storage (ints as hex strings)."""
+        data = {"version": PARAMS_VERSION, "N": hex(self.N), "g": self.g}
+        for name in ("p", "q", "phi"):
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = hex(value)
+        if self.attestation is not None:
+            data["attestation"] = self.attestation
+        if self.prime_scheme is not None:
+            data["prime_scheme"] = self.prime_scheme
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "AccumulatorParams":
+        """Create from a stored dict or an AccumulatorEnclave result."""
+        if data.get("version", PARAMS_VERSION) != PARAMS_VERSION:
+            raise ValueError(f"unsupported params version {data.get('version')}")
+
+        def number(name: str) -> Optional[int]:
+            value = data.get(name)
+            if isinstance(value, str):
+                return int(value, 16)
+            return value
+
+        return cls(
+            N=number("N"),
+            g=data.get("g", DEFAULT_GENERATOR),
+            p=number("p"),
+            q=number("q"),
+            phi=number("phi"),
+            attestation=data.get("attestation"),
+            prime_scheme=data.get("prime_scheme"),
+        )
+
+    def save(self, path: str):
+        """Write durably (temp file, fsync, rename), readable by the owner only."""
+        tmp_path = f"{path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.to_dict(), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "AccumulatorParams":
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+
+def params_path(wal_path: str) -> str:
+    """Parameter file that belongs to a WAL."""
+    return f"{wal_path}.params"
+
+
+def generate_params(key_size: int = 2048) -> AccumulatorParams:
+    """Generate a fresh modulus (blocking, seconds for 2048 bits)."""
+    from Crypto.PublicKey import RSA
+    key = RSA.generate(key_size)
+    return AccumulatorParams(N=key.n, p=key.p, q=key.q)
+
+
+async def generate_params_async(
+    key_size: int = 2048,
+    executor: Optional[Executor] = None
+) -> AccumulatorParams:
+    """Generate a fresh modulus in a worker process."""
+    loop = asyncio.get_running_loop()
+    if executor is not None:
+        return await loop.run_in_executor(executor, generate_params, key_size)
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return await loop.run_in_executor(pool, generate_params, key_size)
+
+
+async def obtain_params(key_size: int = 2048, enclave=None) -> AccumulatorParams:
+    """Parameters for a new accumulator: enclave, dev pool, or a worker process."""
+    if enclave is not None:
+        return AccumulatorParams.from_dict(await asyncio.to_thread(enclave.create_accumulator))
+    pool = ParamPool.from_env(key_size)
+    if pool is not None:
+        return await asyncio.to_thread(pool.take)
+    return await generate_params_async(key_size)
+
+
+class ParamPool:
+    """
+    Pre-generated parameters for tests and dev runs.
+
+    Files live in <directory>/<key_size>/<n>.params. take() returns one
+    of them at random, first filling the pool to size (in parallel
+    worker processes) if needed.
+    """
+
+    def __init__(self, directory: str, key_size: int = 2048, size: int = 4):
+        self.directory = os.path.join(directory, str(key_size))
+        self.key_size = key_size
+        self.size = size
+
+    @classmethod
+    def from_env(cls, key_size: int = 2048) -> Optional["ParamPool"]:
+        """Pool named by SCM_PARAM_POOL, or None when it is not set."""
+        directory = os.environ.get(POOL_ENV)
+        return cls(directory, key_size) if directory else None
+
+    def files(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith('.params')
+        )
+
+    def fill(self, executor: Optional[Executor] = None) -> int:
+        """Generate missing parameter files; returns how many were added."""
+        missing = self.size - len(self.files())
+        if missing <= 0:
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        if executor is None:
+            with ProcessPoolExecutor(max_workers=missing) as pool:
+                generated = list(pool.map(generate_params, [self.key_size] * missing))
+        else:
+            generated = list(executor.map(generate_params, [self.key_size] * missing))
+        for params in generated:
+            params.save(os.path.join(self.directory, f"{params.N % 16**12:012x}.params"))
+        return len(generated)
+
+    def take(self) -> AccumulatorParams:
+        files = self.files()
+        if not files:
+            self.fill()
+            files = self.files()
+        return AccumulatorParams.load(random.choice(files))
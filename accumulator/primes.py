@@ -0,0 +1,227 @@
+"""
+Hash-to-prime derivation for the RSA accumulator.
+
+Candidates are filtered with a precomputed small-prime wheel before any
+probabilistic test, a single base-2 strong probable prime test removes
+almost every remaining composite, and only the survivor pays for the
+strong Lucas test that completes Baillie-PSW. Derived primes are kept in
+a bounded LRU cache keyed by the element hash, so re-adding, removing or
+re-verifying an element does not derive its prime again.
+
+Schemes:
+- "nonce": prime = first H(data || nonce) (top bit set, odd) that is prime.
+  Deterministic, with no sequential scan through consecutive integers.
+- "scan":  prime = first prime >= H(data). Same result as the original
+  sequential isPrime() scan, kept for chains written with it.
+"""
+
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from itertools import count
+from typing import List, Optional
+
+from Crypto.Util import number
+
+
+SCHEMES = ("nonce", "scan")
+# Scheme for new chains; existing chains keep the one recorded in their params
+DEFAULT_SCHEME = "nonce"
+
+
+def _small_primes(limit: int) -> List[int]:
+    """Sieve of Eratosthenes (odd primes below limit)."""
+    sieve = bytearray([1]) * limit
+    sieve[0:2] = b'\x00\x00'
+    for i in range(2, int(limit ** 0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytearray(len(range(i * i, limit, i)))
+    return [p for p in range(3, limit) if sieve[p]]
+
+
+SMALL_PRIMES = _small_primes(2048)
+_WHEEL = math.prod(SMALL_PRIMES) * 2
+_SCAN_WINDOW = 2048
+
+
+def is_strong_probable_prime(n: int, base: int = 2) -> bool:
+    """Single-base Miller-Rabin round."""
+    d = n - 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+    x = pow(base, d, n)
+    if x == 1 or x == n - 1:
+        return True
+    for _ in range(s - 1):
+        x = x * x % n
+        if x == n - 1:
+            return True
+    return False
+
+
+def _jacobi(a: int, n: int) -> int:
+    """Jacobi symbol (a/n) for odd positive n."""
+    a %= n
+    result = 1
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+def is_strong_lucas_probable_prime(n: int) -> bool:
+    """Strong Lucas test with Selfridge parameters (odd n > 2)."""
+    root = math.isqrt(n)
+    if root * root == n:
+        return False
+
+    D = 5
+    while True:
+        j = _jacobi(D, n)
+        if j == -1:
+            break
+        if j == 0 and abs(D) != n:
+            return False
+        D = -D - 2 if D > 0 else -D + 2
+    P, Q = 1, (1 - D) // 4
+
+    d = n + 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+
+    # U_1, V_1, Q^1; walk the bits of d below the leading one
+    U, V, Qk = 1, P, Q % n
+    for bit in bin(d)[3:]:
+        U, V = U * V % n, (V * V - 2 * Qk) % n
+        Qk = Qk * Qk % n
+        if bit == '1':
+            U, V = P * U + V, D * U + P * V
+            U = ((U + n) if U & 1 else U) // 2 % n
+            V = ((V + n) if V & 1 else V) // 2 % n
+            Qk = Qk * Q % n
+
+    if U == 0 or V == 0:
+        return True
+    for _ in range(s - 1):
+        V = (V * V - 2 * Qk) % n
+        if V == 0:
+            return True
+        Qk = Qk * Qk % n
+    return False
+
+
+def is_probable_prime(n: int) -> bool:
+    """Wheel filter, one cheap Miller-Rabin round, then strong Lucas (BPSW)."""
+    if n < SMALL_PRIMES[-1] * SMALL_PRIMES[-1]:
+        return number.isPrime(n) if n > 1 else False
+    if math.gcd(n, _WHEEL) != 1:
+        return False
+    return is_strong_probable_prime(n) and is_strong_lucas_probable_prime(n)
+
+
+def derive_prime(data: bytes, scheme: str = "nonce", bits: int = 256) -> int:
+    """Deterministically map data to a prime (uncached)."""
+    if scheme == "nonce":
+        return _derive_nonce(data, bits)
+    if scheme == "scan":
+        return _derive_scan(data)
+    raise ValueError(f"unknown prime scheme {scheme!r}")
+
+
+def _derive_nonce(data: bytes, bits: int) -> int:
+    top = 1 << (bits - 1)
+    for nonce in count():
+        digest = hashlib.sha256(data + nonce.to_bytes(4, 'big')).digest()
+        candidate = (int.from_bytes(digest, 'big') >> (256 - bits)) | top | 1
+        if is_probable_prime(candidate):
+            return candidate
+
+
+def _derive_scan(data: bytes) -> int:
+    start = int.from_bytes(hashlib.sha256(data).digest(), 'big')
+    if start < _SCAN_WINDOW:
+        candidate = start
+        while not number.isPrime(candidate):
+            candidate += 1
+        return candidate
+
+    while True:
+        # Segmented sieve: strike multiples of small primes in the window
+        window = bytearray([1]) * _SCAN_WINDOW
+        window[(-start) % 2::2] = bytearray(len(range((-start) % 2, _SCAN_WINDOW, 2)))
+        for p in SMALL_PRIMES:
+            first = (-start) % p
+            window[first::p] = bytearray(len(range(first, _SCAN_WINDOW, p)))
+
+        for offset in range(_SCAN_WINDOW):
+            if window[offset]:
+                candidate = start + offset
+                if is_strong_probable_prime(candidate) and is_strong_lucas_probable_prime(candidate):
+                    return candidate
+        start += _SCAN_WINDOW
+
+
+class PrimeDeriver:
+    """Hash-to-prime engine with a bounded LRU cache."""
+
+    def __init__(self, scheme: str = "nonce", bits: int = 256, cache_size: int = 65536):
+        if scheme not in SCHEMES:
+            raise ValueError(f"unknown prime scheme {scheme!r}")
+        self.scheme = scheme
+        self.bits = bits
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def derive(self, data: bytes) -> int:
+        """Prime for data, from cache when possible."""
+        with self._lock:
+            prime = self._cache.get(data)
+            if prime is not None:
+                self._cache.move_to_end(data)
+                self.hits += 1
+                return prime
+            self.misses += 1
+
+        prime = derive_prime(data, self.scheme, self.bits)
+        self.remember(data, prime)
+        return prime
+
+    def cached(self, data: bytes) -> Optional[int]:
+        """Prime for data if it is cached, without deriving it."""
+        with self._lock:
+            prime = self._cache.get(data)
+            if prime is not None:
+                self._cache.move_to_end(data)
+                self.hits += 1
+            return prime
+
+    def remember(self, data: bytes, prime: int):
+        """Insert an externally derived prime into the cache."""
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[data] = prime
+            self._cache.move_to_end(data)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def __call__(self, data: bytes) -> int:
+        return self.derive(data)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+def derive_primes(datas: List[bytes], scheme: str = "nonce", bits: int = 256) -> List[int]:
+    """Derive primes for a chunk of elements (process-pool entry point)."""
+    return [derive_prime(data, scheme, bits) for data in datas]
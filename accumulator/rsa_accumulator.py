@@ -3,18 +3,32 @@ RSA Accumulator for incremental proofs of scar chain.
 Based on: "Dynamic Universal Accumulators with DLP" (Boneh et al.)
 """
 
-import hashlib
-from dataclasses import dataclass
-from typing import List, Optional, Tuple
+import math
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import List, Optional, Tuple, Union
 import asyncio
 
-# For real cryptography use pycryptodome or cryptography
-from Crypto.PublicKey import RSA
-from Crypto.Util import number
-
+from accumulator.batch import batch_check, root_factor
+from accumulator.modexp import PowBackend, get_backend
+from accumulator.params import (
+    DEFAULT_GENERATOR,
+    LEGACY_PRIME_SCHEME,
+    AccumulatorParams,
+    obtain_params,
+    params_path,
+)
+from accumulator.poe import ExponentiationProof, prove_exponentiation
+from accumulator.primes import DEFAULT_SCHEME as DEFAULT_PRIME_SCHEME, PrimeDeriver, derive_primes
+from storage.snapshot import AccumulatorSnapshot
 from storage.wal_accumulator import AccumulatorWAL
 
 
+# Executors that can run the accumulator math off the event loop
+MATH_EXECUTORS = ("thread", "process")
+
+
 @dataclass(frozen=True)
 class AccumulatorProof:
     """Membership proof in accumulator."""
@@ -24,6 +38,14 @@ class AccumulatorProof:
     sequence: int = 0
 
 
+def _crt_root(value: int, e: int, p: int, q: int) -> int:
+    """e-th root of value mod p*q from the factorization (CRT recombination)."""
+    root_p = pow(value % p, pow(e, -1, p - 1), p)
+    root_q = pow(value % q, pow(e, -1, q - 1), q)
+    h = (root_p - root_q) * pow(q, -1, p) % p
+    return root_q + h * q
+
+
 class RSAAccumulator:
     """
     RSA accumulator with support for:
@@ -31,93 +53,472 @@ class RSAAccumulator:
     - Removing elements (O(1)) with private key
     - Instant verification (O(1))
     - Incremental proofs
+
+    By default the math runs inline on the event loop. With
+    math_executor ("thread", "process" or an Executor) prime derivation,
+    exponentiations, trapdoor roots and batch witnesses run there
+    instead. Value transitions and WAL appends stay strictly ordered
+    under one lock; only the math inside it is awaited, so other
+    coroutines keep running. "process" isolates the loop completely;
+    with "thread" a single big-int pow still holds the GIL.
     """
     
-    def __init__(self, key_size: int = 2048, wal_path: str = "accumulator.wal"):
-        # Generate RSA modulus N = p * q
+    def __init__(
+        self,
+        key_size: int = 2048,
+        wal_path: str = "accumulator.wal",
+        group_commit: bool = False,
+        prime_scheme: Optional[str] = None,
+        prime_cache_size: int = 65536,
+        prime_workers: Optional[int] = None,
+        backend: Union[str, PowBackend] = "builtin",
+        params: Optional[AccumulatorParams] = None,
+        enclave=None,
+        params_file: Optional[str] = None,
+        math_executor: Union[None, str, Executor] = None,
+        math_workers: Optional[int] = None
+    ):
+        # Exponentiation engine bound to N (see accumulator.modexp)
+        self.backend = get_backend(backend, 1) if isinstance(backend, str) else backend
+
+        # RSA modulus N = p * q, loaded rather than regenerated: explicit
+        # params, then <wal>.params; otherwise initialize() obtains them
+        # from the enclave, the dev pool or a worker process.
         # In production: generate in TEE, p and q destroyed after setup
-        key = RSA.generate(key_size)
-        self.N = key.n
-        self.phi = (key.p - 1) * (key.q - 1)
-        self.g = 65537  # Fixed generator
+        self.key_size = key_size
+        self.enclave = enclave
+        self.params_file = params_file or params_path(wal_path)
+        self.params: Optional[AccumulatorParams] = None
+        self._N: Optional[int] = None
+        self.phi: Optional[int] = None
+        # Factorization for CRT-split roots; None when only phi is known
+        self._factors: Optional[Tuple[int, int]] = None
+        self.g = DEFAULT_GENERATOR  # Fixed generator
+        # The file also records the chain's prime scheme, which explicit
+        # params do not override (see _resolve_prime_scheme)
+        self._stored_params: Optional[AccumulatorParams] = None
+        if os.path.exists(self.params_file):
+            self._stored_params = AccumulatorParams.load(self.params_file)
+            if params is None:
+                params = self._stored_params
+            elif params.N != self._stored_params.N:
+                raise ValueError(f"params do not match the modulus in {self.params_file}")
+        if params is not None:
+            self._apply_params(params)
         self.value = self.g
+
+        # Hash-to-prime engine with LRU cache. The scheme belongs to the
+        # chain: initialize() takes it from the params (see _resolve_prime_scheme)
+        self._requested_scheme = prime_scheme
+        self.primes = PrimeDeriver(scheme=prime_scheme or DEFAULT_PRIME_SCHEME, cache_size=prime_cache_size)
+
+        # Process pool for bulk prime derivation, created on first use
+        self.prime_workers = prime_workers
+        self._prime_pool: Optional[ProcessPoolExecutor] = None
+
+        # Executor for the CPU-heavy math; None runs it inline
+        self._owns_math_pool = isinstance(math_executor, str)
+        if self._owns_math_pool:
+            if math_executor not in MATH_EXECUTORS:
+                raise ValueError(f"math_executor must be one of {MATH_EXECUTORS} or an Executor")
+            pool_class = ThreadPoolExecutor if math_executor == "thread" else ProcessPoolExecutor
+            math_executor = pool_class(max_workers=math_workers)
+        self._math_pool: Optional[Executor] = math_executor
+        # Worker processes get plain pow() and module-level functions only
+        self._math_in_process = isinstance(math_executor, ProcessPoolExecutor)
+        # Orders value transitions and their WAL appends
+        self._order_lock = asyncio.Lock()
         
         # Write-Ahead Log for recovery
-        self.wal = AccumulatorWAL(wal_path)
+        self.wal = AccumulatorWAL(
+            wal_path,
+            group_commit=group_commit,
+            value_width=((self.N.bit_length() if self.N else key_size) + 7) // 8
+        )
         self.current_sequence = 0
-        
-    async def initialize(self):
-        """Initialize from WAL on startup."""
-        await self.wal.initialize_cache()
+
+    def _apply_params(self, params: AccumulatorParams):
+        self.params = params
+        self.N = params.N
+        self.g = params.g
+        self.phi = params.phi
+        self._factors = (params.p, params.q) if params.p and params.q else None
+
+    @property
+    def N(self) -> int:
+        """RSA modulus."""
+        return self._N
+
+    @N.setter
+    def N(self, value: int):
+        self._N = value
+        self.backend.bind(value)
+
+    async def initialize(self, snapshot: Optional[AccumulatorSnapshot] = None):
+        """Initialize from WAL (and optional snapshot) on startup."""
+        if snapshot is not None:
+            await self.wal.initialize_cache(snapshot.seq, snapshot.value)
+        else:
+            await self.wal.initialize_cache()
+
+        if self.N is None:
+            if self.wal.current_seq:
+                raise ValueError(
+                    f"{self.wal.path} has records but no parameter file "
+                    f"({self.params_file}); a new modulus cannot verify them"
+                )
+            params = await obtain_params(self.key_size, self.enclave)
+            self._apply_params(params)
+            await asyncio.to_thread(params.save, self.params_file)
+            self._stored_params = params
+            self.wal.value_width = (self.N.bit_length() + 7) // 8
+        elif self.wal.current_value >= self.N:
+            raise ValueError(f"{self.wal.path} was written under a different modulus")
+
+        await self._resolve_prime_scheme()
+
         self.current_sequence = self.wal.current_seq
         self.value = self.wal.current_value or self.g
+
+    async def _resolve_prime_scheme(self):
+        """
+        Use the scheme recorded with the chain in the params file, even
+        with explicit params. A file without one belongs to a chain built
+        with the legacy scheme if the WAL has records; a new chain records
+        the requested (or default) scheme. A recorded scheme is never
+        rewritten.
+        """
+        stored = self._stored_params
+        recorded = stored.prime_scheme if stored is not None else None
+        if self.params.prime_scheme is not None and recorded not in (None, self.params.prime_scheme):
+            raise ValueError(
+                f"params give prime scheme {self.params.prime_scheme!r}, "
+                f"{self.params_file} records {recorded!r}"
+            )
+        if recorded is None:
+            if self.params.prime_scheme is not None:
+                recorded = self.params.prime_scheme
+            elif self.wal.current_seq:
+                recorded = LEGACY_PRIME_SCHEME
+            else:
+                recorded = self._requested_scheme or DEFAULT_PRIME_SCHEME
+            # Record it in the file (keeping its contents when it exists)
+            stored = replace(stored or self.params, prime_scheme=recorded)
+            await asyncio.to_thread(stored.save, self.params_file)
+            self._stored_params = stored
+        self.params = replace(self.params, prime_scheme=recorded)
+        if self._requested_scheme is not None and self._requested_scheme != recorded:
+            raise ValueError(
+                f"{self.wal.path} was built with prime scheme {recorded!r}, "
+                f"not {self._requested_scheme!r}"
+            )
+        if self.primes.scheme != recorded:
+            self.primes = PrimeDeriver(scheme=recorded, bits=self.primes.bits, cache_size=self.primes.cache_size)
         
     def _hash_to_prime(self, data: bytes) -> int:
-        """Hash data to a prime number."""
-        h = hashlib.sha256(data).digest()
-        candidate = int.from_bytes(h, byteorder='big')
-        
-        # Find next prime
-        while not number.isPrime(candidate):
-            candidate += 1
-            
-        return candidate
-        
+        """Hash data to a prime number (cached)."""
+        return self.primes.derive(data)
+
+    async def _offload(self, fn, *args):
+        """fn(*args) in the math executor, or inline without one."""
+        if self._math_pool is None:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._math_pool, fn, *args)
+
+    async def _pow(self, base: int, exponent: int) -> int:
+        if self._math_in_process:
+            return await self._offload(pow, base, exponent, self.N)
+        return await self._offload(self.backend.pow, base, exponent)
+
+    async def _prime(self, element_hash: bytes) -> int:
+        """_hash_to_prime through the math executor."""
+        if not self._math_in_process:
+            return await self._offload(self._hash_to_prime, element_hash)
+        prime = self.primes.cached(element_hash)
+        if prime is None:
+            [prime] = await self._offload(
+                derive_primes, [element_hash], self.primes.scheme, self.primes.bits
+            )
+            self.primes.misses += 1
+            self.primes.remember(element_hash, prime)
+        return prime
+
+    async def _root(self, value: int, e: int) -> int:
+        """_trapdoor_root through the math executor."""
+        if self._factors is None:
+            if self.phi is None:
+                raise ValueError("removal needs the trapdoor (phi or p, q)")
+            return await self._pow(value, pow(e, -1, self.phi))
+        return await self._offload(_crt_root, value, e, *self._factors)
+
     async def add(self, element_hash: bytes) -> Tuple[int, AccumulatorProof]:
         """
         Add element to accumulator.
         Returns new accumulator value and proof.
         """
-        prime = self._hash_to_prime(element_hash)
-        old_acc = self.value
-        
-        # New accumulator value: A_new = A_old^prime mod N
-        self.value = pow(self.value, prime, self.N)
-        self.current_sequence += 1
-        
-        # Save to WAL
-        await self.wal.append("ADD", self.value, element_hash.hex()[:8])
+        prime = await self._prime(element_hash)
+
+        async with self._order_lock:
+            old_acc = self.value
+
+            # New accumulator value: A_new = A_old^prime mod N
+            self.value = new_acc = await self._pow(old_acc, prime)
+            self.current_sequence += 1
+            sequence = self.current_sequence
+
+            # Save to WAL: started in order, awaited outside the lock so
+            # group commit can still batch concurrent adds
+            logged = asyncio.ensure_future(
+                self.wal.append("ADD", new_acc, element_hash.hex()[:8], element=prime)
+            )
+        await logged
         
         # Witness is the old accumulator value
         proof = AccumulatorProof(
             witness=old_acc,
-            accumulator=self.value,
+            accumulator=new_acc,
             element_hash=prime,  # Use prime, not original hash!
-            sequence=self.current_sequence
+            sequence=sequence
         )
         
-        return self.value, proof
+        return new_acc, proof
+
+    async def _derive_primes(self, element_hashes: List[bytes], parallel_threshold: int) -> List[int]:
+        """Primes for many elements: cache first, then a process pool for misses."""
+        primes: List[Optional[int]] = [self.primes.cached(h) for h in element_hashes]
+        missing = [i for i, prime in enumerate(primes) if prime is None]
+
+        if len(missing) < parallel_threshold:
+            if self._math_pool is None:
+                for i in missing:
+                    primes[i] = self._hash_to_prime(element_hashes[i])
+                return primes
+            if missing:
+                derived = await self._offload(
+                    derive_primes,
+                    [element_hashes[i] for i in missing],
+                    self.primes.scheme,
+                    self.primes.bits
+                )
+                self.primes.misses += len(missing)
+                for i, prime in zip(missing, derived):
+                    primes[i] = prime
+                    self.primes.remember(element_hashes[i], prime)
+            return primes
+
+        if self._prime_pool is None:
+            self._prime_pool = ProcessPoolExecutor(max_workers=self.prime_workers)
+        loop = asyncio.get_running_loop()
+        workers = self._prime_pool._max_workers
+        chunk_size = max(1, math.ceil(len(missing) / (workers * 4)))
+        chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+
+        results = await asyncio.gather(*[
+            loop.run_in_executor(
+                self._prime_pool,
+                derive_primes,
+                [element_hashes[i] for i in chunk],
+                self.primes.scheme,
+                self.primes.bits
+            )
+            for chunk in chunks
+        ])
+        self.primes.misses += len(missing)
+        for chunk, chunk_primes in zip(chunks, results):
+            for i, prime in zip(chunk, chunk_primes):
+                primes[i] = prime
+                self.primes.remember(element_hashes[i], prime)
+        return primes
+
+    async def add_many(
+        self,
+        element_hashes: List[bytes],
+        parallel_threshold: int = 64
+    ) -> Tuple[int, List[AccumulatorProof]]:
+        """
+        Add many elements with one exponentiation.
+
+        Primes are derived in a process pool (for batches of at least
+        parallel_threshold uncached elements), multiplied into one
+        exponent and applied with a single pow. Every element still gets
+        its own AccumulatorProof against the new value, and the batch is
+        written to the WAL as one group with a single fsync.
+        Returns new accumulator value and proofs, in input order.
+        """
+        old_acc, primes, new_acc, proofs = await self._add_batch(element_hashes, parallel_threshold)
+        return new_acc, proofs
+
+    async def add_many_with_proof(
+        self,
+        element_hashes: List[bytes],
+        parallel_threshold: int = 64
+    ) -> Tuple[int, List[AccumulatorProof], ExponentiationProof]:
+        """
+        add_many plus a Wesolowski proof that the new value is the old
+        value raised to the product of the added primes, so third parties
+        can check the transition without redoing the exponentiation.
+        """
+        old_acc, primes, new_acc, proofs = await self._add_batch(element_hashes, parallel_threshold)
+        sequence = proofs[0].sequence if proofs else self.current_sequence + 1
+        transition = await asyncio.to_thread(
+            prove_exponentiation, self.N, old_acc, primes, new_acc, sequence
+        )
+        return new_acc, proofs, transition
+
+    async def _add_batch(
+        self,
+        element_hashes: List[bytes],
+        parallel_threshold: int
+    ) -> Tuple[int, List[int], int, List[AccumulatorProof]]:
+        """Shared add_many path: returns (old value, primes, new value, proofs)."""
+        if not element_hashes:
+            return self.value, [], self.value, []
+
+        primes = await self._derive_primes(element_hashes, parallel_threshold)
+
+        async with self._order_lock:
+            old_acc = self.value
+            self.value = new_acc = await self._pow(old_acc, math.prod(primes))
+            first_sequence = self.current_sequence + 1
+            self.current_sequence += len(primes)
+
+            logged = asyncio.ensure_future(self.wal.append_many([
+                ("ADD_BATCH", new_acc, element_hash.hex()[:8], prime)
+                for element_hash, prime in zip(element_hashes, primes)
+            ]))
+        await logged
+
+        witnesses = await self._offload(root_factor, old_acc, primes, self.N)
+        proofs = [
+            AccumulatorProof(
+                witness=witness,
+                accumulator=new_acc,
+                element_hash=prime,
+                sequence=first_sequence + i
+            )
+            for i, (witness, prime) in enumerate(zip(witnesses, primes))
+        ]
+        return old_acc, primes, new_acc, proofs
         
     def verify(self, proof: AccumulatorProof) -> bool:
         """
         Verify membership proof.
-        witness^element ≡ accumulator (mod N)
+        witness^element ≡ ±accumulator (mod N)
+
+        w^p == -A is accepted, as batch_verify does: -w is then a valid
+        witness ((-w)^p == -w^p for odd p), so it still certifies
+        membership.
         """
         try:
-            # witness^element mod N should equal accumulator
-            computed = pow(proof.witness, proof.element_hash, self.N)
-            return computed == proof.accumulator
+            # witness^element mod N should equal ±accumulator
+            computed = self.backend.pow(proof.witness, proof.element_hash)
+            return computed in (proof.accumulator % self.N, -proof.accumulator % self.N)
         except Exception as e:
             print(f"Verification error: {e}")
             return False
             
-    def batch_verify(self, proofs: List[AccumulatorProof]) -> bool:
-        """Batch verify multiple proofs."""
-        return all(self.verify(p) for p in proofs)
+    def batch_verify(
+        self,
+        proofs: List[AccumulatorProof],
+        executor: Optional[Executor] = None,
+        chunk_size: int = 256,
+        security_bits: int = 64
+    ) -> bool:
+        """
+        Batch verify multiple proofs.
+
+        Uses randomized small-exponent batching (see batch_check): two
+        multi-exponentiations for the whole set instead of one full
+        exponentiation per proof. Proofs may be against different
+        accumulator values. With an executor (a ProcessPoolExecutor for
+        real parallelism, pow holds the GIL) the set is split into
+        chunk_size pieces that are batch-checked concurrently.
+        """
+        if not proofs:
+            return True
+        if executor is None:
+            chunks = [proofs]
+        else:
+            chunks = [proofs[i:i + chunk_size] for i in range(0, len(proofs), chunk_size)]
+
+        def check_args(chunk: List[AccumulatorProof]) -> tuple:
+            return (
+                self.N,
+                [p.witness for p in chunk],
+                [p.element_hash for p in chunk],
+                [p.accumulator for p in chunk],
+                security_bits
+            )
+
+        try:
+            if len(chunks) == 1:
+                return batch_check(*check_args(chunks[0]))
+            futures = [executor.submit(batch_check, *check_args(chunk)) for chunk in chunks]
+            return all(future.result() for future in futures)
+        except Exception as e:
+            print(f"Verification error: {e}")
+            return False
         
     async def remove(self, element_hash: bytes) -> int:
         """
         Remove element (requires phi(N)).
         Used only for chain reorganization (rare).
         """
-        prime = self._hash_to_prime(element_hash)
-        
-        # Find inverse modulo phi(N)
-        inv = pow(prime, -1, self.phi)
-        
-        # new_value = accumulator^inv mod N
-        self.value = pow(self.value, inv, self.N)
-        self.current_sequence += 1
-        
-        await self.wal.append("REMOVE", self.value, element_hash.hex()[:8])
-        return self.value
+        prime = await self._prime(element_hash)
+
+        async with self._order_lock:
+            # new_value = accumulator^(prime^-1 mod phi(N)) mod N
+            self.value = new_acc = await self._root(self.value, prime)
+            self.current_sequence += 1
+
+            logged = asyncio.ensure_future(
+                self.wal.append("REMOVE", new_acc, element_hash.hex()[:8], element=prime)
+            )
+        await logged
+        return new_acc
+
+    async def remove_many(self, element_hashes: List[bytes]) -> int:
+        """
+        Remove many elements with one inversion and one exponentiation:
+        the primes are multiplied, the product is inverted once and a
+        single root is taken. Logged as one REMOVE_BATCH group.
+        """
+        if not element_hashes:
+            return self.value
+        primes = [await self._prime(h) for h in element_hashes]
+
+        async with self._order_lock:
+            self.value = new_acc = await self._root(self.value, math.prod(primes))
+            self.current_sequence += len(primes)
+
+            logged = asyncio.ensure_future(self.wal.append_many([
+                ("REMOVE_BATCH", new_acc, element_hash.hex()[:8], prime)
+                for element_hash, prime in zip(element_hashes, primes)
+            ]))
+        await logged
+        return new_acc
+
+    def _trapdoor_root(self, value: int, e: int) -> int:
+        """
+        e-th root of value mod N using the trapdoor.
+
+        With the factorization, the root is taken mod p and mod q with
+        exponents reduced mod p-1 and q-1 and recombined (CRT): two
+        half-size exponentiations, roughly 3-4x faster than one mod N.
+        """
+        if self._factors is None:
+            if self.phi is None:
+                raise ValueError("removal needs the trapdoor (phi or p, q)")
+            return self.backend.pow(value, pow(e, -1, self.phi))
+
+        return _crt_root(value, e, *self._factors)
+
+    async def close(self):
+        """Flush the WAL and stop the prime derivation and math pools."""
+        await self.wal.close()
+        if self._prime_pool is not None:
+            self._prime_pool.shutdown()
+            self._prime_pool = None
+        if self._math_pool is not None and self._owns_math_pool:
+            self._math_pool.shutdown()
+            self._math_pool = None
@@ -0,0 +1,219 @@
+"""
+Sharded scar chain: independent accumulator + WAL pairs per shard.
+
+A single IncrementalChainProof serializes every scar behind one WAL lock
+and one fsync stream. ShardedChainProof routes each scar to one of
+shard_count chains by a stable hash of its operator_id (or genesis_ref),
+so shards append and fsync in parallel. All shards share one modulus
+(<wal>.params) and each has its own WAL (<wal>.shard007, ...).
+
+The shard roots (accumulator values) are combined into a top-level
+commitment: the root of a Merkle tree over the shards in index order.
+shard_proof() yields the path that ties one shard root to it.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from collections import defaultdict
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+
+from accumulator.incremental_proof import IncrementalChainProof
+from accumulator.params import AccumulatorParams, obtain_params, params_path
+from accumulator.primes import DEFAULT_SCHEME as DEFAULT_PRIME_SCHEME
+from accumulator.rsa_accumulator import AccumulatorProof
+
+
+SHARD_KEYS = ("operator_id", "genesis_ref")
+
+
+def shard_index(key: str, shard_count: int) -> int:
+    """Stable shard for a routing key (same result in every process)."""
+    digest = hashlib.sha256(key.encode()).digest()
+    return int.from_bytes(digest[:8], 'big') % shard_count
+
+
+def _leaf(index: int, value: int, width: int) -> bytes:
+    return hashlib.sha256(b'\x00' + index.to_bytes(4, 'big') + value.to_bytes(width, 'big')).digest()
+
+
+def _node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b'\x01' + left + right).digest()
+
+
+def _levels(leaves: List[bytes]) -> List[List[bytes]]:
+    """Merkle tree levels, leaves first; an odd node is promoted as is."""
+    levels = [leaves]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        levels.append([
+            _node(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+            for i in range(0, len(level), 2)
+        ])
+    return levels
+
+
+def verify_shard_root(
+    commitment: bytes,
+    index: int,
+    value: int,
+    path: List[bytes],
+    shard_count: int,
+    width: int
+) -> bool:
+    """Check that a shard's accumulator value is part of the commitment."""
+    node = _leaf(index, value, width)
+    size = shard_count
+    steps = iter(path)
+    while size > 1:
+        sibling = index ^ 1
+        if sibling < size:
+            other = next(steps, None)
+            if other is None:
+                return False
+            node = _node(other, node) if index & 1 else _node(node, other)
+        index //= 2
+        size = (size + 1) // 2
+    return node == commitment and next(steps, None) is None
+
+
+class ShardedChainProof:
+    """Routes scars to shard chains and commits to all shard roots."""
+
+    def __init__(
+        self,
+        genesis_hash: bytes,
+        wal_path: str = "chain.wal",
+        shard_count: int = 16,
+        shard_by: str = "operator_id",
+        params: Optional[AccumulatorParams] = None,
+        key_size: int = 2048,
+        **chain_kwargs
+    ):
+        if shard_by not in SHARD_KEYS:
+            raise ValueError(f"shard_by must be one of {SHARD_KEYS}")
+        self.genesis = genesis_hash
+        self.wal_path = wal_path
+        self.shard_count = shard_count
+        self.shard_by = shard_by
+        self.params = params
+        self.key_size = key_size
+        self.chain_kwargs = chain_kwargs
+        self.manifest_path = f"{wal_path}.shards"
+        self.shards: List[IncrementalChainProof] = []
+
+    def shard_wal_path(self, index: int) -> str:
+        return f"{self.wal_path}.shard{index:03d}"
+
+    def shard_genesis(self, index: int) -> bytes:
+        """Per-shard genesis, derived from the chain genesis."""
+        return hashlib.sha256(self.genesis + index.to_bytes(4, 'big')).digest()
+
+    def _check_manifest(self):
+        """Shard layout is fixed once written: routing depends on it."""
+        manifest = {"shard_count": self.shard_count, "shard_by": self.shard_by}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r') as f:
+                stored = json.load(f)
+            if stored != manifest:
+                raise ValueError(f"{self.manifest_path} has layout {stored}, not {manifest}")
+            return
+        with open(self.manifest_path, 'w') as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def initialize(self):
+        """Load (or create) the shared modulus and initialize every shard."""
+        await asyncio.to_thread(self._check_manifest)
+
+        # Shards share the modulus; each shard's own params file still
+        # decides its prime scheme (see RSAAccumulator._resolve_prime_scheme)
+        path = params_path(self.wal_path)
+        if self.params is None:
+            if os.path.exists(path):
+                self.params = await asyncio.to_thread(AccumulatorParams.load, path)
+            else:
+                # Every shard is a new chain: record the scheme they use
+                params = await obtain_params(self.key_size, self.chain_kwargs.get("enclave"))
+                self.params = replace(params, prime_scheme=DEFAULT_PRIME_SCHEME)
+                await asyncio.to_thread(self.params.save, path)
+
+        kwargs = {k: v for k, v in self.chain_kwargs.items() if k != "enclave"}
+        self.shards = [
+            IncrementalChainProof(
+                genesis_hash=self.shard_genesis(i),
+                wal_path=self.shard_wal_path(i),
+                params=self.params,
+                **kwargs
+            )
+            for i in range(self.shard_count)
+        ]
+        await asyncio.gather(*(shard.initialize() for shard in self.shards))
+
+    def shard_for(self, key: str) -> int:
+        return shard_index(key, self.shard_count)
+
+    def shard_for_scar(self, scar) -> int:
+        """Shard of an OntologicalScar (by operator_id or genesis_ref)."""
+        return self.shard_for(str(getattr(scar, self.shard_by)))
+
+    async def add_scar(self, scar_hash: bytes, key: str) -> Tuple[int, AccumulatorProof]:
+        """Add a scar to the shard owning key; returns (shard index, proof)."""
+        index = self.shard_for(key)
+        return index, await self.shards[index].add_scar(scar_hash)
+
+    async def add_ontological_scar(self, scar) -> Tuple[int, AccumulatorProof]:
+        """Add an OntologicalScar, routed by its shard_by field."""
+        index = self.shard_for_scar(scar)
+        return index, await self.shards[index].add_scar(scar.to_hash())
+
+    async def add_scars(self, items: List[Tuple[bytes, str]]) -> List[Tuple[int, AccumulatorProof]]:
+        """
+        Add (scar_hash, key) pairs: one add_scars batch per shard, all
+        shards concurrently. Results are in input order.
+        """
+        by_shard: Dict[int, List[int]] = defaultdict(list)
+        for position, (_, key) in enumerate(items):
+            by_shard[self.shard_for(key)].append(position)
+
+        async def run(index: int, positions: List[int]):
+            proofs = await self.shards[index].add_scars([items[p][0] for p in positions])
+            return [(p, index, proof) for p, proof in zip(positions, proofs)]
+
+        results: List[Optional[Tuple[int, AccumulatorProof]]] = [None] * len(items)
+        for batch in await asyncio.gather(*(run(i, ps) for i, ps in by_shard.items())):
+            for position, index, proof in batch:
+                results[position] = (index, proof)
+        return results
+
+    @property
+    def value_width(self) -> int:
+        return (self.params.N.bit_length() + 7) // 8
+
+    def shard_roots(self) -> List[int]:
+        return [shard.accumulator_value for shard in self.shards]
+
+    def commitment(self) -> bytes:
+        """Top-level commitment over all shard roots."""
+        leaves = [_leaf(i, value, self.value_width) for i, value in enumerate(self.shard_roots())]
+        return _levels(leaves)[-1][0]
+
+    def shard_proof(self, index: int) -> List[bytes]:
+        """Merkle path from shard index's root to the commitment."""
+        leaves = [_leaf(i, value, self.value_width) for i, value in enumerate(self.shard_roots())]
+        path = []
+        for level in _levels(leaves)[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                path.append(level[sibling])
+            index //= 2
+        return path
+
+    def verify_chain(self) -> bool:
+        return all(shard.verify_chain() for shard in self.shards)
+
+    async def close(self):
+        await asyncio.gather(*(shard.close() for shard in self.shards))
@@ -10,6 +10,7 @@ from .memory_levels import (
     HierarchicalMemory
 )
 
+from .episodic_store import EpisodicStore, EpisodicView
 from .sleep_consolidator import SleepConsolidator
 
 __all__ = [
@@ -18,5 +19,7 @@ __all__ = [
     'SemanticCluster',
     'Archetype',
     'HierarchicalMemory',
+    'EpisodicStore',
+    'EpisodicView',
     'SleepConsolidator'
 ]
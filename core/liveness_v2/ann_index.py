@@ -0,0 +1,335 @@
+"""
+Approximate nearest-neighbour search for memory embeddings.
+
+Exact search (CentroidMatrix.search) scans every row. IVFPQIndex scans a
+few inverted lists of product-quantized codes instead:
+
+- a coarse k-means quantizer splits the unit vectors into nlist lists;
+- each vector's residual to its list centroid is encoded as m bytes,
+  one 8-bit codebook index per dim/m-sized subvector;
+- a query scores the nprobe nearest lists with lookup tables
+  (q . c_list + sum of per-subvector partial dot products) and re-ranks
+  the best candidates exactly against the CentroidMatrix the index
+  was built over.
+
+The index holds only codes and keys; vectors stay in the CentroidMatrix.
+Until train_size vectors exist the index is untrained and searches
+fall through to exact search. Training (k-means over the collection)
+is too slow for the insert path, so add() never trains: needs_training
+says when the collection has reached train_size, or has grown
+retrain_factor times since the last training, and the owner calls
+train() from a maintenance step (HierarchicalMemory.train_indexes).
+Inserts and deletes are incremental. save()/load() persist it as an
+.npz file.
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .memory_levels import CentroidMatrix
+
+
+INDEX_TYPES = ("exact", "ivfpq")
+# Codewords per PQ subspace (8-bit codes); training needs this many vectors
+CODEWORDS = 256
+
+
+def _kmeans(x: np.ndarray, k: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    """Lloyd's k-means (squared L2); returns k centroids"""
+    centroids = x[rng.choice(len(x), k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = _nearest(x, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, x)
+        counts = np.bincount(assign, minlength=k)
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        # Re-seed empty clusters from random points
+        if empty.any():
+            centroids[empty] = x[rng.choice(len(x), int(empty.sum()), replace=False)]
+    return centroids
+
+
+def _nearest(x: np.ndarray, centroids: np.ndarray, chunk: int = 16384) -> np.ndarray:
+    """Index of the nearest centroid for each row of x"""
+    half_norms = 0.5 * np.einsum('ij,ij->i', centroids, centroids)
+    out = np.empty(len(x), dtype=np.int64)
+    for start in range(0, len(x), chunk):
+        # argmin ||x - c||^2 == argmax x.c - ||c||^2 / 2
+        out[start:start + chunk] = np.argmax(x[start:start + chunk] @ centroids.T - half_norms, axis=1)
+    return out
+
+
+class _InvertedList:
+    """Growable (codes, slots) arrays; removal swaps the last entry in"""
+
+    def __init__(self, m: int):
+        self.codes = np.empty((0, m), dtype=np.uint8)
+        self.slots = np.empty(0, dtype=np.int64)
+        self.size = 0
+
+    def append(self, codes: np.ndarray, slots: np.ndarray) -> int:
+        first, end = self.size, self.size + len(slots)
+        if end > len(self.slots):
+            capacity = max(end, 2 * len(self.slots), 16)
+            grown_codes = np.empty((capacity, self.codes.shape[1]), dtype=np.uint8)
+            grown_slots = np.empty(capacity, dtype=np.int64)
+            grown_codes[:first] = self.codes[:first]
+            grown_slots[:first] = self.slots[:first]
+            self.codes, self.slots = grown_codes, grown_slots
+        self.codes[first:end] = codes
+        self.slots[first:end] = slots
+        self.size = end
+        return first
+
+    def remove(self, position: int) -> Optional[int]:
+        """Remove an entry; returns the slot moved into position, if any"""
+        last = self.size - 1
+        self.size = last
+        if position == last:
+            return None
+        self.codes[position] = self.codes[last]
+        self.slots[position] = self.slots[last]
+        return int(self.slots[position])
+
+
+class IVFPQIndex:
+    """Inverted-file index with product-quantized residuals"""
+
+    def __init__(
+        self,
+        vectors: CentroidMatrix,
+        m: int = 16,
+        nlist: Optional[int] = None,
+        nprobe: int = 16,
+        rerank: int = 64,
+        train_size: int = 4096,
+        retrain_factor: float = 4.0,
+        seed: int = 0
+    ):
+        if vectors.dim % m:
+            raise ValueError(f"dim {vectors.dim} is not divisible by m={m}")
+        if train_size < CODEWORDS:
+            raise ValueError(f"train_size must be at least {CODEWORDS}, got {train_size}")
+        self.vectors = vectors
+        self.dim = vectors.dim
+        self.m = m
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.rerank = rerank
+        self.train_size = train_size
+        self.retrain_factor = retrain_factor
+        self.seed = seed
+
+        self.coarse: Optional[np.ndarray] = None  # (nlist, dim)
+        self.codebooks: Optional[np.ndarray] = None  # (m, 256, dim / m)
+        self.trained_on = 0
+        self._lists: List[_InvertedList] = []
+        self._keys: List[Optional[str]] = []  # slot -> key
+        self._free: List[int] = []
+        self._where: Dict[str, Tuple[int, int, int]] = {}  # key -> (slot, list, position)
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._where
+
+    @property
+    def trained(self) -> bool:
+        return self.coarse is not None
+
+    @property
+    def needs_training(self) -> bool:
+        """Enough vectors for a first training, or grown retrain_factor times since"""
+        if not self.trained:
+            return len(self.vectors) >= self.train_size
+        return len(self.vectors) >= self.retrain_factor * self.trained_on
+
+    def train(self):
+        """Fit the quantizers on the current vectors and re-encode them all"""
+        data = self.vectors.matrix
+        keys = list(self.vectors.ids)
+        if len(data) < CODEWORDS:
+            raise ValueError(f"need at least {CODEWORDS} vectors to train")
+        rng = np.random.default_rng(self.seed)
+        nlist = self.nlist or int(min(4 * np.sqrt(len(data)), len(data) // 39))
+        # ~40 points per coarse list, and enough for 256 codewords per subspace
+        sample = data[rng.choice(len(data), min(len(data), max(40 * nlist, 16384)), replace=False)]
+
+        self.coarse = _kmeans(sample, max(1, nlist), 10, rng)
+        residuals = sample - self.coarse[_nearest(sample, self.coarse)]
+        dsub = self.dim // self.m
+        self.codebooks = np.stack([
+            _kmeans(np.ascontiguousarray(residuals[:, j * dsub:(j + 1) * dsub]), CODEWORDS, 10, rng)
+            for j in range(self.m)
+        ])
+        self.trained_on = len(data)
+
+        self._lists = [_InvertedList(self.m) for _ in range(len(self.coarse))]
+        self._keys, self._free, self._where = [], [], {}
+        self._insert(keys, data)
+
+    def _encode(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(list of each row, PQ codes of its residual)"""
+        lists = _nearest(x, self.coarse)
+        residuals = x - self.coarse[lists]
+        dsub = self.dim // self.m
+        codes = np.empty((len(x), self.m), dtype=np.uint8)
+        for j in range(self.m):
+            codes[:, j] = _nearest(np.ascontiguousarray(residuals[:, j * dsub:(j + 1) * dsub]), self.codebooks[j])
+        return lists, codes
+
+    def _insert(self, keys: List[str], x: np.ndarray):
+        lists, codes = self._encode(x)
+        slots = []
+        for key in keys:
+            if self._free:
+                slot = self._free.pop()
+                self._keys[slot] = key
+            else:
+                slot = len(self._keys)
+                self._keys.append(key)
+            slots.append(slot)
+        slots = np.asarray(slots, dtype=np.int64)
+        order = np.argsort(lists, kind='stable')
+        bounds = np.flatnonzero(np.diff(lists[order])) + 1
+        for group in np.split(order, bounds):
+            if not len(group):
+                continue
+            list_no = int(lists[group[0]])
+            first = self._lists[list_no].append(codes[group], slots[group])
+            for offset, i in enumerate(group):
+                self._where[keys[i]] = (int(slots[i]), list_no, first + offset)
+
+    def add(self, key: str, vector: Optional[np.ndarray] = None):
+        """
+        Index key, whose (normalized) vector is already in self.vectors
+        (or is given). Re-adding a key re-encodes it. Never trains (see
+        needs_training); before the first training this is a no-op.
+        """
+        if key in self._where:
+            self.remove(key)
+        if not self.trained:
+            return
+        if vector is None:
+            vector = self.vectors.matrix[self.vectors.rows[key]]
+        self._insert([key], CentroidMatrix.normalize(vector)[None, :])
+
+    def remove(self, key: str):
+        entry = self._where.pop(key, None)
+        if entry is None:
+            return
+        slot, list_no, position = entry
+        moved = self._lists[list_no].remove(position)
+        if moved is not None:
+            moved_key = self._keys[moved]
+            self._where[moved_key] = (moved, list_no, position)
+        self._keys[slot] = None
+        self._free.append(slot)
+
+    def search(
+        self,
+        vector: np.ndarray,
+        threshold: float = -1.0,
+        top_k: int = 10
+    ) -> Tuple[List[str], np.ndarray]:
+        """Approximate top_k keys with cosine similarity > threshold, best first"""
+        if not self.trained or len(self) < len(self.vectors):
+            rows, scores = self.vectors.search(vector, threshold, top_k)
+            return [self.vectors.ids[row] for row in rows], scores
+        query = CentroidMatrix.normalize(vector)
+        coarse_scores = self.coarse @ query
+        nprobe = min(self.nprobe, len(self.coarse))
+        probe = np.argpartition(-coarse_scores, nprobe - 1)[:nprobe]
+
+        dsub = self.dim // self.m
+        # (m, 256) partial dot products of the query with every codeword
+        table = np.einsum('mkd,md->mk', self.codebooks, query.reshape(self.m, dsub))
+        columns = np.arange(self.m)
+        slots, approx = [], []
+        for list_no in probe:
+            inverted = self._lists[list_no]
+            if not inverted.size:
+                continue
+            codes = inverted.codes[:inverted.size]
+            approx.append(coarse_scores[list_no] + table[columns, codes].sum(axis=1))
+            slots.append(inverted.slots[:inverted.size])
+        if not slots:
+            return [], np.empty(0, dtype=np.float32)
+        slots, approx = np.concatenate(slots), np.concatenate(approx)
+
+        # Exact scores for the best approximate candidates
+        keep = max(top_k, self.rerank)
+        if keep < len(approx):
+            best = np.argpartition(-approx, keep - 1)[:keep]
+            slots = slots[best]
+        keys = [self._keys[slot] for slot in slots]
+        rows = np.fromiter((self.vectors.rows[key] for key in keys), dtype=np.int64, count=len(keys))
+        scores = self.vectors.matrix[rows] @ query
+        order = np.argsort(-scores, kind='stable')[:top_k]
+        order = order[scores[order] > threshold]
+        return [keys[i] for i in order], scores[order]
+
+    def save(self, path: str):
+        """Write the index to path (atomically)"""
+        keys = [key for key in self._keys if key is not None]
+        lists = np.empty(len(keys), dtype=np.int64)
+        codes = np.empty((len(keys), self.m), dtype=np.uint8)
+        for i, key in enumerate(keys):
+            _, list_no, position = self._where[key]
+            lists[i] = list_no
+            codes[i] = self._lists[list_no].codes[position]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                params=np.array([self.m, self.nprobe, self.rerank, self.train_size, self.trained_on]),
+                coarse=self.coarse if self.trained else np.empty((0, self.dim), dtype=np.float32),
+                codebooks=self.codebooks if self.trained else np.empty(0, dtype=np.float32),
+                keys=np.array(keys, dtype=str),
+                lists=lists,
+                codes=codes
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, vectors: CentroidMatrix, **kwargs) -> "IVFPQIndex":
+        """
+        Read an index saved by save(). Keys missing from vectors are
+        dropped and vectors missing from the index are encoded. An index
+        saved untrained stays untrained (see needs_training).
+        """
+        with np.load(path) as data:
+            m, nprobe, rerank, train_size, trained_on = (int(v) for v in data["params"])
+            kwargs = {"m": m, "nprobe": nprobe, "rerank": rerank, "train_size": train_size, **kwargs}
+            index = cls(vectors, **kwargs)
+            if len(data["coarse"]):
+                index.coarse = data["coarse"]
+                index.codebooks = data["codebooks"]
+                index.trained_on = trained_on
+                index._lists = [_InvertedList(m) for _ in range(len(index.coarse))]
+                keys, lists, codes = data["keys"].tolist(), data["lists"], data["codes"]
+                for i, key in enumerate(keys):
+                    if key not in vectors.rows:
+                        continue
+                    slot = len(index._keys)
+                    index._keys.append(key)
+                    position = index._lists[lists[i]].append(codes[i:i + 1], np.array([slot]))
+                    index._where[key] = (slot, int(lists[i]), position)
+        if index.trained:
+            missing = [key for key in vectors.ids if key not in index._where]
+            if missing:
+                index._insert(missing, vectors.matrix[[vectors.rows[key] for key in missing]])
+        return index
+
+
+def create_index(kind: str, vectors: CentroidMatrix, **kwargs) -> Optional[IVFPQIndex]:
+    """Index over vectors by name ("exact" means none: scan the matrix)"""
+    if kind == "exact":
+        return None
+    if kind == "ivfpq":
+        return IVFPQIndex(vectors, **kwargs)
+    raise ValueError(f"Unknown index type {kind!r}; expected one of {INDEX_TYPES}")
@@ -0,0 +1,407 @@
+"""
+Columnar storage for episodic scars.
+
+An EpisodicScar is a dataclass with its own float64 embedding array,
+datetime objects and a __dict__, about 2 KB per scar. EpisodicStore keeps
+the same fields in columns instead:
+
+    embedding             float32 (n, 128), one contiguous matrix
+    entropy_score         float64
+    ontological_drift     float64
+    created_at            float64, seconds since the epoch (naive UTC)
+    last_accessed         float64, NaN for None
+    access_count          int64
+    cognitive_basis       int32 codes into an interned string table
+    incident_type         int32 codes into an interned string table
+
+plus plain lists for the free-form fields (hashes, deformation vector,
+chain-integrity fields). Rows are dense: deleting a scar moves the last
+row into its place, so iteration (row order) is insertion order only
+until the first delete. A TimeIndex keeps scar ids in created_at order
+for age-based selection.
+
+Embeddings are held as float32: to_dict() (and HierarchicalMemory.save)
+writes the float32-rounded values, so a saved scar reloads within ~1e-7
+relative error of its original float64 embedding, not bit-identical.
+
+The store is a MutableMapping of scar_id -> EpisodicView, so it replaces
+the old Dict[str, EpisodicScar]; views have every EpisodicScar attribute
+and write through to the columns. Bulk work reads the columns directly
+(e.g. store.embedding[rows]).
+"""
+
+from collections.abc import MutableMapping
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .memory_levels import EpisodicScar
+
+
+EPOCH = datetime(1970, 1, 1)
+
+# Numeric columns: name -> dtype
+NUMERIC_COLUMNS = {
+    "entropy_score": np.float64,
+    "ontological_drift": np.float64,
+    "created_at": np.float64,
+    "last_accessed": np.float64,
+    "access_count": np.int64,
+    "cognitive_basis": np.int32,
+    "incident_type": np.int32,
+}
+OBJECT_COLUMNS = (
+    "scar_id", "scar_hash", "deformation_vector",
+    "pre_state_hash", "post_state_hash", "accumulator_value", "witness_proof"
+)
+INTERNED_COLUMNS = ("cognitive_basis", "incident_type")
+
+
+def to_epoch(moment: datetime) -> float:
+    return (moment - EPOCH).total_seconds()
+
+
+def from_epoch(seconds: float) -> datetime:
+    return EPOCH + timedelta(seconds=float(seconds))
+
+
+class InternTable:
+    """Strings stored once, referred to by int32 code"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, codes: np.ndarray) -> List[str]:
+        return [self.values[c] for c in codes]
+
+
+class TimeIndex:
+    """
+    Keys ordered by timestamp: a sorted float64 array of times with a
+    parallel array of entry numbers. "Everything before t" is a binary
+    search plus a slice.
+
+    Removal is lazy: the entry is forgotten (entry number -> key) and
+    skipped by later queries. Dead entries at the old end are dropped
+    at once; the array is compacted when dead entries outnumber live
+    ones, so queries stay O(log n + k) amortized. Inserts are appends;
+    an out-of-order timestamp marks the array for a re-sort at the next
+    query.
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        self._times = np.empty(initial_capacity, dtype=np.float64)
+        self._entries = np.empty(initial_capacity, dtype=np.int64)
+        self._head = 0  # entries before head are all dead
+        self._end = 0
+        self._sorted = True
+        self._next_entry = 0
+        self._entry_of: Dict[str, int] = {}  # key -> live entry
+        self._key_of: Dict[int, str] = {}  # live entry -> key
+        self._dead = 0  # dead entries in [head, end)
+
+    def __len__(self) -> int:
+        return len(self._entry_of)
+
+    def add(self, key: str, time: float):
+        """Index key at time (replacing an earlier entry for key)"""
+        self.discard(key)
+        if self._end == len(self._times):
+            self._compact(grow=True)
+        if self._end > self._head and time < self._times[self._end - 1]:
+            self._sorted = False
+        entry = self._next_entry
+        self._next_entry += 1
+        self._times[self._end] = time
+        self._entries[self._end] = entry
+        self._end += 1
+        self._entry_of[key] = entry
+        self._key_of[entry] = key
+
+    def discard(self, key: str):
+        entry = self._entry_of.pop(key, None)
+        if entry is None:
+            return
+        del self._key_of[entry]
+        self._dead += 1
+        # Archival removes the oldest entries: drop them from the front
+        while self._head < self._end and int(self._entries[self._head]) not in self._key_of:
+            self._head += 1
+            self._dead -= 1
+        if self._dead > max(64, len(self)):
+            self._compact()
+
+    def _compact(self, grow: bool = False):
+        """Drop dead entries, restore time order, optionally double capacity"""
+        times = self._times[self._head:self._end]
+        entries = self._entries[self._head:self._end]
+        live = np.fromiter((int(e) in self._key_of for e in entries), dtype=bool, count=len(entries))
+        times, entries = times[live], entries[live]
+        if not self._sorted:
+            order = np.argsort(times, kind='stable')
+            times, entries = times[order], entries[order]
+        capacity = len(self._times)
+        if grow and len(times) * 2 > capacity:
+            capacity *= 2
+        new_times = np.empty(capacity, dtype=np.float64)
+        new_entries = np.empty(capacity, dtype=np.int64)
+        new_times[:len(times)] = times
+        new_entries[:len(entries)] = entries
+        self._times, self._entries = new_times, new_entries
+        self._head, self._end = 0, len(times)
+        self._sorted = True
+        self._dead = 0
+
+    def before(self, time: float) -> List[str]:
+        """Keys with a timestamp strictly before time, oldest first"""
+        if not self._sorted:
+            self._compact()
+        stop = self._head + int(np.searchsorted(self._times[self._head:self._end], time, side='left'))
+        key_of = self._key_of
+        return [key_of[e] for e in self._entries[self._head:stop].tolist() if e in key_of]
+
+
+def _column_property(name: str):
+    def get(self):
+        return self._store._columns[name][self._row].item()
+
+    def set(self, value):
+        self._store._columns[name][self._row] = value
+
+    return property(get, set)
+
+
+def _object_property(name: str):
+    def get(self):
+        return self._store._objects[name][self._row]
+
+    def set(self, value):
+        self._store._objects[name][self._row] = value
+
+    return property(get, set)
+
+
+def _interned_property(name: str):
+    def get(self):
+        return self._store.interned[name].values[self._store._columns[name][self._row]]
+
+    def set(self, value):
+        self._store._columns[name][self._row] = self._store.interned[name].code(value)
+
+    return property(get, set)
+
+
+class EpisodicView:
+    """
+    EpisodicScar look-alike backed by a row of an EpisodicStore.
+    The embedding is a float32 view into the store's matrix.
+    """
+
+    __slots__ = ("_store", "_id")
+
+    def __init__(self, store: "EpisodicStore", scar_id: str):
+        self._store = store
+        self._id = scar_id
+
+    @property
+    def _row(self) -> int:
+        return self._store._rows[self._id]
+
+    @property
+    def scar_id(self) -> str:
+        return self._id
+
+    scar_hash = _object_property("scar_hash")
+    deformation_vector = _object_property("deformation_vector")
+    pre_state_hash = _object_property("pre_state_hash")
+    post_state_hash = _object_property("post_state_hash")
+    accumulator_value = _object_property("accumulator_value")
+    witness_proof = _object_property("witness_proof")
+    entropy_score = _column_property("entropy_score")
+    ontological_drift = _column_property("ontological_drift")
+    access_count = _column_property("access_count")
+    cognitive_basis = _interned_property("cognitive_basis")
+    incident_type = _interned_property("incident_type")
+
+    @property
+    def embedding(self) -> np.ndarray:
+        return self._store._embedding[self._row]
+
+    @embedding.setter
+    def embedding(self, value: np.ndarray):
+        self._store._embedding[self._row] = value
+
+    @property
+    def created_at(self) -> datetime:
+        return from_epoch(self._store._columns["created_at"][self._row])
+
+    @created_at.setter
+    def created_at(self, value: datetime):
+        self._store._columns["created_at"][self._row] = to_epoch(value)
+        self._store.by_time.add(self._id, to_epoch(value))
+
+    @property
+    def last_accessed(self) -> Optional[datetime]:
+        seconds = self._store._columns["last_accessed"][self._row]
+        return None if np.isnan(seconds) else from_epoch(seconds)
+
+    @last_accessed.setter
+    def last_accessed(self, value: Optional[datetime]):
+        self._store._columns["last_accessed"][self._row] = np.nan if value is None else to_epoch(value)
+
+    age_hours = EpisodicScar.age_hours
+    salience = EpisodicScar.salience
+    to_dict = EpisodicScar.to_dict
+
+    def to_scar(self) -> EpisodicScar:
+        """Detached EpisodicScar copy"""
+        data = self.to_dict()
+        data["embedding"] = np.array(self.embedding)
+        data["created_at"] = self.created_at
+        data["last_accessed"] = self.last_accessed
+        return EpisodicScar(**data)
+
+    def __repr__(self) -> str:
+        return f"EpisodicView(scar_id={self._id!r})"
+
+
+class EpisodicStore(MutableMapping):
+    """scar_id -> EpisodicView mapping over columnar storage"""
+
+    def __init__(self, dim: int = 128, initial_capacity: int = 1024):
+        self.dim = dim
+        self._capacity = initial_capacity
+        self._embedding = np.zeros((initial_capacity, dim), dtype=np.float32)
+        self._columns = {
+            name: np.zeros(initial_capacity, dtype=dtype) for name, dtype in NUMERIC_COLUMNS.items()
+        }
+        self._objects: Dict[str, list] = {name: [] for name in OBJECT_COLUMNS}
+        self.interned = {name: InternTable() for name in INTERNED_COLUMNS}
+        self._rows: Dict[str, int] = {}  # scar_id -> row
+        self.by_time = TimeIndex(initial_capacity)  # scar_id by created_at
+
+    # Mapping protocol
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, scar_id) -> bool:
+        return scar_id in self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._objects["scar_id"]))
+
+    def __getitem__(self, scar_id: str) -> EpisodicView:
+        if scar_id not in self._rows:
+            raise KeyError(scar_id)
+        return EpisodicView(self, scar_id)
+
+    def __setitem__(self, scar_id: str, scar):
+        if scar_id != scar.scar_id:
+            raise ValueError(f"key {scar_id} does not match scar_id {scar.scar_id}")
+        self.add(scar)
+
+    def __delitem__(self, scar_id: str):
+        row = self._rows.pop(scar_id)
+        self.by_time.discard(scar_id)
+        last = len(self._rows)
+        if row != last:
+            # Keep rows dense: the last row moves into the gap
+            self._embedding[row] = self._embedding[last]
+            for column in self._columns.values():
+                column[row] = column[last]
+            for values in self._objects.values():
+                values[row] = values[last]
+            self._rows[self._objects["scar_id"][row]] = row
+        for values in self._objects.values():
+            values.pop()
+
+    # Columnar access (rows [0, len) are live)
+
+    @property
+    def ids(self) -> List[str]:
+        """scar_id of every row"""
+        return self._objects["scar_id"]
+
+    @property
+    def embedding(self) -> np.ndarray:
+        return self._embedding[:len(self)]
+
+    def column(self, name: str) -> np.ndarray:
+        """Numeric column (interned columns hold codes), live rows only"""
+        return self._columns[name][:len(self)]
+
+    def object_column(self, name: str) -> List:
+        """Free-form column (e.g. scar_hash), one entry per row; do not resize"""
+        return self._objects[name]
+
+    def row(self, scar_id: str) -> int:
+        return self._rows[scar_id]
+
+    def views(self, rows: Sequence[int]) -> List[EpisodicView]:
+        ids = self.ids
+        return [EpisodicView(self, ids[row]) for row in rows]
+
+    def created_before(self, moment: datetime) -> np.ndarray:
+        """Rows created strictly before moment, oldest first (O(log n + k))"""
+        rows = self._rows
+        ids = self.by_time.before(to_epoch(moment))
+        return np.fromiter((rows[scar_id] for scar_id in ids), dtype=np.int64, count=len(ids))
+
+    def salience(self, now: Optional[datetime] = None) -> np.ndarray:
+        """EpisodicScar.salience for every row"""
+        now = to_epoch(now or datetime.utcnow())
+        age_hours = (now - self.column("created_at")) / 3600
+        recency = np.maximum(0.1, 1.0 - age_hours / 168)
+        access_boost = 1.0 + 0.1 * self.column("access_count")
+        base = self.column("entropy_score") * np.abs(self.column("ontological_drift"))
+        return base * recency * access_boost
+
+    def add(self, scar):
+        """Insert or overwrite a scar (EpisodicScar or any look-alike)"""
+        if isinstance(scar, EpisodicView):
+            scar = scar.to_scar()
+        if scar.scar_id in self._rows:
+            del self[scar.scar_id]
+        row = len(self)
+        if row == self._capacity:
+            self._grow(2 * self._capacity)
+
+        self._embedding[row] = np.asarray(scar.embedding, dtype=np.float32).ravel()
+        columns = self._columns
+        columns["entropy_score"][row] = scar.entropy_score
+        columns["ontological_drift"][row] = scar.ontological_drift
+        columns["created_at"][row] = to_epoch(scar.created_at)
+        columns["last_accessed"][row] = np.nan if scar.last_accessed is None else to_epoch(scar.last_accessed)
+        columns["access_count"][row] = scar.access_count
+        for name in INTERNED_COLUMNS:
+            columns[name][row] = self.interned[name].code(getattr(scar, name))
+        for name in OBJECT_COLUMNS:
+            self._objects[name].append(getattr(scar, name))
+        self._rows[scar.scar_id] = row
+        self.by_time.add(scar.scar_id, columns["created_at"][row])
+
+    def _grow(self, capacity: int):
+        count = len(self)
+        embedding = np.zeros((capacity, self.dim), dtype=np.float32)
+        embedding[:count] = self._embedding[:count]
+        self._embedding = embedding
+        for name, column in self._columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:count] = column[:count]
+            self._columns[name] = grown
+        self._capacity = capacity
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the numeric columns"""
+        return self._embedding.nbytes + sum(column.nbytes for column in self._columns.values())
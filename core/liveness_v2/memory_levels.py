@@ -5,12 +5,19 @@ Three levels: Episodic (short-term), Semantic (long-term), Archetypal (core beli
 
 from enum import Enum
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, NamedTuple, Tuple
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import hashlib
+import itertools
 import numpy as np
 import json
 
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
 
 class MemoryLevel(Enum):
     EPISODIC = "episodic"
@@ -194,24 +201,277 @@ class Archetype:
         return cls(**data)
 
 
+# Shared by every VersionedDict, so a replaced dict never repeats a version
+_versions = itertools.count(1)
+
+
+class VersionedDict(dict):
+    """
+    dict whose version changes on every mutation, so a derived structure
+    (the embedding matrices) can tell whether it is still in sync.
+    Changing a value in place (e.g. a cluster's centroid) is not tracked.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = next(_versions)
+    
+    def _touch(self):
+        self.version = next(_versions)
+    
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._touch()
+    
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._touch()
+    
+    def __ior__(self, other):
+        self.update(other)
+        return self
+    
+    def pop(self, *args):
+        value = super().pop(*args)
+        self._touch()
+        return value
+    
+    def popitem(self):
+        item = super().popitem()
+        self._touch()
+        return item
+    
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self._touch()
+        return super().setdefault(key, default)
+    
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._touch()
+    
+    def clear(self):
+        super().clear()
+        self._touch()
+
+
+class SimilarityBatch(NamedTuple):
+    """
+    Matches of a batch of queries, CSR-style: query i matched
+    rows[offsets[i]:offsets[i + 1]] with the same slice of scores,
+    best first. Rows index CentroidMatrix.ids as of the search.
+    """
+    offsets: np.ndarray  # int64, (queries + 1,)
+    rows: np.ndarray  # int64
+    scores: np.ndarray  # float32
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    def matches(self, query: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, scores) of one query"""
+        start, end = self.offsets[query], self.offsets[query + 1]
+        return self.rows[start:end], self.scores[start:end]
+
+
+class CentroidMatrix:
+    """
+    Unit-normalized float32 vectors in one contiguous, growable matrix.
+    Row i belongs to ids[i]; cosine similarity against all rows is a
+    single matrix-vector product.
+    """
+    
+    def __init__(self, dim: int = 128, initial_capacity: int = 1024):
+        self.dim = dim
+        self._matrix = np.zeros((initial_capacity, dim), dtype=np.float32)
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}  # id -> row
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    @property
+    def matrix(self) -> np.ndarray:
+        """View of the filled rows"""
+        return self._matrix[:len(self.ids)]
+    
+    @staticmethod
+    def normalize(vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        # A zero vector stays zero: similarity 0 to everything
+        return vector / norm if norm > 0 else vector
+    
+    def set(self, key: str, vector: np.ndarray):
+        """Insert or overwrite the row for key"""
+        row = self.rows.get(key)
+        if row is None:
+            row = len(self.ids)
+            if row == len(self._matrix):
+                grown = np.zeros((max(1, 2 * row), self.dim), dtype=np.float32)
+                grown[:row] = self._matrix
+                self._matrix = grown
+            self.ids.append(key)
+            self.rows[key] = row
+        self._matrix[row] = self.normalize(vector)
+    
+    def remove(self, key: str):
+        """Drop key's row; the last row moves into its place"""
+        row = self.rows.pop(key, None)
+        if row is None:
+            return
+        last = len(self.ids) - 1
+        if row != last:
+            self._matrix[row] = self._matrix[last]
+            self.ids[row] = self.ids[last]
+            self.rows[self.ids[row]] = row
+        self.ids.pop()
+    
+    def search(
+        self,
+        vector: np.ndarray,
+        threshold: float = -1.0,
+        top_k: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rows with cosine similarity > threshold, best first (at most top_k).
+        Returns (rows, scores).
+        """
+        query = self.normalize(vector)
+        scores = self.matrix @ query
+        if top_k is not None and top_k < len(scores):
+            if top_k <= 0:
+                return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+            candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            candidates = np.arange(len(scores))
+        candidates = candidates[scores[candidates] > threshold]
+        order = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return order, scores[order]
+    
+    def search_batch(
+        self,
+        vectors: np.ndarray,
+        threshold: float = -1.0,
+        top_k: Optional[int] = None,
+        chunk_bytes: int = 64 << 20,
+        workers: int = 1
+    ) -> SimilarityBatch:
+        """
+        search() for every row of vectors. Queries are processed in
+        chunks whose similarity block (queries x rows, float32) stays
+        under chunk_bytes; with workers > 1, chunks run on a thread pool
+        with BLAS limited to one thread per worker (needs threadpoolctl).
+        """
+        queries = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms > 0, norms, 1)
+        
+        chunk = max(1, chunk_bytes // (4 * max(1, len(self.ids))))
+        starts = range(0, len(queries), chunk)
+        matrix = self.matrix
+        
+        def run(start: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+            return self._match_block(queries[start:start + chunk] @ matrix.T, threshold, top_k)
+        
+        if workers > 1 and len(starts) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                if threadpool_limits is not None:
+                    with threadpool_limits(limits=1, user_api='blas'):
+                        blocks = list(pool.map(run, starts))
+                else:
+                    blocks = list(pool.map(run, starts))
+        else:
+            blocks = [run(start) for start in starts]
+        
+        counts = np.concatenate([b[0] for b in blocks]) if blocks else np.empty(0, dtype=np.int64)
+        offsets = np.zeros(len(queries) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        rows = np.concatenate([b[1] for b in blocks]) if blocks else np.empty(0, dtype=np.int64)
+        scores = np.concatenate([b[2] for b in blocks]) if blocks else np.empty(0, dtype=np.float32)
+        return SimilarityBatch(offsets, rows, scores)
+    
+    @staticmethod
+    def _match_block(
+        scores: np.ndarray, threshold: float, top_k: Optional[int]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(matches per query, rows, scores) of a queries x rows score block"""
+        if top_k is not None and top_k < scores.shape[1]:
+            if top_k <= 0:
+                candidates = np.empty((len(scores), 0), dtype=np.int64)
+            else:
+                candidates = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+        else:
+            candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        picked = np.take_along_axis(scores, candidates, axis=1)
+        # Best first within each query; below-threshold entries sort last
+        order = np.argsort(-picked, axis=1, kind='stable')
+        candidates = np.take_along_axis(candidates, order, axis=1)
+        picked = np.take_along_axis(picked, order, axis=1)
+        keep = picked > threshold
+        return keep.sum(axis=1).astype(np.int64), candidates[keep].astype(np.int64), picked[keep]
+
+
 class HierarchicalMemory:
     """
     Main memory manager for SCM v2.0.
     Handles three levels of memory with automatic consolidation.
     """
     
-    def __init__(self, storage_path: str = "memory.db"):
+    def __init__(self, storage_path: str = "memory.db", index_type: str = "exact", **index_options):
+        from .episodic_store import EpisodicStore
+        
         self.storage_path = storage_path
+        # Nearest-neighbour index over the embeddings (see ann_index)
+        self.index_type = index_type
+        self.index_options = index_options
         
         # Three memory levels
-        self.episodic: Dict[str, EpisodicScar] = {}  # scar_id -> scar
-        self.semantic: Dict[str, SemanticCluster] = {}  # cluster_id -> cluster
-        self.archetypes: Dict[str, Archetype] = {}  # archetype_id -> archetype
+        self.episodic = EpisodicStore()  # scar_id -> EpisodicView (columnar)
+        self.semantic = {}  # cluster_id -> cluster
+        self.archetypes = {}  # archetype_id -> archetype
         
         # Indexes
         self.basis_index: Dict[str, List[str]] = {}  # cognitive_basis -> [scar_ids]
         self.type_index: Dict[str, List[str]] = {}  # incident_type -> [scar_ids]
+        self.centroids = CentroidMatrix()  # normalized semantic centroids
+        self.archetype_embeddings = CentroidMatrix()  # normalized archetype embeddings
+        self.semantic_index = self._create_index(self.centroids)
+        self.archetype_index = self._create_index(self.archetype_embeddings)
+        self._mark_synced()
+    
+    @property
+    def semantic(self) -> VersionedDict:
+        return self._semantic
+    
+    @semantic.setter
+    def semantic(self, clusters: Dict[str, SemanticCluster]):
+        self._semantic = VersionedDict(clusters)
+    
+    @property
+    def archetypes(self) -> VersionedDict:
+        return self._archetypes
+    
+    @archetypes.setter
+    def archetypes(self, archetypes: Dict[str, Archetype]):
+        self._archetypes = VersionedDict(archetypes)
+    
+    def _create_index(self, vectors: CentroidMatrix, path: Optional[str] = None):
+        """
+        ANN index over vectors (None for exact search), loaded from path if
+        it exists. A new index is untrained (queries use exact search)
+        until train_indexes() runs: this is reached from the query path.
+        """
+        from .ann_index import IVFPQIndex, create_index
+        import os
         
+        if path is not None and self.index_type == "ivfpq" and os.path.exists(path):
+            return IVFPQIndex.load(path, vectors, **self.index_options)
+        return create_index(self.index_type, vectors, **self.index_options)
+    
+    def _index_path(self, name: str) -> str:
+        return f"{self.storage_path}.{name}.{self.index_type}"
+    
     def add_episodic(self, scar: EpisodicScar):
         """Add a new episodic scar"""
         self.episodic[scar.scar_id] = scar
@@ -221,33 +481,130 @@ class HierarchicalMemory:
         self.type_index.setdefault(scar.incident_type, []).append(scar.scar_id)
         
     def get_episodic_for_consolidation(self, max_age_hours: float = 72) -> List[EpisodicScar]:
-        """Get episodic scars older than max_age_hours for consolidation"""
-        now = datetime.utcnow()
-        return [
-            scar for scar in self.episodic.values()
-            if (now - scar.created_at).total_seconds() / 3600 > max_age_hours
-        ]
+        """Get episodic scars older than max_age_hours for consolidation (as views)"""
+        return self.episodic.views(self.get_episodic_rows_for_consolidation(max_age_hours))
+    
+    def get_episodic_rows_for_consolidation(self, max_age_hours: float = 72) -> np.ndarray:
+        """Rows of self.episodic older than max_age_hours"""
+        cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+        return self.episodic.created_before(cutoff)
     
     def add_semantic(self, cluster: SemanticCluster):
         """Add a new semantic cluster"""
+        in_sync = not self._stale()
         self.semantic[cluster.cluster_id] = cluster
-        
+        self.centroids.set(cluster.cluster_id, cluster.centroid)
+        if self.semantic_index is not None:
+            self.semantic_index.add(cluster.cluster_id)
+        if in_sync:
+            self._mark_synced()
+    
+    def remove_semantic(self, cluster_id: str):
+        """Remove a semantic cluster"""
+        in_sync = not self._stale()
+        self.semantic.pop(cluster_id, None)
+        self.centroids.remove(cluster_id)
+        if self.semantic_index is not None:
+            self.semantic_index.remove(cluster_id)
+        if in_sync:
+            self._mark_synced()
+    
     def add_archetype(self, archetype: Archetype):
         """Add a new archetype"""
+        in_sync = not self._stale()
         self.archetypes[archetype.archetype_id] = archetype
+        self.archetype_embeddings.set(archetype.archetype_id, archetype.embedding)
+        if self.archetype_index is not None:
+            self.archetype_index.add(archetype.archetype_id)
+        if in_sync:
+            self._mark_synced()
+    
+    def _rebuild_centroids(self, load_indexes: bool = False):
+        """Rebuild the embedding matrices (and indexes) from self.semantic / self.archetypes"""
+        self.centroids = CentroidMatrix(initial_capacity=max(1024, len(self.semantic)))
+        for cluster_id, cluster in self.semantic.items():
+            self.centroids.set(cluster_id, cluster.centroid)
+        self.archetype_embeddings = CentroidMatrix(initial_capacity=max(1024, len(self.archetypes)))
+        for archetype_id, archetype in self.archetypes.items():
+            self.archetype_embeddings.set(archetype_id, archetype.embedding)
         
-    def find_similar_semantic(self, embedding: np.ndarray, threshold: float = 0.8) -> List[SemanticCluster]:
-        """Find semantic clusters similar to given embedding"""
-        from sklearn.metrics.pairwise import cosine_similarity
-        
-        results = []
-        for cluster in self.semantic.values():
-            sim = cosine_similarity([embedding], [cluster.centroid])[0][0]
-            if sim > threshold:
-                results.append((sim, cluster))
-        
-        results.sort(reverse=True)
-        return [r[1] for r in results]
+        self.semantic_index = self._create_index(
+            self.centroids, self._index_path("semantic") if load_indexes else None
+        )
+        self.archetype_index = self._create_index(
+            self.archetype_embeddings, self._index_path("archetypes") if load_indexes else None
+        )
+        self._mark_synced()
+    
+    def train_indexes(self):
+        """
+        (Re)train the ANN indexes that need it (see IVFPQIndex.needs_training).
+        add_semantic / add_archetype never train; call this from a
+        maintenance step such as the sleep cycle.
+        """
+        for index in (self.semantic_index, self.archetype_index):
+            if index is not None and index.needs_training:
+                index.train()
+    
+    def _mark_synced(self):
+        """Record the dict versions the matrices (and indexes) reflect"""
+        self._synced_versions = (self.semantic.version, self.archetypes.version)
+    
+    def _stale(self) -> bool:
+        """True if self.semantic / self.archetypes were modified directly"""
+        return self._synced_versions != (self.semantic.version, self.archetypes.version)
+    
+    def find_similar_semantic(
+        self,
+        embedding: np.ndarray,
+        threshold: float = 0.8,
+        top_k: Optional[int] = None
+    ) -> List[SemanticCluster]:
+        """
+        Find semantic clusters similar to given embedding
+        (cosine similarity > threshold, most similar first, at most top_k).
+        With an ANN index and top_k, the result is approximate.
+        """
+        if self._stale():
+            # self.semantic was modified directly; re-sync
+            self._rebuild_centroids()
+        if self.semantic_index is not None and top_k is not None:
+            keys, _ = self.semantic_index.search(embedding, threshold, top_k)
+            return [self.semantic[key] for key in keys]
+        rows, _ = self.centroids.search(embedding, threshold, top_k)
+        ids = self.centroids.ids
+        return [self.semantic[ids[row]] for row in rows]
+    
+    def find_similar_semantic_batch(
+        self,
+        embeddings: np.ndarray,
+        threshold: float = 0.8,
+        top_k: Optional[int] = None,
+        workers: int = 1
+    ) -> SimilarityBatch:
+        """
+        find_similar_semantic for many embeddings at once (exact).
+        Returns compact arrays; cluster ids are self.centroids.ids[rows].
+        """
+        if self._stale():
+            self._rebuild_centroids()
+        return self.centroids.search_batch(embeddings, threshold, top_k, workers=workers)
+    
+    def find_similar_archetypes(
+        self,
+        embedding: np.ndarray,
+        threshold: float = 0.8,
+        top_k: Optional[int] = None
+    ) -> List[Archetype]:
+        """Find archetypes similar to given embedding, as find_similar_semantic"""
+        if self._stale():
+            self._rebuild_centroids()
+        if self.archetype_index is not None and top_k is not None:
+            keys, _ = self.archetype_index.search(embedding, threshold, top_k)
+            return [self.archetypes[key] for key in keys]
+        rows, _ = self.archetype_embeddings.search(embedding, threshold, top_k)
+        ids = self.archetype_embeddings.ids
+        return [self.archetypes[ids[row]] for row in rows]
     
     def get_by_basis(self, basis: str, level: MemoryLevel = MemoryLevel.EPISODIC) -> List:
         """Get memories by cognitive basis"""
@@ -273,11 +630,18 @@ class HierarchicalMemory:
         
         with open(self.storage_path, 'wb') as f:
             pickle.dump(data, f)
+        
+        # Indexes are saved next to the memory file
+        if self.semantic_index is not None:
+            self.semantic_index.save(self._index_path("semantic"))
+        if self.archetype_index is not None:
+            self.archetype_index.save(self._index_path("archetypes"))
     
     def load(self):
         """Load memory from disk"""
         import pickle
         import os
+        from .episodic_store import EpisodicStore
         
         if not os.path.exists(self.storage_path):
             return
@@ -285,8 +649,11 @@ class HierarchicalMemory:
         with open(self.storage_path, 'rb') as f:
             data = pickle.load(f)
         
-        self.episodic = {k: EpisodicScar.from_dict(v) for k, v in data["episodic"].items()}
+        self.episodic = EpisodicStore(initial_capacity=max(1024, len(data["episodic"])))
+        for v in data["episodic"].values():
+            self.episodic.add(EpisodicScar.from_dict(v))
         self.semantic = {k: SemanticCluster.from_dict(v) for k, v in data["semantic"].items()}
         self.archetypes = {k: Archetype.from_dict(v) for k, v in data["archetypes"].items()}
         self.basis_index = data["basis_index"]
         self.type_index = data["type_index"]
+        self._rebuild_centroids(load_indexes=True)
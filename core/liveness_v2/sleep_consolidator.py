@@ -12,6 +12,7 @@ from sklearn.cluster import DBSCAN
 from sklearn.metrics.pairwise import cosine_similarity
 
 from .memory_levels import HierarchicalMemory, EpisodicScar, SemanticCluster, Archetype
+from .episodic_store import EpisodicStore
 
 
 class SleepConsolidator:
@@ -45,13 +46,14 @@ class SleepConsolidator:
         Run consolidation cycle.
         Returns: (new_clusters, archived_scar_ids)
         """
-        # 1. Get old episodic scars
-        old_scars = memory.get_episodic_for_consolidation(max_age_hours)
-        if len(old_scars) < self.min_samples:
+        # 1. Get old episodic scars (rows of the columnar store)
+        store = memory.episodic
+        old_rows = memory.get_episodic_rows_for_consolidation(max_age_hours)
+        if len(old_rows) < self.min_samples:
             return [], []
         
         # 2. Cluster embeddings
-        embeddings = np.array([s.embedding for s in old_scars])
+        embeddings = store.embedding[old_rows]
         clustering = DBSCAN(
             eps=self.eps,
             min_samples=self.min_samples,
@@ -70,15 +72,14 @@ class SleepConsolidator:
                 continue
                 
             # Get scars in this cluster
-            cluster_indices = np.where(labels == label)[0]
-            cluster_scars = [old_scars[i] for i in cluster_indices]
+            cluster_rows = old_rows[labels == label]
             
             # Create semantic cluster
-            cluster = self._create_semantic_cluster(cluster_scars)
+            cluster = self._cluster_from_rows(store, cluster_rows)
             new_clusters.append(cluster)
             
             # Mark scars for archiving
-            archived_ids.extend([s.scar_id for s in cluster_scars])
+            archived_ids.extend(cluster.source_scar_ids)
         
         # 4. Check for archetype promotion
         if new_clusters:
@@ -88,31 +89,65 @@ class SleepConsolidator:
     
     def _create_semantic_cluster(self, scars: List[EpisodicScar]) -> SemanticCluster:
         """Create a semantic cluster from a list of scars"""
+        # Find dominant basis and type
+        bases = [s.cognitive_basis for s in scars]
+        types = [s.incident_type for s in scars]
+        
+        return self._build_cluster(
+            embeddings=np.array([s.embedding for s in scars]),
+            entropies=np.array([s.entropy_score for s in scars]),
+            drifts=np.array([s.ontological_drift for s in scars]),
+            dominant_basis=max(set(bases), key=bases.count),
+            dominant_type=max(set(types), key=types.count),
+            source_hashes=[s.scar_hash for s in scars],
+            source_ids=[s.scar_id for s in scars]
+        )
+    
+    def _cluster_from_rows(self, store: EpisodicStore, rows: np.ndarray) -> SemanticCluster:
+        """Create a semantic cluster from rows of the columnar episodic store"""
+        # Dominant basis and type: most frequent interned code
+        basis_code = np.bincount(store.column("cognitive_basis")[rows]).argmax()
+        type_code = np.bincount(store.column("incident_type")[rows]).argmax()
+        hashes = store.object_column("scar_hash")
+        ids = store.ids
+        
+        return self._build_cluster(
+            embeddings=store.embedding[rows],
+            entropies=store.column("entropy_score")[rows],
+            drifts=store.column("ontological_drift")[rows],
+            dominant_basis=store.interned["cognitive_basis"].values[basis_code],
+            dominant_type=store.interned["incident_type"].values[type_code],
+            source_hashes=[hashes[row] for row in rows],
+            source_ids=[ids[row] for row in rows]
+        )
+    
+    def _build_cluster(
+        self,
+        embeddings: np.ndarray,
+        entropies: np.ndarray,
+        drifts: np.ndarray,
+        dominant_basis: str,
+        dominant_type: str,
+        source_hashes: List[str],
+        source_ids: List[str]
+    ) -> SemanticCluster:
+        """Semantic cluster from its scars' columns"""
         # Compute centroid (mean of embeddings)
-        embeddings = np.array([s.embedding for s in scars])
-        centroid = np.mean(embeddings, axis=0)
+        centroid = np.mean(embeddings, axis=0, dtype=np.float64)
         
         # Normalize centroid
         centroid = centroid / np.linalg.norm(centroid)
         
         # Compute statistics
-        avg_entropy = np.mean([s.entropy_score for s in scars])
-        avg_drift = np.mean([s.ontological_drift for s in scars])
-        
-        # Find dominant basis and type
-        bases = [s.cognitive_basis for s in scars]
-        types = [s.incident_type for s in scars]
-        dominant_basis = max(set(bases), key=bases.count)
-        dominant_type = max(set(types), key=types.count)
+        avg_entropy = np.mean(entropies)
+        avg_drift = np.mean(drifts)
         
         # Create cluster ID from hashes
-        source_hashes = [s.scar_hash for s in scars]
-        source_ids = [s.scar_id for s in scars]
         hash_input = ''.join(sorted(source_hashes)).encode()
         cluster_id = hashlib.sha256(hash_input).hexdigest()[:16]
         
         # Compute proof hash (ZK-proof would go here in production)
-        proof_input = f"{cluster_id}:{len(scars)}:{avg_entropy}".encode()
+        proof_input = f"{cluster_id}:{len(source_ids)}:{avg_entropy}".encode()
         proof_hash = hashlib.sha256(proof_input).hexdigest()
         
         return SemanticCluster(
@@ -124,7 +159,7 @@ class SleepConsolidator:
             avg_drift=avg_drift,
             dominant_basis=dominant_basis,
             dominant_type=dominant_type,
-            count=len(scars),
+            count=len(source_ids),
             proof_hash=proof_hash
         )
     
@@ -12,6 +12,7 @@ from datetime import datetime, timedelta
 
 from core.ontological_scar import OntologicalScar
 from accumulator.incremental_proof import IncrementalChainProof
+from orchestrator.loop_monitor import LoopLagMonitor
 
 
 @dataclass
@@ -75,12 +76,22 @@ class CognitiveIntegrator:
     """
     Integrates SCM scars with Cognitive Collider routing.
     Uses scar history to influence apostle selection.
+
+    start() loads the chain's scars and starts the lag monitor; stop()
+    stops it. Both also run as an async context manager.
     """
     
-    def __init__(self, chain: IncrementalChainProof, genesis_hash: str):
+    def __init__(
+        self,
+        chain: IncrementalChainProof,
+        genesis_hash: str,
+        lag_monitor: Optional[LoopLagMonitor] = None
+    ):
         self.chain = chain
         self.genesis_hash = genesis_hash
         self.apostles: Dict[str, ApostleTrust] = {}
+        # Event-loop lag seen by routing (see orchestrator.loop_monitor)
+        self.lag_monitor = lag_monitor
         self._initialize_apostles()
         
     def _initialize_apostles(self):
@@ -108,6 +119,24 @@ class CognitiveIntegrator:
                 scar_count=0
             )
     
+    async def start(self) -> int:
+        """Start the lag monitor and load scars. Returns number of scars."""
+        if self.lag_monitor is not None:
+            self.lag_monitor.start()
+        return await self.load_scars_from_chain()
+
+    async def stop(self):
+        """Stop the lag monitor (its statistics stay readable)."""
+        if self.lag_monitor is not None:
+            await self.lag_monitor.stop()
+
+    async def __aenter__(self) -> "CognitiveIntegrator":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
     async def load_scars_from_chain(self) -> int:
         """
         Load all scars from chain and apply their effects.
@@ -253,6 +282,10 @@ class CognitiveIntegrator:
             for basis, apostle in self.apostles.items()
         }
     
+    def get_loop_lag(self) -> Dict[str, float]:
+        """Event-loop lag statistics (empty without a monitor)."""
+        return self.lag_monitor.stats() if self.lag_monitor is not None else {}
+
     async def record_interaction_result(
         self,
         selected_basis: str,
@@ -324,7 +357,7 @@ async def demonstrate_integration():
     integrator = CognitiveIntegrator(chain, genesis_hash)
     
     # Load scars
-    await integrator.load_scars_from_chain()
+    await integrator.start()
     
     # Make routing decisions
     queries = [
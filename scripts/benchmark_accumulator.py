@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the accumulator and its WAL.
+
+Measures RSAAccumulator.add (sequential and concurrent), verify,
+batch_verify, remove, _hash_to_prime, and AccumulatorWAL.append / recover
+/ full replay, for every combination of key size and chain length:
+
+  python scripts/benchmark_accumulator.py --out bench.json
+  python scripts/benchmark_accumulator.py --baseline bench.json --out new.json
+
+The chain length is the number of records already in the WAL when an
+operation is timed. Histories are written synthetically (random values
+and primes, appended in large groups) because none of the measured
+operations depends on what the earlier records contain, only on how many
+there are; building 10^6 real additions would dominate the run.
+
+Runs offline: moduli come from a local parameter pool (--pool, default
+$SCM_PARAM_POOL or .param-pool), generated on first use. Results are
+JSON; with --baseline, any measurement slower than the baseline by more
+than --tolerance is reported and the exit status is 1.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add parent directory to PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from accumulator.params import POOL_ENV, AccumulatorParams, ParamPool
+from accumulator.primes import PrimeDeriver
+from accumulator.rsa_accumulator import RSAAccumulator
+from storage.wal_accumulator import AccumulatorWAL
+
+
+RESULTS_VERSION = 1
+
+
+def element(rng: random.Random) -> bytes:
+    return rng.getrandbits(256).to_bytes(32, 'big')
+
+
+def result(name: str, ops: int, seconds: float, **labels) -> Dict:
+    return {
+        "name": name,
+        **labels,
+        "ops": ops,
+        "seconds": seconds,
+        "us_per_op": seconds / ops * 1e6,
+        "ops_per_s": ops / seconds if seconds else float("inf"),
+    }
+
+
+async def write_history(wal_path: str, params: AccumulatorParams, length: int, rng: random.Random):
+    """Synthetic WAL of length ADD records (one genesis, then groups)."""
+    wal = AccumulatorWAL(wal_path, value_width=(params.N.bit_length() + 7) // 8)
+    await wal.initialize_cache()
+    remaining = length
+    while remaining:
+        count = min(remaining, 4096)
+        value = rng.randrange(2, params.N)
+        await wal.append_many([
+            ("ADD_BATCH", value, f"{i:08x}", rng.getrandbits(256) | 1) for i in range(count)
+        ])
+        remaining -= count
+    await wal.close()
+
+
+async def bench_chain(params: AccumulatorParams, length: int, ops: int, concurrency: List[int],
+                      workdir: str, rng: random.Random) -> List[Dict]:
+    """All accumulator and WAL measurements at one key size and chain length."""
+    labels = {"key_size": params.key_size, "length": length}
+    results = []
+    wal_path = os.path.join(workdir, f"bench-{params.key_size}-{length}.wal")
+    await write_history(wal_path, params, length, rng)
+
+    acc = RSAAccumulator(wal_path=wal_path, params=params)
+    await acc.initialize()
+    elements = [element(rng) for _ in range(ops)]
+    for e in elements:
+        acc._hash_to_prime(e)  # add/remove are timed without prime derivation
+
+    start = time.perf_counter()
+    proofs = [(await acc.add(e))[1] for e in elements]
+    results.append(result("add", ops, time.perf_counter() - start, concurrency=1, **labels))
+
+    start = time.perf_counter()
+    assert all(acc.verify(p) for p in proofs)
+    results.append(result("verify", ops, time.perf_counter() - start, **labels))
+
+    start = time.perf_counter()
+    assert acc.batch_verify(proofs)
+    results.append(result("batch_verify", ops, time.perf_counter() - start, **labels))
+
+    start = time.perf_counter()
+    for e in elements:
+        await acc.remove(e)
+    results.append(result("remove", ops, time.perf_counter() - start, **labels))
+    await acc.close()
+
+    for level in concurrency:
+        acc = RSAAccumulator(wal_path=wal_path, params=params, group_commit=True)
+        await acc.initialize()
+        batch = [element(rng) for _ in range(max(ops, level))]
+        for e in batch:
+            acc._hash_to_prime(e)
+        semaphore = asyncio.Semaphore(level)
+
+        async def add(e: bytes):
+            async with semaphore:
+                await acc.add(e)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(add(e) for e in batch))
+        results.append(result(
+            "add", len(batch), time.perf_counter() - start, concurrency=level, group_commit=True, **labels
+        ))
+        await acc.close()
+
+    wal = AccumulatorWAL(wal_path, value_width=(params.N.bit_length() + 7) // 8)
+    start = time.perf_counter()
+    await wal.initialize_cache()
+    results.append(result("wal_recover", 1, time.perf_counter() - start, **labels))
+    records = wal.current_seq
+
+    start = time.perf_counter()
+    replayed = sum(1 for _ in wal.iter_records())
+    results.append(result("wal_replay", replayed, time.perf_counter() - start, **labels))
+    assert replayed == records
+
+    value = rng.randrange(2, params.N)
+    start = time.perf_counter()
+    for i in range(ops):
+        await wal.append("ADD", value, f"{i:08x}", element=rng.getrandbits(256) | 1)
+    results.append(result("wal_append", ops, time.perf_counter() - start, **labels))
+    await wal.close()
+
+    for path in Path(workdir).glob(f"{Path(wal_path).name}*"):
+        path.unlink()
+    return results
+
+
+def bench_primes(ops: int, rng: random.Random) -> List[Dict]:
+    """Uncached hash-to-prime derivation per scheme."""
+    results = []
+    for scheme in ("nonce", "scan"):
+        deriver = PrimeDeriver(scheme=scheme, cache_size=0)
+        datas = [element(rng) for _ in range(ops)]
+        start = time.perf_counter()
+        for data in datas:
+            deriver.derive(data)
+        results.append(result("hash_to_prime", ops, time.perf_counter() - start, scheme=scheme))
+    return results
+
+
+def key_of(entry: Dict) -> tuple:
+    """Identity of a measurement: its name and labels."""
+    skip = {"ops", "seconds", "us_per_op", "ops_per_s", "recall"}
+    return tuple(sorted((k, v) for k, v in entry.items() if k not in skip))
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """Regressions: measurements slower than baseline * (1 + tolerance)."""
+    previous = {key_of(entry): entry for entry in baseline}
+    regressions = []
+    for entry in results:
+        old = previous.get(key_of(entry))
+        if old is None:
+            continue
+        ratio = entry["us_per_op"] / old["us_per_op"]
+        if ratio > 1 + tolerance:
+            labels = ", ".join(f"{k}={v}" for k, v in key_of(entry) if k != "name")
+            regressions.append(
+                f"{entry['name']} ({labels}): {old['us_per_op']:.1f} -> {entry['us_per_op']:.1f} us/op (x{ratio:.2f})"
+            )
+    return regressions
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent.parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def int_list(value: str) -> List[int]:
+    return [int(float(part)) for part in value.split(",") if part]
+
+
+async def run(args) -> List[Dict]:
+    rng = random.Random(args.seed)
+    results = bench_primes(args.ops, rng)
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        for key_size in args.key_sizes:
+            params = ParamPool(args.pool, key_size, size=1).take()
+            for length in args.lengths:
+                print(f"  {key_size}-bit modulus, chain length {length}...", file=sys.stderr)
+                results += await bench_chain(params, length, args.ops, args.concurrency, workdir, rng)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the accumulator and its WAL")
+    parser.add_argument("--key-sizes", type=int_list, default=[1024, 2048, 3072],
+                        help="Comma-separated RSA modulus sizes in bits")
+    parser.add_argument("--lengths", type=int_list, default=[100, 10000],
+                        help="Comma-separated chain lengths, e.g. 1e2,1e4,1e6")
+    parser.add_argument("--concurrency", type=int_list, default=[8, 64],
+                        help="Comma-separated numbers of concurrent adds (group commit)")
+    parser.add_argument("--ops", type=int, default=200, help="Operations per measurement")
+    parser.add_argument("--pool", default=os.environ.get(POOL_ENV) or ".param-pool",
+                        help="Parameter pool directory (filled on first use)")
+    parser.add_argument("--workdir", default=None, help="Directory for benchmark WALs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Write JSON results here")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown against the baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    report = {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+    for entry in results:
+        labels = " ".join(f"{k}={v}" for k, v in key_of(entry) if k != "name")
+        print(f"{entry['name']:<14} {labels:<48} {entry['us_per_op']:12.1f} us/op")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"✅ No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
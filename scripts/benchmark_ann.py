@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Recall / latency benchmark of the ANN index against exact search.
+
+For every collection size, builds a CentroidMatrix of synthetic 128-d
+embeddings (clustered, like consolidated scars), indexes it and times
+top-k queries with exact search and with the ANN index at several
+nprobe settings. Recall@k is the share of the exact top k found.
+
+  python scripts/benchmark_ann.py --sizes 1e4,1e5 --out ann.json
+  python scripts/benchmark_ann.py --baseline ann.json
+
+Results are JSON in the format of benchmark_accumulator.py; with
+--baseline, slower measurements (beyond --tolerance) or a recall drop
+of more than --recall-drop are reported and the exit status is 1.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+# Add parent directory to PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.liveness_v2.ann_index import IVFPQIndex
+from core.liveness_v2.memory_levels import CentroidMatrix
+from scripts.benchmark_accumulator import compare, git_commit, int_list, key_of, result
+
+
+RESULTS_VERSION = 1
+
+
+def embeddings(rng: np.random.Generator, count: int, dim: int, spread: float) -> np.ndarray:
+    """count vectors around count / 50 random centres"""
+    centres = rng.standard_normal((max(1, count // 50), dim))
+    return centres[rng.integers(0, len(centres), count)] + spread * rng.standard_normal((count, dim))
+
+
+def bench_size(size: int, args, rng: np.random.Generator) -> List[Dict]:
+    labels = {"size": size, "k": args.k}
+    data = embeddings(rng, size + args.queries, 128, args.spread)
+    queries = data[size:]
+
+    vectors = CentroidMatrix(initial_capacity=size)
+    for i in range(size):
+        vectors.set(str(i), data[i])
+    index = IVFPQIndex(vectors)
+    start = time.perf_counter()
+    index.train()
+    results = [result("ann_train", 1, time.perf_counter() - start, **labels)]
+
+    start = time.perf_counter()
+    exact = []
+    for query in queries:
+        rows, _ = vectors.search(query, top_k=args.k)
+        exact.append({vectors.ids[row] for row in rows})
+    results.append(result("exact_search", len(queries), time.perf_counter() - start, **labels))
+
+    for nprobe in args.nprobe:
+        index.nprobe = nprobe
+        found = 0
+        start = time.perf_counter()
+        for query, truth in zip(queries, exact):
+            keys, _ = index.search(query, top_k=args.k)
+            found += len(truth.intersection(keys))
+        entry = result("ann_search", len(queries), time.perf_counter() - start, nprobe=nprobe, **labels)
+        entry["recall"] = found / (len(queries) * args.k)
+        results.append(entry)
+
+    # Incremental maintenance: delete and re-insert
+    keys = [str(i) for i in rng.choice(size, min(size, args.queries), replace=False)]
+    start = time.perf_counter()
+    for key in keys:
+        index.remove(key)
+        index.add(key)
+    results.append(result("ann_update", len(keys), time.perf_counter() - start, **labels))
+    return results
+
+
+def recall_drops(results: List[Dict], baseline: List[Dict], allowed: float) -> List[str]:
+    previous = {key_of(entry): entry for entry in baseline if "recall" in entry}
+    drops = []
+    for entry in results:
+        old = previous.get(key_of(entry))
+        if old is not None and entry["recall"] < old["recall"] - allowed:
+            labels = ", ".join(f"{k}={v}" for k, v in key_of(entry) if k != "name")
+            drops.append(f"{entry['name']} ({labels}): recall {old['recall']:.3f} -> {entry['recall']:.3f}")
+    return drops
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the ANN index against exact search")
+    parser.add_argument("--sizes", type=int_list, default=[10000, 100000],
+                        help="Comma-separated collection sizes, e.g. 1e4,1e5")
+    parser.add_argument("--nprobe", type=int_list, default=[4, 16, 64],
+                        help="Comma-separated numbers of inverted lists probed")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per measurement")
+    parser.add_argument("--spread", type=float, default=0.6, help="Noise around cluster centres")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Write JSON results here")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown against the baseline (0.25 = 25%%)")
+    parser.add_argument("--recall-drop", type=float, default=0.02,
+                        help="Allowed recall drop against the baseline")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    results = []
+    for size in args.sizes:
+        print(f"  {size} embeddings...", file=sys.stderr)
+        results += bench_size(size, args, rng)
+
+    for entry in results:
+        labels = " ".join(f"{k}={v}" for k, v in key_of(entry) if k != "name")
+        recall = f"  recall@{args.k} {entry['recall']:.3f}" if "recall" in entry else ""
+        print(f"{entry['name']:<14} {labels:<32} {entry['us_per_op']:12.1f} us/op{recall}")
+
+    if args.out:
+        report = {
+            "version": RESULTS_VERSION,
+            "meta": {
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "seed": args.seed,
+            },
+            "results": results,
+        }
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)["results"]
+        problems = compare(results, baseline, args.tolerance) + recall_drops(results, baseline, args.recall_drop)
+        if problems:
+            print(f"❌ {len(problems)} regression(s) against {args.baseline}:")
+            for line in problems:
+                print(f"  {line}")
+            return 1
+        print(f"✅ No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
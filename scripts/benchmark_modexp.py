@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark accumulator exponentiation backends against builtin pow().
+Times verify-style exponentiations (a few hot witnesses raised to fresh
+256-bit primes) under one RSA modulus.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from Crypto.PublicKey import RSA
+
+from accumulator.modexp import BACKENDS, get_backend
+
+
+def bench(backend, bases, exponents) -> float:
+    """Seconds per exponentiation."""
+    start = time.perf_counter()
+    for base, exponent in zip(bases, exponents):
+        backend.pow(base, exponent)
+    return (time.perf_counter() - start) / len(exponents)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark modular exponentiation backends")
+    parser.add_argument("--key-size", type=int, default=2048, help="RSA modulus size in bits")
+    parser.add_argument("--ops", type=int, default=500, help="Exponentiations per backend")
+    parser.add_argument("--hot-bases", type=int, default=4, help="Distinct bases that are reused")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    N = RSA.generate(args.key_size).n
+    hot = [rng.randrange(2, N) for _ in range(args.hot_bases)]
+    bases = [hot[i % len(hot)] for i in range(args.ops)]
+    exponents = [rng.getrandbits(256) | (1 << 255) | 1 for _ in range(args.ops)]
+
+    expected = [pow(b, e, N) for b, e in zip(bases[:10], exponents[:10])]
+    baseline = None
+    print(f"{args.key_size}-bit modulus, {args.ops} ops, {args.hot_bases} hot bases")
+    for name in BACKENDS:
+        backend = get_backend(name, N)
+        assert [backend.pow(b, e) for b, e in zip(bases[:10], exponents[:10])] == expected
+        seconds = bench(backend, bases, exponents)
+        baseline = baseline or seconds
+        # Without gmpy2 "montgomery" is builtin pow(); say so instead of timing it as GMP
+        note = "" if getattr(backend, "available", True) else "   (no gmpy2: builtin pow() fallback)"
+        print(f"  {name:<11} {seconds * 1e3:8.3f} ms/op   x{baseline / seconds:5.2f}{note}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
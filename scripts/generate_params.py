@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Generate accumulator parameters ahead of time.
+
+  --out chain.wal.params   write one parameter file (next to a WAL)
+  --pool DIR               fill a dev/test parameter pool (SCM_PARAM_POOL)
+
+Generation runs in worker processes. Pool parameters are shared and keep
+the trapdoor on disk: for tests and dev runs only.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from accumulator.params import ParamPool, generate_params
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate accumulator parameters")
+    parser.add_argument("--key-size", type=int, default=2048, help="RSA modulus size in bits")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--out", help="Parameter file to write")
+    target.add_argument("--pool", help="Pool directory to fill")
+    parser.add_argument("--size", type=int, default=4, help="Parameter sets in the pool")
+    args = parser.parse_args()
+
+    if args.out:
+        if Path(args.out).exists():
+            print(f"❌ {args.out} already exists; refusing to replace a modulus")
+            return 1
+        generate_params(args.key_size).save(args.out)
+        print(f"✅ Wrote {args.key_size}-bit parameters to {args.out}")
+        return 0
+
+    pool = ParamPool(args.pool, args.key_size, args.size)
+    added = pool.fill()
+    print(f"✅ Pool {pool.directory}: {len(pool.files())} parameter sets ({added} new)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
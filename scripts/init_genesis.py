@@ -15,6 +15,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from tee.enclave_interface import AccumulatorEnclave
+from accumulator.params import params_path
 from core.genesis_anchor import GenesisAnchor
 
 
@@ -35,7 +36,8 @@ async def main():
         
     # 2. Create accumulator inside TEE
     print("📦 Creating accumulator in TEE...")
-    params = enclave.create_accumulator()
+    # Soft mode: saved next to the chain WAL, so the chain uses this N
+    params = enclave.create_accumulator(params_file=params_path("chain.wal"))
     
     # 3. Form genesis anchor
     genesis_data = {
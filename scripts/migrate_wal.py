@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Migrate a text accumulator WAL to the binary segment format.
+The original text files are kept in <wal>.text/ unless --backup-dir is given.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from storage.wal_accumulator import migrate_text_wal
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Convert a text WAL to binary segments")
+    parser.add_argument("wal", help="Path to the WAL (e.g. chain.wal)")
+    parser.add_argument("--key-size", type=int, default=2048, help="RSA modulus size in bits")
+    parser.add_argument("--backup-dir", default=None, help="Where to keep the text files")
+    args = parser.parse_args()
+
+    count = migrate_text_wal(args.wal, value_width=args.key_size // 8, backup_dir=args.backup_dir)
+    if count == 0:
+        print(f"ℹ️  No text WAL found at {args.wal}")
+    else:
+        print(f"✅ Migrated {count} records from {args.wal}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -79,6 +79,9 @@ async def run_sleep_cycle(
         for cluster in new_clusters:
             memory.add_semantic(cluster)
         
+        # Retrain ANN indexes outside the insert path
+        memory.train_indexes()
+        
         # Save
         memory.save()
         
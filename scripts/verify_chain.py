@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Audit the scar chain: replay every WAL transition against the modulus.
+
+  python scripts/verify_chain.py --genesis <GENESIS_HASH>
+  python scripts/verify_chain.py --wal chain.wal --scars scars.txt --workers 8
+
+--genesis ties the first record to the genesis anchor (GENESIS.md);
+--scars is a file of scar hashes (hex, one per line, chain order, after
+the genesis) whose primes and scar ids are checked against the log.
+Progress is checkpointed to <wal>.audit, so an interrupted or repeated
+run continues where the last one stopped (--restart ignores it).
+Exit status is 0 if the chain verifies, 1 at the first divergence.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Iterator
+
+# Add parent directory to PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from accumulator.audit import ChainAuditor
+
+
+def read_scars(path: str) -> Iterator[bytes]:
+    """Scar hashes from a hex-per-line file, streamed."""
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield bytes.fromhex(line)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Audit the scar chain WAL")
+    parser.add_argument("--wal", default="chain.wal", help="WAL path (segments <wal>.NNNNNN)")
+    parser.add_argument("--genesis", help="GENESIS_HASH from GENESIS.md")
+    parser.add_argument("--scars", help="Scar hashes, hex, one per line, in chain order")
+    parser.add_argument("--prime-scheme", default=None, choices=("nonce", "scan"),
+                        help="Hash-to-prime scheme (default: the one recorded in <wal>.params)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    parser.add_argument("--chunk-size", type=int, default=4096, help="Records per chunk")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default <wal>.audit)")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args()
+
+    checkpoint = args.checkpoint or f"{args.wal}.audit"
+    if args.restart and os.path.exists(checkpoint):
+        os.unlink(checkpoint)
+
+    auditor = ChainAuditor(
+        args.wal,
+        scars=read_scars(args.scars) if args.scars else None,
+        # The chain's genesis element is the hash of the GENESIS_HASH string
+        genesis=hashlib.sha256(args.genesis.encode()).digest() if args.genesis else None,
+        prime_scheme=args.prime_scheme,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        checkpoint_path=checkpoint
+    )
+    result = auditor.run()
+
+    if args.json:
+        print(json.dumps(result.to_dict(), indent=2))
+    else:
+        rate = result.records / result.seconds if result.seconds else 0
+        print(f"📜 {args.wal}: seq {result.start_seq}..{result.verified_seq} "
+              f"({result.records} records, {result.seconds:.1f}s, {rate:.0f} records/s)")
+        if result.unverified_prefix:
+            print(f"⚠️  Log starts at seq {result.start_seq - 1} (older segments retired); "
+                  f"that record's value was taken on trust")
+    if not result.ok:
+        if not args.json:
+            print(f"❌ First divergence at seq {result.divergence.seq}: {result.divergence.reason}")
+        return 1
+    if not args.json:
+        print(f"✅ Chain verified up to seq {result.verified_seq}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,371 @@
+"""
+Columnar store for accumulator membership proofs.
+
+An AccumulatorProof holds three Python ints (two of them modulus-sized)
+and a sequence number behind a dataclass __dict__. ProofStore keeps the
+same data in two fixed-width columns instead:
+
+    values : distinct accumulator / witness values, value_width bytes each
+    proofs : witness ref u64 | accumulator ref u64 | seq u64 | prime
+
+Consecutive proofs share values: a single add's witness is the previous
+accumulator value, and every proof of an add_many batch has the same
+accumulator. Those are stored once and referenced, so a proof costs one
+modulus-sized value plus 57 bytes.
+
+Columns live in a bytearray, or in memory-mapped files (<path>.values,
+<path>.proofs) that are the on-disk format as well: reopening reads them
+in place. Items are ProofView objects with the attributes of
+AccumulatorProof, decoded on access.
+
+TransitionStore keeps Wesolowski transition proofs (ExponentiationProof)
+in one memory-mapped column of the same format:
+
+    transitions : base | result | quotient (value_width bytes each)
+                  | count u32 | seq u64
+"""
+
+import mmap
+import os
+import struct
+from typing import Iterable, Iterator, List, Optional, Union
+
+from storage.witness_store import PRIME_WIDTH
+
+
+COLUMN_MAGIC = b'SCMCOL'
+COLUMN_VERSION = 1
+# magic | version | reserved | width u16 | base u64 | count u64
+COLUMN_HEADER = struct.Struct('>6sBxHQQ')
+_REFS = struct.Struct('>QQQ')
+_TRANSITION_TAIL = struct.Struct('>IQ')
+
+
+class _Column:
+    """Growable fixed-width records, in memory or in a memory-mapped file."""
+
+    def __init__(self, width: int, path: Optional[str] = None, initial_capacity: int = 1024):
+        self.width = width
+        self.path = path
+        # Index of the first stored record (records before it were trimmed)
+        self.base = 0
+        self.count = 0
+        self._fd: Optional[int] = None
+        if path is None:
+            self._buffer: Union[bytearray, mmap.mmap] = bytearray(COLUMN_HEADER.size)
+            return
+
+        self._buffer = None
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = os.fstat(self._fd).st_size
+        if size == 0:
+            self._map(COLUMN_HEADER.size + initial_capacity * width)
+            self._write_header()
+            return
+        self._map(size)
+        magic, version, stored_width, self.base, self.count = COLUMN_HEADER.unpack_from(self._buffer, 0)
+        if magic != COLUMN_MAGIC or version != COLUMN_VERSION:
+            raise ValueError(f"{path} is not a proof column")
+        if stored_width != width:
+            raise ValueError(f"{path}: record width {stored_width}, expected {width}")
+
+    def _map(self, size: int):
+        size = max(size, mmap.PAGESIZE)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        if self._buffer is not None:
+            self._buffer.close()
+        self._buffer = mmap.mmap(self._fd, size)
+
+    def _write_header(self):
+        if self._fd is not None:
+            COLUMN_HEADER.pack_into(
+                self._buffer, 0, COLUMN_MAGIC, COLUMN_VERSION, self.width, self.base, self.count
+            )
+
+    def _offset(self, index: int) -> int:
+        return COLUMN_HEADER.size + (index - self.base) * self.width
+
+    def record(self, index: int) -> memoryview:
+        """Record by absolute index, without copying."""
+        offset = self._offset(index)
+        return memoryview(self._buffer)[offset:offset + self.width]
+
+    def append(self, data: bytes) -> int:
+        """Append records (a multiple of width bytes); returns the first index."""
+        first = self.base + self.count
+        end = self._offset(first) + len(data)
+        if self._fd is None:
+            self._buffer += data
+        else:
+            if end > len(self._buffer):
+                self._map(max(end, 2 * len(self._buffer)))
+            self._buffer[end - len(data):end] = data
+        self.count += len(data) // self.width
+        self._write_header()
+        return first
+
+    def trim(self, index: int):
+        """Drop every record before absolute index."""
+        drop = min(index - self.base, self.count)
+        if drop <= 0:
+            return
+        start, end = self._offset(self.base + drop), self._offset(self.base + self.count)
+        self._buffer[COLUMN_HEADER.size:COLUMN_HEADER.size + end - start] = self._buffer[start:end]
+        if self._fd is None:
+            del self._buffer[COLUMN_HEADER.size + end - start:]
+        self.base += drop
+        self.count -= drop
+        self._write_header()
+
+    def truncate(self, index: int):
+        """Drop every record from absolute index on."""
+        self.count = max(0, min(self.count, index - self.base))
+        if self._fd is None:
+            del self._buffer[self._offset(self.base + self.count):]
+        self._write_header()
+
+    def flush(self):
+        if self._fd is not None:
+            self._buffer.flush()
+
+    def close(self):
+        if self._fd is not None:
+            self._buffer.flush()
+            self._buffer.close()
+            os.close(self._fd)
+            self._fd = None
+
+
+class ProofView:
+    """Read-only AccumulatorProof look-alike backed by a ProofStore record."""
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "ProofStore", index: int):
+        self._store = store
+        self._index = index
+
+    def _refs(self):
+        return _REFS.unpack_from(self._store._proofs.record(self._index))
+
+    @property
+    def witness(self) -> int:
+        return self._store._value(self._refs()[0])
+
+    @property
+    def accumulator(self) -> int:
+        return self._store._value(self._refs()[1])
+
+    @property
+    def element_hash(self) -> int:
+        return int.from_bytes(self._store._proofs.record(self._index)[_REFS.size:], 'big')
+
+    @property
+    def sequence(self) -> int:
+        return self._refs()[2]
+
+    def to_proof(self):
+        from accumulator.rsa_accumulator import AccumulatorProof
+        return AccumulatorProof(self.witness, self.accumulator, self.element_hash, self.sequence)
+
+    def __eq__(self, other) -> bool:
+        try:
+            return (self.witness, self.accumulator, self.element_hash, self.sequence) == \
+                (other.witness, other.accumulator, other.element_hash, other.sequence)
+        except AttributeError:
+            return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ProofView(index={self._index}, sequence={self.sequence})"
+
+
+class ProofStore:
+    """List-like columnar store of membership proofs."""
+
+    def __init__(
+        self,
+        value_width: int,
+        path: Optional[str] = None,
+        prime_width: int = PRIME_WIDTH,
+        initial_capacity: int = 1024
+    ):
+        self.value_width = value_width
+        self.prime_width = prime_width
+        self._values = _Column(value_width, f"{path}.values" if path else None, initial_capacity)
+        self._proofs = _Column(_REFS.size + prime_width, f"{path}.proofs" if path else None, initial_capacity)
+
+        # Last accumulator value and its ref, for sharing
+        self._last_ref: Optional[int] = None
+        self._last_value: Optional[int] = None
+        if len(self):
+            last = len(self) - 1 + self._proofs.base
+            self._last_ref = _REFS.unpack_from(self._proofs.record(last))[1]
+            self._last_value = self._value(self._last_ref)
+
+    def _value(self, ref: int) -> int:
+        return int.from_bytes(self._values.record(ref), 'big')
+
+    def _ref(self, value: int) -> int:
+        if value == self._last_value:
+            return self._last_ref
+        return self._values.append(value.to_bytes(self.value_width, 'big'))
+
+    def append(self, proof):
+        self.extend([proof])
+
+    def extend(self, proofs: Iterable):
+        records = []
+        for proof in proofs:
+            witness_ref = self._ref(proof.witness)
+            accumulator_ref = self._ref(proof.accumulator)
+            self._last_ref, self._last_value = accumulator_ref, proof.accumulator
+            records.append(
+                _REFS.pack(witness_ref, accumulator_ref, proof.sequence)
+                + proof.element_hash.to_bytes(self.prime_width, 'big')
+            )
+        if records:
+            self._proofs.append(b''.join(records))
+
+    def __len__(self) -> int:
+        return self._proofs.count
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __getitem__(self, item: Union[int, slice]):
+        if isinstance(item, slice):
+            return [ProofView(self, self._proofs.base + i) for i in range(*item.indices(len(self)))]
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("proof index out of range")
+        return ProofView(self, self._proofs.base + item)
+
+    def __iter__(self) -> Iterator[ProofView]:
+        base = self._proofs.base
+        return (ProofView(self, base + i) for i in range(len(self)))
+
+    def __delitem__(self, item: slice):
+        """Only prefix deletion (del store[:-k]) is supported."""
+        if not isinstance(item, slice) or item.step not in (None, 1):
+            raise TypeError("ProofStore only supports deleting a prefix slice")
+        start, stop, _ = item.indices(len(self))
+        if start != 0:
+            raise TypeError("ProofStore only supports deleting a prefix slice")
+        if stop <= 0:
+            return
+        self._proofs.trim(self._proofs.base + stop)
+        if len(self):
+            # Refs only grow, so the first kept proof holds the oldest one
+            witness_ref, accumulator_ref, _ = _REFS.unpack_from(self._proofs.record(self._proofs.base))
+            self._values.trim(min(witness_ref, accumulator_ref))
+        else:
+            self._values.trim(self._values.base + self._values.count)
+            self._last_ref = self._last_value = None
+
+    def truncate_after(self, sequence: int):
+        """Drop proofs with a sequence number above sequence (torn tails)."""
+        keep = len(self)
+        while keep and self[keep - 1].sequence > sequence:
+            keep -= 1
+        if keep == len(self):
+            return
+        self._proofs.truncate(self._proofs.base + keep)
+        if keep:
+            refs = [_REFS.unpack_from(self._proofs.record(self._proofs.base + i))[:2] for i in range(keep)]
+            self._last_ref = refs[-1][1]
+            self._last_value = self._value(self._last_ref)
+            self._values.truncate(max(max(pair) for pair in refs) + 1)
+        else:
+            self._values.truncate(self._values.base)
+            self._last_ref = self._last_value = None
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by both columns."""
+        return self._values.count * self._values.width + self._proofs.count * self._proofs.width
+
+    def flush(self):
+        self._values.flush()
+        self._proofs.flush()
+
+    def close(self):
+        self._values.close()
+        self._proofs.close()
+
+
+class TransitionStore:
+    """List-like store of transition proofs, oldest first, kept across restarts."""
+
+    def __init__(self, value_width: int, path: Optional[str] = None, initial_capacity: int = 64):
+        self.value_width = value_width
+        self._column = _Column(3 * value_width + _TRANSITION_TAIL.size, path, initial_capacity)
+
+    def append(self, transition):
+        width = self.value_width
+        self._column.append(b''.join((
+            transition.base.to_bytes(width, 'big'),
+            transition.result.to_bytes(width, 'big'),
+            transition.quotient.to_bytes(width, 'big'),
+            _TRANSITION_TAIL.pack(transition.count, transition.sequence),
+        )))
+
+    def _decode(self, index: int):
+        from accumulator.poe import ExponentiationProof
+        record, width = self._column.record(index), self.value_width
+        count, sequence = _TRANSITION_TAIL.unpack_from(record, 3 * width)
+        return ExponentiationProof(
+            base=int.from_bytes(record[:width], 'big'),
+            result=int.from_bytes(record[width:2 * width], 'big'),
+            quotient=int.from_bytes(record[2 * width:3 * width], 'big'),
+            count=count,
+            sequence=sequence
+        )
+
+    def __len__(self) -> int:
+        return self._column.count
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __getitem__(self, item: Union[int, slice]):
+        if isinstance(item, slice):
+            return [self._decode(self._column.base + i) for i in range(*item.indices(len(self)))]
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("transition index out of range")
+        return self._decode(self._column.base + item)
+
+    def __iter__(self):
+        base = self._column.base
+        return (self._decode(base + i) for i in range(len(self)))
+
+    def find(self, sequence: int):
+        """The transition whose batch contains WAL sequence `sequence`, or None."""
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self[mid].sequence <= sequence:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo and sequence < self[lo - 1].sequence + self[lo - 1].count:
+            return self[lo - 1]
+        return None
+
+    def truncate_after(self, sequence: int):
+        """Drop transitions of batches reaching past sequence, and unwritten (zero) tails."""
+        keep = len(self)
+        while keep and (not self[keep - 1].count
+                        or self[keep - 1].sequence + self[keep - 1].count - 1 > sequence):
+            keep -= 1
+        if keep < len(self):
+            self._column.truncate(self._column.base + keep)
+
+    def flush(self):
+        self._column.flush()
+
+    def close(self):
+        self._column.close()
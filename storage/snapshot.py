@@ -0,0 +1,83 @@
+"""
+Accumulator snapshots.
+
+A snapshot captures the durable accumulator state (sequence number, value)
+plus the tail of the chain proofs. It is written to a temporary file,
+fsynced and atomically renamed over the previous snapshot, so a crash
+leaves either the old or the new snapshot, never a partial one. Once a
+snapshot is durable, WAL segments that end at or before its sequence
+number can be retired.
+"""
+
+import os
+import json
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+
+SNAPSHOT_VERSION = 1
+
+# (witness, accumulator, element_hash, sequence) - mirrors AccumulatorProof
+ProofTuple = Tuple[int, int, int, int]
+
+
+@dataclass
+class AccumulatorSnapshot:
+    """Durable accumulator state at a given WAL sequence number."""
+    seq: int
+    value: int
+    proofs: List[ProofTuple] = field(default_factory=list)
+    created_ns: int = field(default_factory=time.time_ns)
+
+    def to_dict(self) -> dict:
+        """Convert to dict for storage (ints as hex strings)."""
+        return {
+            "version": SNAPSHOT_VERSION,
+            "seq": self.seq,
+            "value": hex(self.value),
+            "proofs": [[hex(v) for v in proof] for proof in self.proofs],
+            "created_ns": self.created_ns,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "AccumulatorSnapshot":
+        """Create from dict"""
+        if data.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported snapshot version {data.get('version')}")
+        return cls(
+            seq=data["seq"],
+            value=int(data["value"], 16),
+            proofs=[tuple(int(v, 16) for v in proof) for proof in data["proofs"]],
+            created_ns=data["created_ns"],
+        )
+
+
+class SnapshotStore:
+    """Single-file snapshot store with atomic replacement."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def save(self, snapshot: AccumulatorSnapshot):
+        """Write snapshot durably: temp file, fsync, rename, fsync directory."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot.to_dict(), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def load(self) -> Optional[AccumulatorSnapshot]:
+        """Load the latest snapshot, or None if there is none."""
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'r') as f:
+            return AccumulatorSnapshot.from_dict(json.load(f))
@@ -1,87 +1,880 @@
 """
 Write-Ahead Log for atomic accumulator operations.
-Uses aiofiles for non-blocking writes.
+
+The log is split into preallocated fixed-size segment files
+(chain.wal.000001, chain.wal.000002, ...) written through one long-lived
+file descriptor. Durability uses fdatasync, run in a separate thread so the
+event loop is never blocked. Sealed segments are never touched again, so
+they can be archived or compacted without rewriting the active log.
+
+Records use the checksummed binary format from storage.wal_format.
+Text WALs written by older versions are migrated with migrate_text_wal().
+
+Supports an optional group-commit mode: concurrent appends issued within a
+short window (or until a byte budget fills) are written with a single
+write and made durable with a single fsync.
+
+Every write ends with a commit marker, so recovery drops a torn final
+write as a whole, even when its pages reached the disk out of order.
+
+After every fsync the writer publishes the last durable sequence number
+in <path>.durable (read_durable_seq), so readers in other processes can
+stay behind what a crash could still truncate.
 """
 
 import os
+import glob
+import time
+import shutil
+import struct
 import asyncio
-import aiofiles
-from typing import Tuple, Optional
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Tuple, Optional, Union
+
+from storage.wal_format import (
+    RECORD_END,
+    RECORD_HEADER,
+    RECORD_TRAILER,
+    SEGMENT_HEADER,
+    WALCommit,
+    WALCorruptionError,
+    WALFormatError,
+    WALRecord,
+    decode_frame,
+    decode_segment_header,
+    encode_commit,
+    encode_record,
+    encode_segment_header,
+    record_length,
+)
+
+
+# fdatasync skips the inode metadata flush; not available on every platform
+_datasync = getattr(os, 'fdatasync', os.fsync)
+
+_DURABLE_SEQ = struct.Struct('>Q')
+
+
+def list_segments(path: str) -> List[str]:
+    """Segment files of the WAL at path, oldest first."""
+    found = []
+    for candidate in glob.glob(glob.escape(path) + '.*'):
+        suffix = candidate[len(path) + 1:]
+        if len(suffix) == 6 and suffix.isdigit():
+            found.append(candidate)
+    return sorted(found)
+
+
+def durable_path(path: str) -> str:
+    """File where the writer of the WAL at path publishes its durable sequence."""
+    return f"{path}.durable"
+
+
+def read_durable_seq(path: str) -> int:
+    """Last sequence number the writer of the WAL at path has fsynced (0 if none)."""
+    try:
+        with open(durable_path(path), 'rb') as f:
+            data = f.read(_DURABLE_SEQ.size)
+    except FileNotFoundError:
+        return 0
+    if len(data) < _DURABLE_SEQ.size:
+        return 0
+    return _DURABLE_SEQ.unpack(data)[0]
 
 
 class AccumulatorWAL:
     """Write-Ahead Log with async/await support."""
-    
-    def __init__(self, path: str):
+
+    PAGE_SIZE = 4096
+
+    def __init__(
+        self,
+        path: str,
+        group_commit: bool = False,
+        commit_window: float = 0.002,
+        max_batch_bytes: int = 64 * 1024,
+        segment_size: int = 16 * 1024 * 1024,
+        value_width: int = 256
+    ):
         self.path = path
+        self.segment_size = segment_size
+        self.value_width = value_width  # bytes per accumulator value (N size)
         self._cached_seq = 0
         self._cached_value = 0
+        self._durable_seq = 0
+        self._last_timestamp = 0
         self._lock = asyncio.Lock()
-        self._ensure_file()
-        
-    def _ensure_file(self):
-        """Create WAL file if it doesn't exist."""
-        if not os.path.exists(self.path):
-            with open(self.path, 'w') as f:
-                f.write("# ACCUMULATOR WAL\n")
-                f.write("# seq:operation:value:timestamp:scar_id\n")
-                
-    async def initialize_cache(self):
-        """Initialize cache from WAL on startup."""
-        seq, value, _ = await self.recover()
+
+        # Group commit: entries waiting for the next fsync
+        self.group_commit = group_commit
+        self.commit_window = commit_window
+        self.max_batch_bytes = max_batch_bytes
+        # (payload, record count, value after payload, future)
+        self._pending: List[Tuple[bytes, int, int, asyncio.Future]] = []
+        self._pending_bytes = 0
+        self._batch_full = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+
+        # Active segment: one descriptor kept open for the WAL's lifetime
+        self._fd: Optional[int] = None
+        self._segment_index = 0
+        self._offset = 0
+        self._open_active_segment()
+        self._durable_fd: Optional[int] = os.open(durable_path(path), os.O_RDWR | os.O_CREAT, 0o644)
+
+    @property
+    def repair_window(self) -> int:
+        """
+        Bytes before the last valid record whose records are checked on
+        repair (and the step of the backwards search for that record).
+        """
+        return max(2 * self.max_batch_bytes, 256 * 1024)
+
+    # ------------------------------------------------------------------
+    # Segments
+    # ------------------------------------------------------------------
+
+    def segment_path(self, index: int) -> str:
+        """Path of the segment with the given index."""
+        return f"{self.path}.{index:06d}"
+
+    def segments(self) -> List[str]:
+        """All segment files, oldest first."""
+        return list_segments(self.path)
+
+    def sealed_segments(self) -> List[str]:
+        """Segments that are no longer written to."""
+        return self.segments()[:-1]
+
+    def retire_segments(self, upto_seq: int, archive_dir: Optional[str] = None) -> List[str]:
+        """
+        Delete (or move to archive_dir) sealed segments whose records all
+        have seq <= upto_seq, e.g. after a snapshot at upto_seq is durable.
+        Returns the retired segment paths.
+        """
+        segments = self.segments()
+        retired = []
+        for path, following in zip(segments, segments[1:]):
+            # A segment ends right before the next one's base sequence
+            next_base = self.segment_base_seq(following)
+            if next_base is None or next_base - 1 > upto_seq:
+                break
+            if archive_dir is not None:
+                os.makedirs(archive_dir, exist_ok=True)
+                shutil.move(path, os.path.join(archive_dir, os.path.basename(path)))
+            else:
+                os.unlink(path)
+            retired.append(path)
+        if retired:
+            self._fsync_dir()
+        return retired
+
+    def archive_sealed_segments(self, archive_dir: str) -> List[str]:
+        """Move sealed segments to archive_dir. Returns the new paths."""
+        os.makedirs(archive_dir, exist_ok=True)
+        moved = []
+        for segment in self.sealed_segments():
+            target = os.path.join(archive_dir, os.path.basename(segment))
+            shutil.move(segment, target)
+            moved.append(target)
+        return moved
+
+    @staticmethod
+    def segment_base_seq(path: str) -> Optional[int]:
+        """First sequence number stored in a binary segment."""
+        with open(path, 'rb') as f:
+            return decode_segment_header(f.read(SEGMENT_HEADER.size))
+
+    def _open_active_segment(self):
+        """Open the newest segment, or create the first one."""
+        existing = self.segments()
+        for path in existing + [self.path]:
+            if _is_text_wal(path):
+                raise WALFormatError(
+                    f"{path} is a text WAL; convert it with scripts/migrate_wal.py"
+                )
+
+        if not existing:
+            self._create_segment(1, 1)
+            return
+
+        self._segment_index = int(existing[-1][-6:])
+        self._fd = os.open(existing[-1], os.O_RDWR)
+        self._repair_tail()
+
+    def _create_segment(self, index: int, base_seq: int):
+        """Create and preallocate a new segment, making it the active one."""
+        path = self.segment_path(index)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o644)
+        try:
+            if hasattr(os, 'posix_fallocate'):
+                os.posix_fallocate(fd, 0, self.segment_size)
+            else:
+                os.ftruncate(fd, self.segment_size)
+            os.pwrite(fd, encode_segment_header(base_seq), 0)
+            os.fsync(fd)
+        except Exception:
+            os.close(fd)
+            raise
+        self._fsync_dir()
+
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = fd
+        self._segment_index = index
+        self._offset = SEGMENT_HEADER.size
+
+    def _fsync_dir(self):
+        """Persist segment creation in the directory entry."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            dir_fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(dir_fd)
+
+    @classmethod
+    def _data_end(cls, fd: int) -> int:
+        """
+        Offset where the preallocated zero padding starts.
+        Binary search over pages: every record carries non-zero markers and
+        is smaller than a page, so every page before the end of data has
+        content and every page after is zero. That only holds once a torn
+        final write has been repaired; see _written_end().
+        """
+        size = os.fstat(fd).st_size
+        lo, hi = 0, (size + cls.PAGE_SIZE - 1) // cls.PAGE_SIZE
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if os.pread(fd, cls.PAGE_SIZE, mid * cls.PAGE_SIZE).strip(b'\0'):
+                lo = mid + 1
+            else:
+                hi = mid
+
+        if lo == 0:
+            return SEGMENT_HEADER.size
+        last_page = os.pread(fd, cls.PAGE_SIZE, (lo - 1) * cls.PAGE_SIZE)
+        return max(SEGMENT_HEADER.size, (lo - 1) * cls.PAGE_SIZE + len(last_page.rstrip(b'\0')))
+
+    @staticmethod
+    def _written_end(fd: int, chunk: int = 1 << 20) -> int:
+        """
+        Offset just past the last non-zero byte. Unlike _data_end() this
+        does not assume the data is contiguous: the pages of a torn final
+        write reach the disk in any order and can leave zero holes in it.
+        """
+        hi = os.fstat(fd).st_size
+        while hi > SEGMENT_HEADER.size:
+            lo = max(SEGMENT_HEADER.size, hi - chunk)
+            data = os.pread(fd, hi - lo, lo).rstrip(b'\0')
+            if data:
+                return lo + len(data)
+            hi = lo
+        return SEGMENT_HEADER.size
+
+    @staticmethod
+    def _frame_ending_at(
+        fd: int, end: int, path: str = ''
+    ) -> Optional[Tuple[int, Union[WALRecord, WALCommit]]]:
+        """Valid record or commit marker whose last byte is at end - 1, as (start, frame)."""
+        if end - RECORD_TRAILER.size < SEGMENT_HEADER.size:
+            return None
+        _, record_len, marker = RECORD_TRAILER.unpack(
+            os.pread(fd, RECORD_TRAILER.size, end - RECORD_TRAILER.size)
+        )
+        start = end - record_len
+        if marker != RECORD_END or start < SEGMENT_HEADER.size:
+            return None
+        try:
+            return start, decode_frame(os.pread(fd, record_len, start), path, start)
+        except WALCorruptionError:
+            return None
+
+    @staticmethod
+    def _check_write(
+        fd: int, commit_start: int, commit: WALCommit, path: str = ''
+    ) -> Optional[Tuple[int, WALRecord]]:
+        """
+        Verify the records of the write closed by the commit marker at
+        commit_start. Returns (write start, last record), or None if any of
+        them is missing or damaged.
+        """
+        start = commit_start - commit.length
+        if start < SEGMENT_HEADER.size or commit.count == 0:
+            return None
+        data = os.pread(fd, commit.length, start)
+        offset, count, record = 0, 0, None
+        while offset < len(data):
+            length = record_length(data[offset:offset + RECORD_HEADER.size])
+            if length is None:
+                return None
+            try:
+                record = decode_frame(data[offset:offset + length], path, start + offset)
+            except WALCorruptionError:
+                return None
+            if not isinstance(record, WALRecord):
+                return None
+            offset += length
+            count += 1
+        if count != commit.count:
+            return None
+        return start, record
+
+    def _tail_record(
+        self, fd: int, end: int, verify_chain: bool = False, path: str = ''
+    ) -> Tuple[int, Optional[WALRecord]]:
+        """
+        Find the last complete write by seeking backwards from end of data
+        for its commit marker. Returns (valid_end, last record); data between
+        valid_end and end is a torn final write.
+
+        The search is not bounded by repair_window: a torn add_many()
+        payload can be larger than any window. A final write whose marker
+        reached the disk but some of whose pages did not is torn as well,
+        and is dropped whole. Writes are serialized behind their fsync, so
+        a write followed by any data was acknowledged: damage there, or
+        (with verify_chain) in the writes within repair_window before it,
+        raises WALCorruptionError instead of being truncated.
+        """
+        if not verify_chain:
+            # Fast path: a cleanly closed segment ends with a commit marker
+            found = self._frame_ending_at(fd, end, path)
+            if found is not None and isinstance(found[1], WALCommit):
+                last = self._frame_ending_at(fd, found[0], path)
+                if last is not None and isinstance(last[1], WALRecord):
+                    return end, last[1]
+            if end == SEGMENT_HEADER.size:
+                return end, None
+
+        valid_end, found = self._last_commit(fd, end, path)
+        if found is None:
+            return valid_end, None
+        write = self._check_write(fd, *found, path=path)
+        if write is None:
+            if valid_end < end:
+                raise WALCorruptionError(path, found[0], "damaged record in an acknowledged write")
+            # The final write's marker is on disk but not all of its records
+            valid_end = found[0] - found[1].length
+            if valid_end == SEGMENT_HEADER.size:
+                return valid_end, None
+            write = self._previous_write(fd, valid_end, path)
+
+        start, record = write
+        lo = max(SEGMENT_HEADER.size, start - self.repair_window)
+        while verify_chain and start > lo:
+            start, _ = self._previous_write(fd, start, path)
+        return valid_end, record
+
+    def _previous_write(self, fd: int, end: int, path: str = '') -> Tuple[int, WALRecord]:
+        """The acknowledged write ending at end, as (start, last record)."""
+        found = self._frame_ending_at(fd, end, path)
+        write = None
+        if found is not None and isinstance(found[1], WALCommit):
+            write = self._check_write(fd, *found, path=path)
+        if write is None:
+            raise WALCorruptionError(path, end, "damaged record in an acknowledged write")
+        return write
+
+    def _last_commit(
+        self, fd: int, end: int, path: str = ''
+    ) -> Tuple[int, Optional[Tuple[int, WALCommit]]]:
+        """Last valid commit marker before end, scanning back one window at a time."""
+        hi = end
+        while hi > SEGMENT_HEADER.size:
+            lo = max(SEGMENT_HEADER.size, hi - self.repair_window)
+            window = os.pread(fd, hi - lo, lo)
+            limit = len(window)
+            while True:
+                idx = window.rfind(RECORD_END, 0, limit)
+                if idx == -1:
+                    break
+                candidate = lo + idx + len(RECORD_END)
+                found = self._frame_ending_at(fd, candidate, path)
+                if found is not None and isinstance(found[1], WALCommit):
+                    return candidate, found
+                limit = idx + len(RECORD_END) - 1
+            if lo == SEGMENT_HEADER.size:
+                break
+            # Overlap so a marker split between two windows is still found
+            hi = lo + len(RECORD_END) - 1
+        return SEGMENT_HEADER.size, None
+
+    def _repair_tail(self):
+        """Zero out a torn final write in the active segment."""
+        path = self.segment_path(self._segment_index)
+        end = self._written_end(self._fd)
+        valid_end, _ = self._tail_record(self._fd, end, verify_chain=True, path=path)
+        if valid_end < end:
+            os.pwrite(self._fd, b'\0' * (end - valid_end), valid_end)
+            _datasync(self._fd)
+        self._offset = valid_end
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    async def initialize_cache(self, snapshot_seq: int = 0, snapshot_value: int = 0):
+        """
+        Initialize cache from WAL on startup.
+        A snapshot newer than anything left in the log (all segments
+        retired) provides the starting point instead.
+        """
+        record = await self._recover_record()
+        seq, value = (record.seq, record.value) if record is not None else (0, 0)
+        if record is not None:
+            # Timestamps keep increasing across restarts, even if the clock went back
+            self._last_timestamp = max(self._last_timestamp, record.timestamp_ns)
+        if seq < snapshot_seq:
+            seq, value = snapshot_seq, snapshot_value
         self._cached_seq = seq
         self._cached_value = value
-        
-    async def append(self, operation: str, value: int, scar_id: str) -> bool:
+        self._durable_seq = seq
+        self._publish_durable(seq)
+
+    def _publish_durable(self, seq: int):
+        """
+        Tell readers that records up to seq are on disk. Written after the
+        fsync and never synced itself, so it can lag but never lead.
+        """
+        os.pwrite(self._durable_fd, _DURABLE_SEQ.pack(seq), 0)
+
+    def _next_timestamp(self) -> int:
+        """Wall-clock nanoseconds, forced strictly increasing."""
+        self._last_timestamp = max(time.time_ns(), self._last_timestamp + 1)
+        return self._last_timestamp
+
+    def _encode_entry(
+        self, operation: str, value: int, scar_id: str, element: Optional[int]
+    ) -> bytes:
+        """Assign the next sequence number and encode one WAL record."""
+        self._cached_seq += 1
+        record = WALRecord(
+            seq=self._cached_seq,
+            operation=operation,
+            value=value,
+            timestamp_ns=self._next_timestamp(),
+            scar_id=scar_id,
+            element=element,
+        )
+        return encode_record(record, self.value_width)
+
+    def _write(self, payload: bytes, first_seq: int, count: int):
+        """
+        pwrite count records plus their commit marker into the active
+        segment, rolling over if it is full.
+        """
+        payload += encode_commit(count, len(payload))
+        if self._offset + len(payload) > self.segment_size and self._offset > SEGMENT_HEADER.size:
+            self._create_segment(self._segment_index + 1, first_seq)
+        os.pwrite(self._fd, payload, self._offset)
+        self._offset += len(payload)
+
+    async def _write_durable(self, payload: bytes, first_seq: int, count: int):
+        """Append count records to the active segment and fdatasync them."""
+        # pwrite into the page cache is cheap; only the sync leaves the loop
+        self._write(payload, first_seq, count)
+        await asyncio.to_thread(_datasync, self._fd)
+        self._publish_durable(first_seq + count - 1)
+
+    async def append(
+        self,
+        operation: str,
+        value: int,
+        scar_id: str,
+        element: Optional[int] = None
+    ) -> bool:
         """
         Atomic write with async fsync.
         Uses asyncio.Lock for thread safety.
+
+        element is the prime that was added or removed, stored so the log
+        is self-describing for audits and replicas.
+
+        In group-commit mode the entry is queued and the call returns
+        only after the batch containing it has been fsynced.
         """
+        return await self.append_many([(operation, value, scar_id, element)])
+
+    async def append_many(
+        self, entries: List[Tuple[str, int, str, Optional[int]]]
+    ) -> bool:
+        """
+        Append several (operation, value, scar_id, element) entries as one
+        unit: consecutive sequence numbers, one write and one fsync. The
+        entries are never split across segments or group-commit batches,
+        so durable_seq never points into the middle of them.
+        """
+        if not entries:
+            return True
+        if self.group_commit:
+            return await self._append_grouped(entries)
+
         async with self._lock:
-            timestamp = datetime.utcnow().isoformat()
-            self._cached_seq += 1
-            entry = f"{self._cached_seq}:{operation}:{value}:{timestamp}:{scar_id}\n"
-            
-            # Async write
-            async with aiofiles.open(self.path, 'a') as f:
-                await f.write(entry)
-                await f.flush()
-                # fsync in separate thread to avoid blocking event loop
-                await asyncio.to_thread(os.fsync, f.fileno())
-            
-            self._cached_value = value
+            first_seq = self._cached_seq + 1
+            payload = b''.join(self._encode_entry(*entry) for entry in entries)
+            await self._write_durable(payload, first_seq, len(entries))
+            self._cached_value = entries[-1][1]
+            self._durable_seq = self._cached_seq
             return True
-            
+
+    async def _append_grouped(self, entries: List[Tuple[str, int, str, Optional[int]]]) -> bool:
+        """Queue entries for the next group commit and wait until durable."""
+        loop = asyncio.get_running_loop()
+
+        # Sequence numbers are assigned synchronously, so queue order
+        # always matches sequence order.
+        payload = b''.join(self._encode_entry(*entry) for entry in entries)
+        future = loop.create_future()
+        self._pending.append((payload, len(entries), entries[-1][1], future))
+        self._pending_bytes += len(payload)
+
+        if self._pending_bytes >= self.max_batch_bytes:
+            self._batch_full.set()
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._group_flush())
+
+        return await future
+
+    async def _group_flush(self):
+        """Drain queued entries: one write and one fsync per batch."""
+        while self._pending:
+            if self._pending_bytes < self.max_batch_bytes:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), self.commit_window)
+                except asyncio.TimeoutError:
+                    pass
+            self._batch_full.clear()
+
+            batch, self._pending = self._pending, []
+            self._pending_bytes = 0
+            count = sum(n for _, n, _, _ in batch)
+            first_seq = self._cached_seq - count + 1
+
+            async with self._lock:
+                try:
+                    await self._write_durable(
+                        b''.join(payload for payload, _, _, _ in batch), first_seq, count
+                    )
+                except Exception as e:
+                    for _, _, _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                self._cached_value = batch[-1][2]
+                self._durable_seq = first_seq + count - 1
+
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_result(True)
+
+    def import_records(self, records: Iterable[WALRecord]) -> int:
+        """
+        Write already-sequenced records (e.g. from a migration) and sync once.
+        Returns the number of records written.
+        """
+        count = 0
+        batch: List[bytes] = []
+        batch_bytes = first_seq = 0
+        for record in records:
+            if not batch:
+                first_seq = record.seq
+            batch.append(encode_record(record, self.value_width))
+            batch_bytes += len(batch[-1])
+            if batch_bytes >= self.max_batch_bytes:
+                self._write(b''.join(batch), first_seq, len(batch))
+                batch, batch_bytes = [], 0
+            self._cached_seq = self._durable_seq = record.seq
+            self._cached_value = record.value
+            self._last_timestamp = max(self._last_timestamp, record.timestamp_ns)
+            count += 1
+        if batch:
+            self._write(b''.join(batch), first_seq, len(batch))
+        _datasync(self._fd)
+        self._publish_durable(self._durable_seq)
+        return count
+
+    async def flush(self):
+        """Wait until every queued group-commit entry is durable."""
+        while self._flush_task is not None and not self._flush_task.done():
+            await asyncio.shield(self._flush_task)
+
+    async def close(self):
+        """Flush pending entries and release the segment descriptor."""
+        await self.flush()
+        self._close_fd()
+
+    def _close_fd(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        if self._durable_fd is not None:
+            os.close(self._durable_fd)
+            self._durable_fd = None
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def iter_records(self, start_seq: int = 0, strict: bool = True) -> Iterator[WALRecord]:
+        """
+        Lazily yield records with seq >= start_seq, oldest first.
+
+        Segments that end before start_seq are skipped using their header.
+        With strict=False a damaged record ends the iteration instead of
+        raising, which is what a reader tailing a live log wants.
+        """
+        segments = [(path, self.segment_base_seq(path)) for path in self.segments()]
+        for i, (path, _) in enumerate(segments):
+            following = segments[i + 1][1] if i + 1 < len(segments) else None
+            if following is not None and following <= start_seq:
+                continue
+            try:
+                yield from self._iter_segment(path, start_seq)
+            except WALCorruptionError:
+                if strict:
+                    raise
+                return
+
+    def _iter_segment(self, path: str, start_seq: int) -> Iterator[WALRecord]:
+        """Records of one segment, stopping at the zero padding; commit markers are skipped."""
+        with open(path, 'rb', buffering=1 << 20) as f:
+            offset = SEGMENT_HEADER.size
+            f.seek(offset)
+            while True:
+                head = f.read(RECORD_HEADER.size)
+                if not head.strip(b'\0'):
+                    return
+                length = record_length(head)
+                if length is None:
+                    raise WALCorruptionError(path, offset, "bad record header")
+                data = head + f.read(length - len(head))
+                record = decode_frame(data, path, offset)
+                offset += length
+                if isinstance(record, WALRecord) and record.seq >= start_seq:
+                    yield record
+
+    def __iter__(self) -> Iterator[WALRecord]:
+        return self.iter_records()
+
+    def _recover_file(self, path: str) -> Optional[WALRecord]:
+        """Last valid record of one segment."""
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            _, record = self._tail_record(fd, self._data_end(fd), path=path)
+            return record
+        finally:
+            os.close(fd)
+
     async def recover(self) -> Tuple[int, int, Optional[str]]:
         """
         Recover last value and seq after crash.
         Returns (seq, value, last_scar_id)
+
+        Only the tail of the newest non-empty segment is read, so recovery
+        cost does not depend on chain length.
         """
-        if not os.path.exists(self.path):
+        record = await self._recover_record()
+        if record is None:
             return 0, 0, None
-            
-        async with aiofiles.open(self.path, 'r') as f:
-            content = await f.read()
-            
-        lines = content.strip().split('\n')
-        # Skip comments
-        data_lines = [l for l in lines if l and not l.startswith('#')]
-        
-        if not data_lines:
-            return 0, 0, None
-            
-        last = data_lines[-1].strip().split(':')
-        seq = int(last[0])
-        value = int(last[2])
-        scar_id = last[4] if len(last) > 4 else None
-        
-        return seq, value, scar_id
-        
+        return record.seq, record.value, record.scar_id
+
+    async def _recover_record(self) -> Optional[WALRecord]:
+        """Last valid record of the log, or None if it is empty."""
+        for path in self.segments()[::-1]:
+            record = await asyncio.to_thread(self._recover_file, path)
+            if record is not None:
+                return record
+        return None
+
     @property
     def current_value(self) -> int:
         return self._cached_value
-        
+
     @property
     def current_seq(self) -> int:
         return self._cached_seq
+
+    @property
+    def durable_seq(self) -> int:
+        """Sequence number of the last record known to be on disk."""
+        return self._durable_seq
+
+
+class WALTailer:
+    """
+    Read-only incremental reader of a WAL written by another process.
+
+    poll() returns the records appended since the previous call. It never
+    opens a segment for writing and never repairs anything: a write that
+    is still in progress (a short record, one failing its checksum, or no
+    commit marker yet) ends the poll and is read again next time, so the
+    records of one write are returned all together. Records become visible
+    once written, which can be before the writer's fsync.
+
+    Records before start_seq are skipped, using segment headers to start
+    in the right segment. poll(end_seq=...) stops before records past
+    end_seq, e.g. the writer's read_durable_seq(). If the segment being read is retired, reading
+    resumes at the oldest
+    remaining segment; the records in between are skipped (every record
+    carries the full accumulator value, so the latest state is unaffected).
+    """
+
+    def __init__(self, path: str, start_seq: int = 0):
+        self.path = path
+        self.start_seq = start_seq
+        self._segment: Optional[str] = None
+        self._offset = 0
+        # Records of a write that did not fit under the previous poll's limit
+        self._ready: List[WALRecord] = []
+
+    def _first_segment(self, segments: List[str]) -> str:
+        """Newest segment starting at or before start_seq (else the oldest)."""
+        for path in segments[::-1]:
+            base = AccumulatorWAL.segment_base_seq(path)
+            if base is not None and base <= self.start_seq:
+                return path
+        return segments[0]
+
+    def poll(self, limit: Optional[int] = None, end_seq: Optional[int] = None) -> List[WALRecord]:
+        """New records up to end_seq, oldest first (at most limit of them)."""
+        records = self._ready[:limit]
+        del self._ready[:len(records)]
+        while limit is None or len(records) < limit:
+            # List before reading: a newer segment means ours is sealed
+            segments = list_segments(self.path)
+            if not segments:
+                break
+            if self._segment is None:
+                self._segment, self._offset = self._first_segment(segments), SEGMENT_HEADER.size
+            elif self._segment not in segments:
+                self._segment, self._offset = segments[0], SEGMENT_HEADER.size
+            remaining = None if limit is None else limit - len(records)
+            read, held = self._read_segment(remaining, end_seq)
+            records += read
+
+            later = segments.index(self._segment) + 1
+            if held or later == len(segments) or (limit is not None and len(records) >= limit):
+                break
+            self._segment, self._offset = segments[later], SEGMENT_HEADER.size
+        return records
+
+    def _read_segment(self, limit: Optional[int], end_seq: Optional[int]) -> Tuple[List[WALRecord], bool]:
+        """Committed records from the current offset, and whether end_seq stopped the read."""
+        records: List[WALRecord] = []
+        held = False
+        try:
+            f = open(self._segment, 'rb', buffering=1 << 20)
+        except FileNotFoundError:
+            return records, held
+        with f:
+            f.seek(self._offset)
+            offset, write = self._offset, []
+            while limit is None or len(records) < limit:
+                head = f.read(RECORD_HEADER.size)
+                length = record_length(head)
+                if length is None:
+                    break
+                data = head + f.read(length - len(head))
+                try:
+                    frame = decode_frame(data, self._segment, offset)
+                except WALCorruptionError:
+                    break
+                offset += length
+                if isinstance(frame, WALCommit):
+                    if end_seq is not None and write and write[-1].seq > end_seq:
+                        held = True
+                        break
+                    records += [r for r in write if r.seq >= self.start_seq]
+                    self._offset, write = offset, []
+                else:
+                    write.append(frame)
+        if limit is not None and len(records) > limit:
+            self._ready = records[limit:]
+            records = records[:limit]
+        return records, held
+
+
+# ----------------------------------------------------------------------
+# Text WAL migration
+# ----------------------------------------------------------------------
+
+def _is_text_wal(path: str) -> bool:
+    """True if path holds records in the old colon-separated text format."""
+    if not os.path.isfile(path):
+        return False
+    with open(path, 'rb') as f:
+        head = f.read(AccumulatorWAL.PAGE_SIZE)
+    if decode_segment_header(head) is not None:
+        return False
+    head = head.split(b'\0', 1)[0]
+    return any(line and not line.startswith(b'#') for line in head.split(b'\n'))
+
+
+def _parse_text_line(line: str, last_timestamp: int) -> WALRecord:
+    """seq:operation:value:timestamp:scar_id -> WALRecord."""
+    fields = line.split(':')
+    # The ISO timestamp itself contains ':', so it spans the middle fields
+    timestamp = datetime.fromisoformat(':'.join(fields[3:-1])).replace(tzinfo=timezone.utc)
+    return WALRecord(
+        seq=int(fields[0]),
+        operation=fields[1],
+        value=int(fields[2]),
+        timestamp_ns=max(int(timestamp.timestamp() * 1_000_000_000), last_timestamp + 1),
+        scar_id=fields[-1] or None,
+    )
+
+
+def _read_text_records(paths: List[str]) -> Iterator[WALRecord]:
+    """Records from text WAL files, tolerating a torn final line."""
+    last_timestamp = 0
+    for path in paths:
+        with open(path, 'rb') as f:
+            content = f.read().split(b'\0', 1)[0].decode()
+        lines = [l for l in content.split('\n') if l.strip() and not l.startswith('#')]
+        for i, line in enumerate(lines):
+            try:
+                record = _parse_text_line(line.strip(), last_timestamp)
+            except (ValueError, IndexError):
+                if i == len(lines) - 1 and path == paths[-1]:
+                    return
+                raise WALFormatError(f"{path}: cannot parse line {line!r}")
+            last_timestamp = record.timestamp_ns
+            yield record
+
+
+def migrate_text_wal(path: str, value_width: int = 256, backup_dir: Optional[str] = None) -> int:
+    """
+    Convert a text WAL (legacy single file and/or text segments) at path
+    into binary segments. The text files are moved to backup_dir
+    (default: <path>.text/). Returns the number of migrated records.
+    """
+    segments = []
+    for candidate in sorted(glob.glob(glob.escape(path) + '.*')):
+        suffix = candidate[len(path) + 1:]
+        if len(suffix) == 6 and suffix.isdigit():
+            if AccumulatorWAL.segment_base_seq(candidate) is not None:
+                raise WALFormatError(f"{candidate} is already a binary segment")
+            segments.append(candidate)
+
+    sources = ([path] if _is_text_wal(path) else []) + segments
+    if not sources:
+        return 0
+
+    backup_dir = backup_dir or f"{path}.text"
+    os.makedirs(backup_dir, exist_ok=True)
+    moved = []
+    for source in sources:
+        target = os.path.join(backup_dir, os.path.basename(source))
+        shutil.move(source, target)
+        moved.append(target)
+
+    wal = AccumulatorWAL(path, value_width=value_width)
+    try:
+        return wal.import_records(_read_text_records(moved))
+    finally:
+        wal._close_fd()
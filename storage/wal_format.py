@@ -0,0 +1,226 @@
+"""
+Binary record format for the accumulator WAL.
+
+Segment layout:
+    segment header : magic b'SCMWAL' | version u8 | reserved u8 | base_seq u64
+    records...     : followed by zero padding up to the preallocated size
+
+Record layout (big-endian):
+    header  : magic b'\\xa5W' | version u8 | op u8 | body_len u32
+    body    : seq u64 | timestamp_ns u64
+              | value_len u16 | value (fixed width, big-endian)
+              | element_len u16 | element (prime, big-endian, optional)
+              | scar_id_len u8 | scar_id (utf-8)
+    trailer : crc32c u32 (over header + body) | record_len u32 | b'\\x5aE'
+
+Every write (one append_many() call or one group-commit batch) is closed
+by a commit marker framed like a record, with op COMMIT and body
+record_count u32 | batch_len u32 covering the records before it. A write
+whose marker or records did not all reach the disk is torn and dropped
+whole on recovery.
+
+Every record ends with a non-zero marker, so the end of data inside a
+zero-padded segment can be found without parsing, and the trailing
+record_len lets recovery walk the log backwards.
+"""
+
+import struct
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
+
+try:
+    from crc32c import crc32c as _crc32c_ext
+except ImportError:
+    _crc32c_ext = None
+
+
+SEGMENT_MAGIC = b'SCMWAL'
+SEGMENT_VERSION = 1
+SEGMENT_HEADER = struct.Struct('>6sBxQ')
+
+RECORD_MAGIC = b'\xa5W'
+RECORD_VERSION = 1
+RECORD_HEADER = struct.Struct('>2sBBI')
+RECORD_TRAILER = struct.Struct('>II2s')
+RECORD_END = b'\x5aE'
+
+_BODY_FIXED = struct.Struct('>QQ')
+_U16 = struct.Struct('>H')
+_COMMIT_BODY = struct.Struct('>II')
+
+OPERATIONS = {
+    'ADD': 1,
+    'REMOVE': 2,
+    # One record per element of an add_many() batch; all records of a
+    # batch carry the accumulator value after the whole batch.
+    'ADD_BATCH': 3,
+    # One record per element of a remove_many() batch, same convention
+    'REMOVE_BATCH': 4,
+}
+OPERATION_NAMES = {code: name for name, code in OPERATIONS.items()}
+
+# Op code of the marker closing each write; never a WALRecord operation
+COMMIT = 0xC0
+
+
+class WALCorruptionError(Exception):
+    """Raised when a WAL record fails validation."""
+
+    def __init__(self, path: str, offset: int, reason: str):
+        super().__init__(f"{path} @ {offset}: {reason}")
+        self.path = path
+        self.offset = offset
+        self.reason = reason
+
+
+class WALFormatError(Exception):
+    """Raised when a WAL file is not in the expected format."""
+
+
+@dataclass(frozen=True)
+class WALRecord:
+    """One decoded WAL entry."""
+    seq: int
+    operation: str
+    value: int
+    timestamp_ns: int
+    scar_id: Optional[str] = None
+    element: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class WALCommit:
+    """Marker closing one write: the count records (length bytes) before it."""
+    count: int
+    length: int
+
+
+def _build_crc32c_table():
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x82F63B78 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_CRC32C_TABLE = _build_crc32c_table()
+
+
+def _crc32c_py(data: bytes) -> int:
+    """Table-driven CRC32C (Castagnoli) for when the C extension is missing."""
+    crc = 0xFFFFFFFF
+    table = _CRC32C_TABLE
+    for byte in data:
+        crc = table[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+    return crc ^ 0xFFFFFFFF
+
+
+checksum = _crc32c_ext if _crc32c_ext is not None else _crc32c_py
+
+
+def encode_segment_header(base_seq: int) -> bytes:
+    """Header written at offset 0 of every segment."""
+    return SEGMENT_HEADER.pack(SEGMENT_MAGIC, SEGMENT_VERSION, base_seq)
+
+
+def decode_segment_header(data: bytes) -> Optional[int]:
+    """Return base_seq, or None if data is not a binary segment header."""
+    if len(data) < SEGMENT_HEADER.size:
+        return None
+    magic, version, base_seq = SEGMENT_HEADER.unpack_from(data)
+    if magic != SEGMENT_MAGIC or version != SEGMENT_VERSION:
+        return None
+    return base_seq
+
+
+def encode_record(record: WALRecord, value_width: int) -> bytes:
+    """Serialize a record; value is padded to value_width bytes."""
+    value = record.value.to_bytes(max(value_width, (record.value.bit_length() + 7) // 8), 'big')
+    element = b''
+    if record.element is not None:
+        element = record.element.to_bytes((record.element.bit_length() + 7) // 8 or 1, 'big')
+    scar_id = (record.scar_id or '').encode()[:255]
+
+    body = b''.join((
+        _BODY_FIXED.pack(record.seq, record.timestamp_ns),
+        _U16.pack(len(value)), value,
+        _U16.pack(len(element)), element,
+        bytes((len(scar_id),)), scar_id,
+    ))
+    return _frame(OPERATIONS[record.operation], body)
+
+
+def encode_commit(count: int, length: int) -> bytes:
+    """Commit marker for a write of count records totalling length bytes."""
+    return _frame(COMMIT, _COMMIT_BODY.pack(count, length))
+
+
+def _frame(op: int, body: bytes) -> bytes:
+    header = RECORD_HEADER.pack(RECORD_MAGIC, RECORD_VERSION, op, len(body))
+    crc = checksum(header + body)
+    record_len = len(header) + len(body) + RECORD_TRAILER.size
+    return header + body + RECORD_TRAILER.pack(crc, record_len, RECORD_END)
+
+
+def record_length(header: bytes) -> Optional[int]:
+    """Total record length from its header, or None if this is not a record start."""
+    if len(header) < RECORD_HEADER.size:
+        return None
+    magic, version, _, body_len = RECORD_HEADER.unpack_from(header)
+    if magic != RECORD_MAGIC or version != RECORD_VERSION:
+        return None
+    return RECORD_HEADER.size + body_len + RECORD_TRAILER.size
+
+
+def decode_frame(data: bytes, path: str = '', offset: int = 0) -> Union[WALRecord, WALCommit]:
+    """Decode and verify one complete record or commit marker."""
+    length = record_length(data)
+    if length is None or len(data) < length:
+        raise WALCorruptionError(path, offset, "bad record header")
+
+    crc, record_len, end = RECORD_TRAILER.unpack_from(data, length - RECORD_TRAILER.size)
+    if end != RECORD_END or record_len != length:
+        raise WALCorruptionError(path, offset, "bad record trailer")
+    if checksum(data[:length - RECORD_TRAILER.size]) != crc:
+        raise WALCorruptionError(path, offset, "checksum mismatch")
+
+    _, _, op, body_len = RECORD_HEADER.unpack_from(data)
+    if op == COMMIT:
+        if body_len != _COMMIT_BODY.size:
+            raise WALCorruptionError(path, offset, "malformed commit marker")
+        return WALCommit(*_COMMIT_BODY.unpack_from(data, RECORD_HEADER.size))
+    if op not in OPERATION_NAMES:
+        raise WALCorruptionError(path, offset, f"unknown operation {op}")
+
+    try:
+        pos = RECORD_HEADER.size
+        seq, timestamp_ns = _BODY_FIXED.unpack_from(data, pos)
+        pos += _BODY_FIXED.size
+        value, pos = _read_int(data, pos)
+        element, pos = _read_int(data, pos)
+        if value is None:
+            raise WALCorruptionError(path, offset, "missing accumulator value")
+        scar_len = data[pos]
+        scar_id = data[pos + 1:pos + 1 + scar_len].decode()
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise WALCorruptionError(path, offset, f"malformed body: {e}")
+
+    return WALRecord(
+        seq=seq,
+        operation=OPERATION_NAMES[op],
+        value=value,
+        timestamp_ns=timestamp_ns,
+        scar_id=scar_id or None,
+        element=element,
+    )
+
+
+def _read_int(data: bytes, pos: int) -> Tuple[Optional[int], int]:
+    """Read a u16 length-prefixed big-endian integer (None when empty)."""
+    (length,) = _U16.unpack_from(data, pos)
+    pos += _U16.size
+    if length == 0:
+        return None, pos
+    return int.from_bytes(data[pos:pos + length], 'big'), pos + length
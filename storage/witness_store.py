@@ -0,0 +1,364 @@
+"""
+Disk-backed membership witness store.
+
+Every accumulated scar keeps a witness that proves membership against the
+*current* accumulator value, not only against the value at the time it was
+added. Witnesses are brought forward lazily: added primes go to a bounded
+pending log, and flush() raises every stored witness to the product of the
+primes added after it in one exponentiation per witness. add() never
+flushes; the owner runs flush() once flush_due (one modexp per witness,
+so off the event loop), and sync() to make new members durable without
+it. Pending primes are not persisted: they are replayed from the WAL
+(catch_up).
+
+Files (fixed-width, memory-mapped, so memory does not grow with the chain):
+    <path>.dat : records  key (32) | prime | witness | seq u64 | live u8
+    <path>.idx : header, accumulator value, then an open-addressing hash
+                 table of u64 record slots
+                 (0 = empty, n = record n - 1), keyed by the scar hash
+"""
+
+import bisect
+import math
+import mmap
+import os
+import struct
+import threading
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from storage.wal_format import WALRecord
+
+
+KEY_SIZE = 32
+PRIME_WIDTH = 33  # 256-bit primes; the "scan" scheme may step past 2^256
+
+INDEX_MAGIC = b'SCMWIT'
+INDEX_VERSION = 1
+# magic | version | reserved | value_width u16 | prime_width u16 | count | capacity
+# | synced seq (every live witness is valid at least up to it)
+INDEX_HEADER = struct.Struct('>6sBxHHQQQ')
+_SLOT = struct.Struct('>Q')
+_SEQ = struct.Struct('>Q')
+
+
+class WitnessStore:
+    """Fixed-width witness records with a memory-mapped hash index."""
+
+    def __init__(
+        self,
+        path: str,
+        N: int,
+        value_width: Optional[int] = None,
+        flush_primes: int = 1024,
+        initial_capacity: int = 1024
+    ):
+        self.path = path
+        self.N = N
+        self.value_width = value_width or (N.bit_length() + 7) // 8
+        self.prime_width = PRIME_WIDTH
+        self.record_size = KEY_SIZE + self.prime_width + self.value_width + _SEQ.size + 1
+        self.flush_primes = flush_primes
+
+        # Accumulator value the witnesses prove membership against
+        self.value = self._synced_value = 0
+        self._slots = INDEX_HEADER.size + self.value_width
+
+        # (seq, prime) added after the last flush, seq ascending
+        self._pending: List[Tuple[int, int]] = []
+        self._suffix: Optional[Tuple[List[int], List[int]]] = None
+        # flush() may run in a worker thread while the event loop adds
+        self._lock = threading.RLock()
+
+        self._data_fd = os.open(f"{path}.dat", os.O_RDWR | os.O_CREAT, 0o644)
+        self._index_fd = os.open(f"{path}.idx", os.O_RDWR | os.O_CREAT, 0o644)
+        self._data: Optional[mmap.mmap] = None
+        self._index: Optional[mmap.mmap] = None
+
+        if os.fstat(self._index_fd).st_size == 0:
+            self.count, self.synced_seq = 0, 0
+            self._capacity = 0
+            self._map_data(max(initial_capacity, 1) * self.record_size)
+            self._build_index(max(initial_capacity, 8) * 2)
+        else:
+            self._map_index()
+            self._map_data(os.fstat(self._data_fd).st_size)
+
+    # ------------------------------------------------------------------
+    # Files
+    # ------------------------------------------------------------------
+
+    def _map_data(self, size: int):
+        size = max(size, mmap.PAGESIZE)
+        if os.fstat(self._data_fd).st_size < size:
+            os.ftruncate(self._data_fd, size)
+        if self._data is not None:
+            self._data.close()
+        self._data = mmap.mmap(self._data_fd, size)
+
+    def _map_index(self):
+        self._index = mmap.mmap(self._index_fd, os.fstat(self._index_fd).st_size)
+        magic, version, value_width, prime_width, count, capacity, seq = \
+            INDEX_HEADER.unpack_from(self._index, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"{self.path}.idx is not a witness index")
+        if (value_width, prime_width) != (self.value_width, self.prime_width):
+            raise ValueError(f"{self.path}: record widths do not match modulus")
+        self.count, self._capacity, self.synced_seq = count, capacity, seq
+        self.value = self._synced_value = int.from_bytes(self._index[INDEX_HEADER.size:self._slots], 'big')
+
+    def _write_header(self):
+        INDEX_HEADER.pack_into(
+            self._index, 0, INDEX_MAGIC, INDEX_VERSION, self.value_width,
+            self.prime_width, self.count, self._capacity, self.synced_seq
+        )
+        self._index[INDEX_HEADER.size:self._slots] = self._synced_value.to_bytes(self.value_width, 'big')
+
+    def _build_index(self, capacity: int):
+        """(Re)build the hash table with the given power-of-two capacity."""
+        capacity = 1 << (capacity - 1).bit_length()
+        if self._index is not None:
+            self._index.close()
+        os.ftruncate(self._index_fd, 0)
+        os.ftruncate(self._index_fd, self._slots + capacity * _SLOT.size)
+        self._index = mmap.mmap(self._index_fd, self._slots + capacity * _SLOT.size)
+        self._capacity = capacity
+        for record_no in range(self.count):
+            slot = self._probe(self._key(record_no))
+            _SLOT.pack_into(self._index, self._slots + slot * _SLOT.size, record_no + 1)
+        self._write_header()
+
+    # ------------------------------------------------------------------
+    # Records
+    # ------------------------------------------------------------------
+
+    def _offset(self, record_no: int) -> int:
+        return record_no * self.record_size
+
+    def _key(self, record_no: int) -> bytes:
+        offset = self._offset(record_no)
+        return bytes(self._data[offset:offset + KEY_SIZE])
+
+    def _read(self, record_no: int) -> Tuple[bytes, int, int, int, bool]:
+        """(key, prime, witness, seq, live) of one record."""
+        offset = self._offset(record_no)
+        raw = self._data[offset:offset + self.record_size]
+        pos = KEY_SIZE
+        prime = int.from_bytes(raw[pos:pos + self.prime_width], 'big')
+        pos += self.prime_width
+        witness = int.from_bytes(raw[pos:pos + self.value_width], 'big')
+        pos += self.value_width
+        seq, = _SEQ.unpack_from(raw, pos)
+        return bytes(raw[:KEY_SIZE]), prime, witness, seq, raw[-1] == 1
+
+    def _write(self, record_no: int, key: bytes, prime: int, witness: int, seq: int, live: bool = True):
+        self._data[self._offset(record_no):self._offset(record_no) + self.record_size] = (
+            key
+            + prime.to_bytes(self.prime_width, 'big')
+            + witness.to_bytes(self.value_width, 'big')
+            + _SEQ.pack(seq)
+            + (b'\x01' if live else b'\x00')
+        )
+
+    def _probe(self, key: bytes) -> int:
+        """Slot holding key, or the empty slot where it would go."""
+        mask = self._capacity - 1
+        slot = int.from_bytes(key[:8], 'big') & mask
+        while True:
+            entry, = _SLOT.unpack_from(self._index, self._slots + slot * _SLOT.size)
+            if entry == 0 or (entry <= self.count and self._key(entry - 1) == key):
+                return slot
+            slot = (slot + 1) & mask
+
+    def _lookup(self, key: bytes) -> Optional[int]:
+        entry, = _SLOT.unpack_from(self._index, self._slots + self._probe(key) * _SLOT.size)
+        return entry - 1 if entry else None
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def add(
+        self,
+        members: Iterable[Tuple[bytes, int, int]],
+        primes: Iterable[int],
+        first_seq: int,
+        value: int
+    ):
+        """
+        Record accumulator additions.
+
+        primes are the primes added at sequence numbers first_seq,
+        first_seq + 1, ...; value is the accumulator after the last of them.
+        members are (scar hash, prime, witness) for the scars the primes
+        belong to, with witnesses valid against value.
+        """
+        with self._lock:
+            primes = list(primes)
+            last_seq = first_seq + len(primes) - 1
+            for key, prime, witness in members:
+                key = key[:KEY_SIZE].ljust(KEY_SIZE, b'\x00')
+                record_no = self._lookup(key)
+                if record_no is None:
+                    record_no = self._append_slot(key)
+                self._write(record_no, key, prime, witness, last_seq)
+
+            if self._pending and first_seq < self._pending[-1][0]:
+                # Concurrent adders may finish out of order
+                for entry in zip(range(first_seq, last_seq + 1), primes):
+                    bisect.insort(self._pending, entry)
+            else:
+                self._pending.extend(zip(range(first_seq, last_seq + 1), primes))
+                self.value = value
+            self._suffix = None
+            self._write_header()
+
+    @property
+    def flush_due(self) -> bool:
+        """flush_primes or more primes are pending."""
+        return len(self._pending) >= self.flush_primes
+
+    def _append_slot(self, key: bytes) -> int:
+        if (self.count + 1) * 2 > self._capacity:
+            self._build_index(self._capacity * 2)
+        if (self.count + 1) * self.record_size > len(self._data):
+            self._map_data(len(self._data) * 2)
+        record_no = self.count
+        self.count += 1
+        _SLOT.pack_into(self._index, self._slots + self._probe(key) * _SLOT.size, record_no + 1)
+        return record_no
+
+    @property
+    def seq(self) -> int:
+        """Latest sequence number the store knows about."""
+        return self._pending[-1][0] if self._pending else self.synced_seq
+
+    def _catch_up(self, witness: int, seq: int) -> int:
+        """Raise witness (valid at seq) by every pending prime added after seq."""
+        if self._suffix is None:
+            # products[i] = product of pending primes i..end
+            products = [1] * (len(self._pending) + 1)
+            for i in range(len(self._pending) - 1, -1, -1):
+                products[i] = products[i + 1] * self._pending[i][1]
+            self._suffix = ([seq for seq, _ in self._pending], products)
+        seqs, products = self._suffix
+        exponent = products[bisect.bisect_right(seqs, seq)]
+        return pow(witness, exponent, self.N) if exponent != 1 else witness
+
+    def sync(self):
+        """Sync member records and the index, leaving pending primes pending."""
+        with self._lock:
+            self._data.flush()
+            self._index.flush()
+
+    def flush(self):
+        """Apply pending primes to every stored witness and sync the files."""
+        with self._lock:
+            if self._pending:
+                target = self._pending[-1][0]
+                for record_no in range(self.count):
+                    key, prime, witness, seq, live = self._read(record_no)
+                    if live and seq < target:
+                        witness = self._catch_up(witness, seq)
+                        self._write(record_no, key, prime, witness, target)
+                self._pending = []
+                self._suffix = None
+                self.synced_seq = target
+                self._synced_value = self.value
+            self._data.flush()
+            self._write_header()
+            self._index.flush()
+
+    def apply_removal(self, primes: Iterable[int], value: int, seq: int):
+        """
+        Record removal of primes, leaving the accumulator at value.
+
+        Removed members are dropped; every other witness w for p_i becomes
+        w^b * value^a with a*p_i + b*P = 1, P the product of the removed
+        primes (no trapdoor needed).
+        """
+        primes = set(primes)
+        product = math.prod(primes)
+        with self._lock:
+            self.flush()
+            for record_no in range(self.count):
+                key, p_i, witness, _, live = self._read(record_no)
+                if not live:
+                    continue
+                if p_i in primes:
+                    self._write(record_no, key, p_i, witness, seq, live=False)
+                    continue
+                _, a, b = _egcd(p_i, product)
+                witness = pow(witness, b, self.N) * pow(value, a, self.N) % self.N
+                self._write(record_no, key, p_i, witness, seq)
+            self.synced_seq = seq
+            self.value = self._synced_value = value
+            self.flush()
+
+    def catch_up(self, records: Iterable[WALRecord]):
+        """Replay WAL records written after the store was last synced."""
+        removed: List[WALRecord] = []
+        for record in records:
+            if record.seq <= self.seq or record.element is None:
+                continue
+            if removed and (record.operation != "REMOVE_BATCH" or record.value != removed[-1].value):
+                self.apply_removal([r.element for r in removed], removed[-1].value, removed[-1].seq)
+                removed = []
+            if record.operation == "REMOVE_BATCH":
+                removed.append(record)
+            elif record.operation == "REMOVE":
+                self.apply_removal([record.element], record.value, record.seq)
+            else:
+                self.add([], [record.element], record.seq, record.value)
+                if self.flush_due:
+                    self.flush()
+        if removed:
+            self.apply_removal([r.element for r in removed], removed[-1].value, removed[-1].seq)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get(self, key: bytes) -> Optional[Tuple[int, int, int]]:
+        """(prime, witness, seq) for key, witness valid against self.value."""
+        with self._lock:
+            key = key[:KEY_SIZE].ljust(KEY_SIZE, b'\x00')
+            record_no = self._lookup(key)
+            if record_no is None:
+                return None
+            _, prime, witness, seq, live = self._read(record_no)
+            if not live:
+                return None
+            if self._pending and seq < self._pending[-1][0]:
+                witness = self._catch_up(witness, seq)
+            return prime, witness, self.seq
+
+    def __contains__(self, key: bytes) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.keys())
+
+    def keys(self) -> Iterator[bytes]:
+        """Scar hashes of live members, in insertion order."""
+        for record_no in range(self.count):
+            key, _, _, _, live = self._read(record_no)
+            if live:
+                yield key
+
+    def close(self):
+        """Flush and unmap."""
+        self.flush()
+        self._data.close()
+        self._index.close()
+        os.close(self._data_fd)
+        os.close(self._index_fd)
+
+
+def _egcd(a: int, b: int) -> Tuple[int, int, int]:
+    """(g, x, y) with a*x + b*y = g = gcd(a, b)."""
+    x0, y0, x1, y1 = 1, 0, 0, 1
+    while b:
+        q, a, b = a // b, b, a % b
+        x0, x1 = x1, x0 - q * x1
+        y0, y1 = y1, y0 - q * y1
+    return a, x0, y0
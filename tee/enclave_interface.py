@@ -3,8 +3,9 @@ Interface to TEE (Trusted Execution Environment).
 Supports soft-mode for development.
 """
 
+import os
 import warnings
-from typing import Dict
+from typing import Dict, Optional
 
 
 class AccumulatorEnclave:
@@ -24,16 +25,27 @@ class AccumulatorEnclave:
         # For tests return False
         return False
         
-    def create_accumulator(self) -> Dict:
-        """Create new accumulator."""
+    def create_accumulator(self, key_size: int = 2048, params_file: Optional[str] = None) -> Dict:
+        """
+        Create new accumulator.
+        In soft mode, parameters are loaded from params_file when it exists
+        (and saved there after generation), so N is generated only once.
+        """
         if self.soft_mode:
-            # Generate locally (INSECURE!)
-            from Crypto.PublicKey import RSA
-            key = RSA.generate(2048)
+            from accumulator.params import AccumulatorParams, generate_params
+            if params_file and os.path.exists(params_file):
+                params = AccumulatorParams.load(params_file)
+            else:
+                # Generate locally (INSECURE!)
+                params = generate_params(key_size)
+                if params_file:
+                    params.save(params_file)
             return {
-                'N': key.n,
-                'g': 65537,
-                'phi': (key.p - 1) * (key.q - 1),
+                'N': params.N,
+                'g': params.g,
+                'phi': params.phi,
+                'p': params.p,
+                'q': params.q,
                 'attestation': 'SOFT_MODE_NO_ATTESTATION'
             }
         else:
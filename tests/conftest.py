@@ -0,0 +1,12 @@
+"""
+Shared test configuration.
+"""
+
+import os
+import tempfile
+
+from accumulator.params import POOL_ENV
+
+# Draw accumulator moduli from a reusable pool instead of generating one
+# per test (dev/test only, see accumulator.params)
+os.environ.setdefault(POOL_ENV, os.path.join(tempfile.gettempdir(), "scm-param-pool"))
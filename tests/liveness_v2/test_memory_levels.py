@@ -233,3 +233,202 @@ def test_no_data_loss():
     
     # Check that all source hashes are preserved
     assert set(cluster.source_scar_ids) == set(scar_ids)
+
+
+def _cluster(cluster_id: str, centroid: np.ndarray) -> SemanticCluster:
+    return SemanticCluster(
+        cluster_id=cluster_id,
+        centroid=centroid,
+        source_hashes=[],
+        source_scar_ids=[],
+        avg_entropy=0.5,
+        avg_drift=0.1,
+        dominant_basis="ru",
+        dominant_type="rejection",
+        count=3
+    )
+
+
+def test_find_similar_semantic_matches_exact_cosine():
+    """Vectorized search returns the clusters above threshold, best first"""
+    rng = np.random.default_rng(7)
+    memory = HierarchicalMemory(":memory:")
+    centroids = rng.standard_normal((3000, 128))
+    for i, centroid in enumerate(centroids):
+        memory.add_semantic(_cluster(f"c{i}", centroid))
+
+    query = centroids[42] + 0.3 * rng.standard_normal(128)
+    sims = centroids @ query / (np.linalg.norm(centroids, axis=1) * np.linalg.norm(query))
+    expected = [f"c{i}" for i in np.argsort(-sims) if sims[i] > 0.2]
+    assert expected and expected[0] == "c42"
+
+    found = memory.find_similar_semantic(query, threshold=0.2)
+    assert [c.cluster_id for c in found] == expected
+    top = memory.find_similar_semantic(query, threshold=-1.0, top_k=5)
+    assert [c.cluster_id for c in top] == [f"c{i}" for i in np.argsort(-sims)[:5]]
+
+    # Overwrite, remove and direct dict changes keep the matrix in sync
+    memory.add_semantic(_cluster("c42", -centroids[42]))
+    assert "c42" not in [c.cluster_id for c in memory.find_similar_semantic(query, threshold=0.2)]
+    memory.remove_semantic("c0")
+    assert len(memory.centroids) == len(memory.semantic) == 2999
+    del memory.semantic["c1"]
+    assert all(c.cluster_id != "c1" for c in memory.find_similar_semantic(centroids[1], threshold=0.9))
+    # Same-size changes are caught too
+    memory.semantic["c2"] = _cluster("c2", -centroids[2])
+    assert "c2" not in [c.cluster_id for c in memory.find_similar_semantic(centroids[2], threshold=0.9)]
+    memory.semantic = {"c3": _cluster("c3", centroids[3])}
+    assert [c.cluster_id for c in memory.find_similar_semantic(centroids[3], threshold=0.9)] == ["c3"]
+
+
+def test_ivfpq_index_recall_updates_and_persistence(tmp_path):
+    """The ANN index finds the exact neighbours, tracks removals and reloads"""
+    rng = np.random.default_rng(3)
+    path = str(tmp_path / "memory.db")
+    memory = HierarchicalMemory(path, index_type="ivfpq", train_size=1000)
+    centres = rng.standard_normal((40, 128))
+    embeddings = centres[rng.integers(0, 40, 3000)] + 0.5 * rng.standard_normal((3000, 128))
+    for i, embedding in enumerate(embeddings):
+        memory.add_semantic(_cluster(f"c{i}", embedding))
+    # Adds never train; the maintenance step does
+    assert not memory.semantic_index.trained and memory.semantic_index.needs_training
+    memory.train_indexes()
+    assert memory.semantic_index.trained and len(memory.semantic_index) == 3000
+    assert not memory.semantic_index.needs_training
+    with pytest.raises(ValueError, match="train_size"):
+        HierarchicalMemory(path, index_type="ivfpq", train_size=100)
+
+    queries = centres[:10] + 0.5 * rng.standard_normal((10, 128))
+    exact = [memory.find_similar_semantic(q, threshold=-1.0)[:10] for q in queries]
+    approx = [memory.find_similar_semantic(q, threshold=-1.0, top_k=10) for q in queries]
+    found = sum(len({c.cluster_id for c in a} & {c.cluster_id for c in e}) for a, e in zip(approx, exact))
+    assert found / 100 >= 0.9
+
+    best = exact[0][0].cluster_id
+    memory.remove_semantic(best)
+    assert best not in [c.cluster_id for c in memory.find_similar_semantic(queries[0], -1.0, top_k=10)]
+
+    memory.save()
+    reloaded = HierarchicalMemory(path, index_type="ivfpq", train_size=1000)
+    reloaded.load()
+    assert reloaded.semantic_index.trained and len(reloaded.semantic_index) == 2999
+    assert [c.cluster_id for c in reloaded.find_similar_semantic(queries[1], -1.0, top_k=10)] == \
+        [c.cluster_id for c in memory.find_similar_semantic(queries[1], -1.0, top_k=10)]
+
+    # A direct dict change rebuilds the index on the next query, untrained
+    reloaded.semantic.pop("c0", None)
+    reloaded.semantic.pop("c1", None)
+    results = reloaded.find_similar_semantic(queries[2], -1.0, top_k=10)
+    assert not reloaded.semantic_index.trained and reloaded.semantic_index.needs_training
+    assert results == reloaded.find_similar_semantic(queries[2], -1.0)[:10]
+    reloaded.train_indexes()
+    assert reloaded.semantic_index.trained and len(reloaded.semantic_index) == len(reloaded.semantic)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_find_similar_semantic_batch_matches_single_queries(workers):
+    """Batch results equal per-query results, chunked or not"""
+    rng = np.random.default_rng(11)
+    memory = HierarchicalMemory(":memory:")
+    centroids = rng.standard_normal((500, 128))
+    for i, centroid in enumerate(centroids):
+        memory.add_semantic(_cluster(f"c{i}", centroid))
+    queries = centroids[:40] + 0.8 * rng.standard_normal((40, 128))
+    queries[3] = 0  # a zero query matches nothing above threshold 0
+
+    for threshold, top_k in ((0.2, None), (0.0, 5)):
+        batch = memory.centroids.search_batch(queries, threshold, top_k, chunk_bytes=4 * 500 * 7, workers=workers)
+        assert len(batch) == 40 and batch.rows.dtype == np.int64 and batch.scores.dtype == np.float32
+        for i, query in enumerate(queries):
+            rows, scores = batch.matches(i)
+            expected = memory.find_similar_semantic(query, threshold, top_k)
+            assert [memory.centroids.ids[row] for row in rows] == [c.cluster_id for c in expected]
+            assert np.all(np.diff(scores) <= 0)
+        assert batch.matches(3)[0].size == 0
+
+    batch = memory.find_similar_semantic_batch(queries, threshold=0.2, top_k=3)
+    assert batch.offsets[-1] == len(batch.rows) <= 3 * 40
+
+
+def test_columnar_episodic_store(tmp_path):
+    """Views behave like EpisodicScar, write through, survive deletes and reloads"""
+    memory = HierarchicalMemory(str(tmp_path / "memory.db"))
+    scars = []
+    for i in range(50):
+        scar = EpisodicScar(
+            scar_id=f"s{i}",
+            scar_hash=f"hash_{i}",
+            incident_type="rejection" if i % 2 else "timeout",
+            cognitive_basis="ru",
+            entropy_score=0.1 * i,
+            ontological_drift=-0.2,
+            deformation_vector={"i": i},
+            embedding=np.random.randn(128),
+            created_at=datetime.utcnow() - timedelta(hours=i),
+            last_accessed=None if i % 3 else datetime.utcnow()
+        )
+        memory.add_episodic(scar)
+        scars.append(scar)
+
+    view = memory.episodic["s7"]
+    original = scars[7]
+    assert view.created_at == original.created_at and view.last_accessed == original.last_accessed
+    assert (view.incident_type, view.deformation_vector, view.entropy_score) == ("rejection", {"i": 7}, original.entropy_score)
+    assert np.allclose(view.embedding, original.embedding, atol=1e-6)
+    assert view.salience == pytest.approx(original.salience)
+    assert np.allclose(memory.episodic.salience(), [memory.episodic[sid].salience for sid in memory.episodic])
+
+    view.access_count += 1
+    assert memory.episodic["s7"].access_count == 1
+
+    # Deleting moves the last row into the gap; views follow their scar
+    last = memory.episodic["s49"]
+    del memory.episodic["s3"]
+    assert "s3" not in memory.episodic and len(memory.episodic) == 49
+    assert last.scar_hash == "hash_49" and last.entropy_score == scars[49].entropy_score
+    assert memory.episodic.object_column("scar_hash")[memory.episodic.row("s49")] == "hash_49"
+
+    old = {s.scar_id for s in memory.get_episodic_for_consolidation(max_age_hours=39.5)}
+    assert old == {f"s{i}" for i in range(40, 50)}
+
+    memory.save()
+    reloaded = HierarchicalMemory(memory.storage_path)
+    reloaded.load()
+    assert set(reloaded.episodic) == set(memory.episodic)
+    assert reloaded.episodic["s7"].to_dict() == memory.episodic["s7"].to_dict()
+
+
+def test_time_index_under_archival_deletes():
+    """Age selection matches a full scan through out-of-order adds, retiming and deletes"""
+    rng = np.random.default_rng(5)
+    memory = HierarchicalMemory(":memory:")
+    now = datetime.utcnow()
+    for i in range(3000):
+        memory.add_episodic(EpisodicScar(
+            scar_id=f"s{i}",
+            scar_hash=f"hash_{i}",
+            incident_type="rejection",
+            cognitive_basis="ru",
+            entropy_score=0.5,
+            ontological_drift=0.1,
+            deformation_vector={},
+            embedding=np.zeros(128),
+            created_at=now - timedelta(hours=float(rng.uniform(0, 200)))
+        ))
+    memory.episodic["s0"].created_at = now - timedelta(hours=500)
+
+    def expected(max_age_hours):
+        cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+        return {sid for sid in memory.episodic if memory.episodic[sid].created_at < cutoff}
+
+    for max_age_hours in (150, 72, 10):
+        selected = memory.get_episodic_for_consolidation(max_age_hours)
+        assert {s.scar_id for s in selected} == expected(max_age_hours)
+        times = [s.created_at for s in selected]
+        assert times == sorted(times)
+        # Archive what was selected, like the sleep scheduler does
+        for scar in selected[:len(selected) // 2]:
+            del memory.episodic[scar.scar_id]
+
+    assert {s.scar_id for s in memory.get_episodic_for_consolidation(0)} == set(memory.episodic)
+    assert len(memory.episodic.by_time) == len(memory.episodic)
@@ -6,7 +6,10 @@ import pytest
 import pytest_asyncio
 import hashlib
 import tempfile
+import glob
 import os
+import math
+import asyncio
 
 from accumulator.rsa_accumulator import RSAAccumulator
 from accumulator.incremental_proof import IncrementalChainProof
@@ -23,7 +26,8 @@ async def accumulator():
     yield acc
     
     # Cleanup
-    os.unlink(wal_path)
+    for path in [wal_path] + glob.glob(wal_path + '.*'):
+        os.unlink(path)
 
 
 @pytest.mark.asyncio
@@ -80,4 +84,445 @@ async def test_incremental_chain():
     assert chain.verify_chain() == True
     assert len(chain.proofs) == 10
         
-    os.unlink(wal_path)
+    for path in [wal_path] + glob.glob(wal_path + '.*'):
+        os.unlink(path)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_restart_replays_suffix(tmp_path):
+    """Test that restart restores proofs from snapshot plus WAL suffix."""
+    wal_path = str(tmp_path / "chain.wal")
+    genesis = hashlib.sha256(b"genesis").digest()
+
+    chain = IncrementalChainProof(genesis_hash=genesis, wal_path=wal_path, snapshot_every=4)
+    chain.accumulator.wal.segment_size = 1024
+    await chain.initialize()
+    for i in range(10):
+        await chain.add_scar(hashlib.sha256(f"scar_{i}".encode()).digest())
+
+    snapshot = chain.snapshots.load()
+    # Genesis is seq 1; snapshots were taken at seq 4 and 8
+    assert snapshot.seq == 8
+    # Segments fully covered by the snapshot were retired
+    wal = chain.accumulator.wal
+    assert 1 < wal.segment_base_seq(wal.segments()[0]) <= 9
+    await chain.accumulator.wal.close()
+
+    restarted = IncrementalChainProof(genesis_hash=genesis, wal_path=wal_path, snapshot_every=4)
+    await restarted.initialize()
+
+    assert restarted.accumulator_value == chain.accumulator_value
+    assert restarted.accumulator.current_sequence == 11
+    assert [p.sequence for p in restarted.proofs] == [p.sequence for p in chain.proofs]
+    assert restarted.proofs[-1] == chain.proofs[-1]
+    assert restarted.verify_chain()
+
+
+@pytest.mark.asyncio
+async def test_add_many_matches_sequential_adds(accumulator, monkeypatch):
+    """Test add_many: one exponentiation, one fsync, per-element proofs."""
+    import storage.wal_accumulator as wal_module
+
+    elements = [hashlib.sha256(f"bulk_{i}".encode()).digest() for i in range(8)]
+    start = accumulator.value
+
+    syncs = []
+    real_sync = wal_module._datasync
+    monkeypatch.setattr(wal_module, "_datasync", lambda fd: (syncs.append(fd), real_sync(fd)))
+    # parallel_threshold=1 forces the process-pool path
+    value, proofs = await accumulator.add_many(elements, parallel_threshold=1)
+    await accumulator.close()
+
+    expected = start
+    for element in elements:
+        expected = pow(expected, accumulator._hash_to_prime(element), accumulator.N)
+    assert value == expected == accumulator.value
+    assert len(syncs) == 1
+    assert [p.sequence for p in proofs] == list(range(1, 9))
+    assert all(accumulator.verify(p) and p.accumulator == value for p in proofs)
+
+    records = list(accumulator.wal.iter_records())
+    assert [r.operation for r in records] == ["ADD_BATCH"] * 8
+    assert [r.element for r in records] == [p.element_hash for p in proofs]
+
+
+@pytest.mark.asyncio
+async def test_add_scars_replayed_after_restart(tmp_path):
+    """Test that batch proofs are rebuilt from the WAL on restart."""
+    wal_path = str(tmp_path / "chain.wal")
+    genesis = hashlib.sha256(b"genesis").digest()
+
+    chain = IncrementalChainProof(genesis_hash=genesis, wal_path=wal_path, snapshot_every=100)
+    await chain.initialize()
+    await chain.add_scar(hashlib.sha256(b"single").digest())
+    await chain.add_scars([hashlib.sha256(f"scar_{i}".encode()).digest() for i in range(5)])
+    await chain.add_scars([hashlib.sha256(f"more_{i}".encode()).digest() for i in range(3)])
+    assert chain.verify_chain()
+    await chain.accumulator.close()
+
+    restarted = IncrementalChainProof(genesis_hash=genesis, wal_path=wal_path, snapshot_every=100)
+    await restarted.initialize()
+
+    assert restarted.proofs == chain.proofs
+    assert restarted.verify_chain()
+
+
+@pytest.mark.asyncio
+async def test_batch_verify_rejects_invalid_proof(accumulator):
+    """Test randomized batch verification, including mixed accumulator values."""
+    from concurrent.futures import ThreadPoolExecutor
+    from dataclasses import replace
+
+    elements = [hashlib.sha256(f"element_{i}".encode()).digest() for i in range(12)]
+    proofs = []
+    for element in elements[:4]:
+        value, proof = await accumulator.add(element)
+        proofs.append(proof)
+    value, batch_proofs = await accumulator.add_many(elements[4:])
+    proofs.extend(batch_proofs)
+
+    assert accumulator.batch_verify(proofs)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        assert accumulator.batch_verify(proofs, executor=executor, chunk_size=3)
+
+    tampered = list(proofs)
+    tampered[6] = replace(proofs[6], witness=proofs[6].witness * 2 % accumulator.N)
+    assert not accumulator.batch_verify(tampered)
+    tampered[6] = replace(proofs[6], element_hash=proofs[7].element_hash)
+    assert not accumulator.batch_verify(tampered)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        assert not accumulator.batch_verify(tampered, executor=executor, chunk_size=3)
+
+    # Sign errors are accepted consistently (-w is then a witness) and
+    # cannot cancel out another invalid proof
+    N = accumulator.N
+    signed = [replace(p, witness=N - p.witness) if i in (1, 5) else p for i, p in enumerate(proofs)]
+    assert accumulator.batch_verify(signed)
+    for proof in signed:
+        assert accumulator.verify(proof) and accumulator.batch_verify([proof])
+    for proof in tampered:
+        assert accumulator.verify(proof) == accumulator.batch_verify([proof])
+    signed[6] = replace(proofs[6], witness=proofs[6].witness * 2 % N)
+    assert not accumulator.batch_verify(signed)
+
+
+def test_multi_exp_matches_pow():
+    """Test the bucket multi-exponentiation against independent pows."""
+    from accumulator.batch import multi_exp
+
+    N = 2**127 - 1
+    bases = [3 + 7 * i for i in range(40)]
+    exponents = [(i * 0x9E3779B97F4A7C15) ** 3 for i in range(40)]
+    expected = 1
+    for base, exponent in zip(bases, exponents):
+        expected = expected * pow(base, exponent, N) % N
+    assert multi_exp(bases, exponents, N) == expected
+    assert multi_exp([], [], N) == 1
+
+
+@pytest.mark.asyncio
+async def test_proof_of_exponentiation(tmp_path):
+    """Test Wesolowski transition proofs for batches and for the whole history."""
+    from dataclasses import replace
+    from accumulator.poe import verify_exponentiation
+
+    chain = IncrementalChainProof(
+        genesis_hash=hashlib.sha256(b"genesis").digest(),
+        wal_path=str(tmp_path / "chain.wal"),
+        poe=True
+    )
+    await chain.initialize()
+    await chain.add_scar(hashlib.sha256(b"single").digest())
+    await chain.add_scars([hashlib.sha256(f"scar_{i}".encode()).digest() for i in range(6)])
+    N = chain.accumulator.N
+
+    transition = chain.transitions[-1]
+    primes = [p.element_hash for p in chain.proofs[-6:]]
+    assert transition.sequence == chain.proofs[-6].sequence
+    assert transition.result == chain.accumulator_value
+    assert verify_exponentiation(N, transition, primes)
+    assert not verify_exponentiation(N, transition, primes[:-1] + [primes[0]])
+    assert not verify_exponentiation(N, replace(transition, result=transition.result * 2 % N), primes)
+
+    history = await chain.prove_history()
+    all_primes = [chain.accumulator._hash_to_prime(chain.genesis)] + [p.element_hash for p in chain.proofs]
+    assert history.base == chain.accumulator.g
+    assert verify_exponentiation(N, history, all_primes)
+    assert not verify_exponentiation(N, history, all_primes[1:])
+    await chain.accumulator.close()
+
+
+@pytest.mark.asyncio
+async def test_transitions_survive_restart(tmp_path):
+    """Test that transition proofs are served after a restart, and lost ones are proven again."""
+    from accumulator.poe import verify_exponentiation
+
+    def open_chain():
+        return IncrementalChainProof(
+            genesis_hash=hashlib.sha256(b"genesis").digest(),
+            wal_path=str(tmp_path / "chain.wal"),
+            poe=True
+        )
+
+    chain = open_chain()
+    await chain.initialize()
+    batches = [[hashlib.sha256(f"scar_{b}_{i}".encode()).digest() for i in range(4)] for b in range(3)]
+    proofs = [await chain.add_scars(batch) for batch in batches]
+    await chain.add_scars([])
+    transitions = list(chain.transitions)
+    assert len(transitions) == 3
+    await chain.close()
+
+    restarted = open_chain()
+    await restarted.initialize()
+    assert list(restarted.transitions) == transitions
+    middle = restarted.transitions.find(proofs[1][2].sequence)
+    assert middle == transitions[1]
+    assert verify_exponentiation(restarted.accumulator.N, middle, [p.element_hash for p in proofs[1]])
+    assert restarted.transitions.find(1) is None
+    await restarted.close()
+
+    # A crash before the store reached the disk: proven again from the WAL
+    os.unlink(str(tmp_path / "chain.wal.transitions"))
+    recovered = open_chain()
+    await recovered.initialize()
+    assert list(recovered.transitions) == transitions
+    await recovered.close()
+
+
+@pytest.mark.asyncio
+async def test_remove_many_matches_sequential_removes(accumulator):
+    """Test batched removal with the CRT root against per-element removal."""
+    elements = [hashlib.sha256(f"reorg_{i}".encode()).digest() for i in range(6)]
+    start = accumulator.value
+    value, proofs = await accumulator.add_many(elements)
+
+    after_batch = await accumulator.remove_many(elements[2:])
+    assert after_batch == pow(start, proofs[0].element_hash * proofs[1].element_hash, accumulator.N)
+
+    # Same result through phi alone (no factorization) and one prime at a time
+    accumulator._factors = None
+    assert accumulator._trapdoor_root(value, math.prod(p.element_hash for p in proofs[2:])) == after_batch
+    assert await accumulator.remove(elements[1]) == pow(start, proofs[0].element_hash, accumulator.N)
+
+    records = list(accumulator.wal.iter_records())
+    assert [r.operation for r in records[6:]] == ["REMOVE_BATCH"] * 4 + ["REMOVE"]
+    assert len({r.value for r in records[6:10]}) == 1
+
+
+@pytest.mark.asyncio
+async def test_params_persisted_next_to_wal(tmp_path):
+    """Test that a restart loads N from <wal>.params instead of generating one."""
+    from accumulator.params import AccumulatorParams, params_path
+
+    wal_path = str(tmp_path / "acc.wal")
+    acc = RSAAccumulator(key_size=1024, wal_path=wal_path)
+    assert acc.N is None
+    await acc.initialize()
+    await acc.add(hashlib.sha256(b"element").digest())
+    await acc.close()
+    assert AccumulatorParams.load(params_path(wal_path)).N == acc.N
+
+    restarted = RSAAccumulator(key_size=1024, wal_path=wal_path)
+    assert restarted.N == acc.N and restarted._factors == acc._factors
+    await restarted.initialize()
+    assert restarted.value == acc.value
+    await restarted.close()
+
+    # A WAL without its parameter file cannot get a fresh modulus
+    os.unlink(params_path(wal_path))
+    orphan = RSAAccumulator(key_size=1024, wal_path=wal_path)
+    with pytest.raises(ValueError):
+        await orphan.initialize()
+
+
+@pytest.mark.asyncio
+async def test_prime_scheme_recorded_with_chain(tmp_path):
+    """Test that the hash-to-prime scheme is the chain's, not the caller's."""
+    from dataclasses import replace
+    from accumulator.params import AccumulatorParams, params_path
+    from accumulator.primes import derive_prime
+
+    wal_path = str(tmp_path / "acc.wal")
+    acc = RSAAccumulator(key_size=1024, wal_path=wal_path)
+    await acc.initialize()
+    element = hashlib.sha256(b"before upgrade").digest()
+    await acc.add(element)
+    await acc.close()
+    assert AccumulatorParams.load(params_path(wal_path)).prime_scheme == "nonce"
+
+    with pytest.raises(ValueError):
+        await RSAAccumulator(key_size=1024, wal_path=wal_path, prime_scheme="scan").initialize()
+
+    # Parameters written before the scheme was recorded: the chain used "scan"
+    legacy_path = str(tmp_path / "legacy.wal")
+    params = replace(AccumulatorParams.load(params_path(wal_path)), prime_scheme=None)
+    params.save(params_path(legacy_path))
+    legacy = RSAAccumulator(key_size=1024, wal_path=legacy_path)
+    await legacy.initialize()
+    assert legacy.primes.scheme == "nonce"  # empty WAL: a new chain
+    legacy.primes = type(legacy.primes)(scheme="scan")
+    await legacy.add(element)
+    await legacy.close()
+    params.save(params_path(legacy_path))
+
+    reopened = RSAAccumulator(key_size=1024, wal_path=legacy_path)
+    await reopened.initialize()
+    assert reopened.primes.scheme == "scan"
+    assert reopened._hash_to_prime(element) == derive_prime(element, "scan")
+    await reopened.remove(element)
+    assert reopened.value == reopened.g
+    await reopened.close()
+    assert AccumulatorParams.load(params_path(legacy_path)).prime_scheme == "scan"
+    with pytest.raises(ValueError):
+        await RSAAccumulator(key_size=1024, wal_path=legacy_path, prime_scheme="nonce").initialize()
+
+
+@pytest.mark.asyncio
+async def test_params_from_enclave(tmp_path):
+    """Test soft-mode enclave parameters, generated once and then reloaded."""
+    import warnings
+    from accumulator.params import ParamPool
+    from tee.enclave_interface import AccumulatorEnclave
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        enclave = AccumulatorEnclave()
+
+    # Seed the enclave's parameter file from the dev pool to skip keygen
+    pooled = ParamPool.from_env(1024).take()
+    params_file = str(tmp_path / "enclave.params")
+    pooled.save(params_file)
+    created = enclave.create_accumulator(key_size=1024, params_file=params_file)
+    assert created['N'] == pooled.N and created['phi'] == pooled.phi
+
+    class FileEnclave:
+        def create_accumulator(self):
+            return enclave.create_accumulator(key_size=1024, params_file=params_file)
+
+    acc = RSAAccumulator(key_size=1024, wal_path=str(tmp_path / "acc.wal"), enclave=FileEnclave())
+    await acc.initialize()
+    assert acc.N == pooled.N
+    element = hashlib.sha256(b"element").digest()
+    start = acc.value
+    await acc.add(element)
+    assert await acc.remove(element) == start
+    await acc.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("math_executor", ["thread", "process"])
+async def test_offloaded_math_keeps_wal_order(tmp_path, math_executor):
+    """Test concurrent adds with the math in an executor: WAL order matches values."""
+    from orchestrator.loop_monitor import LoopLagMonitor
+
+    acc = RSAAccumulator(
+        key_size=1024,
+        wal_path=str(tmp_path / "acc.wal"),
+        group_commit=True,
+        math_executor=math_executor
+    )
+    await acc.initialize()
+    monitor = LoopLagMonitor(interval=0.001)
+    monitor.start()
+
+    elements = [hashlib.sha256(f"offload_{i}".encode()).digest() for i in range(12)]
+    results = await asyncio.gather(*(acc.add(e) for e in elements))
+    await acc.add_many([hashlib.sha256(b"batch").digest()])
+    before = acc.value
+    removed = await acc.remove(elements[0])
+    assert pow(removed, acc._hash_to_prime(elements[0]), acc.N) == before
+
+    previous = acc.g
+    for record in acc.wal.iter_records():
+        if record.operation in ("ADD", "ADD_BATCH"):
+            assert pow(previous, record.element, acc.N) == record.value
+        previous = record.value
+    assert previous == acc.value
+    assert all(acc.verify(proof) for _, proof in results)
+
+    await monitor.stop()
+    assert monitor.stats()["samples"] > 0
+    await acc.close()
+
+
+@pytest.mark.asyncio
+async def test_integrator_runs_lag_monitor(tmp_path):
+    """Test that the integrator starts and stops its lag monitor."""
+    from orchestrator.cognitive_integrator import CognitiveIntegrator
+    from orchestrator.loop_monitor import LoopLagMonitor
+
+    chain = IncrementalChainProof(genesis_hash=hashlib.sha256(b"genesis").digest(),
+                                  wal_path=str(tmp_path / "chain.wal"))
+    await chain.initialize()
+    monitor = LoopLagMonitor(interval=0.001)
+    async with CognitiveIntegrator(chain, "genesis", lag_monitor=monitor) as integrator:
+        assert monitor._task is not None
+        await asyncio.sleep(0.02)
+    assert monitor._task is None
+    assert integrator.get_loop_lag()["samples"] > 0
+    await chain.close()
+
+
+@pytest.mark.asyncio
+async def test_follower_tails_writer_wal(tmp_path):
+    """Test a read replica catching up from the writer's WAL and parameter file."""
+    from accumulator.follower import AccumulatorFollower
+
+    wal_path = str(tmp_path / "acc.wal")
+    writer = RSAAccumulator(key_size=1024, wal_path=wal_path, group_commit=True)
+    await writer.initialize()
+    follower = AccumulatorFollower(wal_path, poll_interval=0.01)
+    assert follower.N == writer.N and follower.staleness == float("inf")
+
+    _, proof = await writer.add(hashlib.sha256(b"first").digest())
+    assert follower.catch_up() == 1
+    assert follower.verify_chain(proof) and follower.status()["seq"] == 1
+
+    _, proofs = await writer.add_many([hashlib.sha256(f"b{i}".encode()).digest() for i in range(5)])
+    assert not follower.verify_chain(proofs[-1])
+    assert await follower.verify_chain_fresh(proofs[-1], max_staleness=0)
+    assert follower.seq == writer.current_sequence == 6
+
+    follower.start()
+    await writer.remove(hashlib.sha256(b"first").digest())
+    for _ in range(200):
+        if follower.seq == 7:
+            break
+        await asyncio.sleep(0.01)
+    assert follower.value == writer.value
+    await follower.stop()
+    await writer.close()
+
+
+@pytest.mark.asyncio
+async def test_explicit_params_keep_recorded_prime_scheme(tmp_path):
+    """Test a restart with explicit params (no scheme) followed by a removal."""
+    from dataclasses import replace
+    from accumulator.params import AccumulatorParams, params_path
+
+    seed = RSAAccumulator(key_size=1024, wal_path=str(tmp_path / "seed.wal"))
+    await seed.initialize()
+    await seed.close()
+    params = replace(AccumulatorParams.load(params_path(str(tmp_path / "seed.wal"))), prime_scheme=None)
+
+    kwargs = dict(genesis_hash=hashlib.sha256(b"genesis").digest(),
+                  wal_path=str(tmp_path / "chain.wal"), params=params)
+    chain = IncrementalChainProof(**kwargs)
+    await chain.initialize()
+    after_genesis = chain.accumulator_value
+    scars = [hashlib.sha256(f"explicit_{i}".encode()).digest() for i in range(3)]
+    await chain.add_scars(scars)
+    await chain.close()
+
+    restarted = IncrementalChainProof(**kwargs)
+    await restarted.initialize()
+    assert restarted.accumulator.primes.scheme == "nonce"
+    await restarted.remove_scars(scars)
+    assert restarted.accumulator_value == after_genesis
+    await restarted.close()
+    assert AccumulatorParams.load(params_path(kwargs["wal_path"])).prime_scheme == "nonce"
+
+    other = replace(params, N=params.N + 2, p=None, q=None, phi=None)
+    with pytest.raises(ValueError, match="modulus"):
+        IncrementalChainProof(**{**kwargs, "params": other})
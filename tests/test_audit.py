@@ -0,0 +1,108 @@
+"""
+Tests for the streaming chain auditor.
+"""
+
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from accumulator.audit import AuditCheckpoint, ChainAuditor
+from accumulator.incremental_proof import IncrementalChainProof
+from storage.wal_accumulator import WALTailer
+from storage.wal_format import SEGMENT_HEADER, encode_commit, encode_record
+
+
+GENESIS = hashlib.sha256(b"genesis").digest()
+
+
+def scar(i) -> bytes:
+    return hashlib.sha256(f"scar_{i}".encode()).digest()
+
+
+async def build_chain(tmp_path, count: int = 40):
+    """Genesis, single adds, batches and one removal; returns (wal path, scar hashes)."""
+    wal_path = str(tmp_path / "chain.wal")
+    chain = IncrementalChainProof(genesis_hash=GENESIS, wal_path=wal_path)
+    await chain.initialize()
+    for i in range(0, 10):
+        await chain.add_scar(scar(i))
+    await chain.add_scars([scar(i) for i in range(10, count)])
+    await chain.accumulator.remove(scar(3))
+    await chain.close()
+    return wal_path, [scar(i) for i in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_audit_verifies_and_resumes(tmp_path):
+    """Test a clean chain, then resuming from the checkpoint after more scars."""
+    wal_path, scars = await build_chain(tmp_path)
+    checkpoint = str(tmp_path / "chain.wal.audit")
+    with ThreadPoolExecutor(4) as pool:
+        result = ChainAuditor(wal_path, scars=scars, genesis=GENESIS, chunk_size=8,
+                              checkpoint_path=checkpoint).run(pool)
+        assert result.ok and result.verified_seq == 42 and result.records == 42
+        assert AuditCheckpoint.load(checkpoint).scars == 41
+
+        chain = IncrementalChainProof(genesis_hash=GENESIS, wal_path=wal_path)
+        await chain.initialize()
+        await chain.add_scar(scar(99))
+        await chain.close()
+
+        resumed = ChainAuditor(wal_path, scars=scars + [scar(99)], genesis=GENESIS, chunk_size=8,
+                               checkpoint_path=checkpoint).run(pool)
+        assert resumed.ok and resumed.start_seq == 43 and resumed.records == 1
+
+
+@pytest.mark.asyncio
+async def test_audit_reports_first_divergence(tmp_path):
+    """Test a tampered record, a wrong scar source and a wrong genesis."""
+    wal_path, scars = await build_chain(tmp_path)
+    with ThreadPoolExecutor(4) as pool:
+        wrong = scars[:20] + [scar(1000)] + scars[21:]
+        result = ChainAuditor(wal_path, scars=wrong, genesis=GENESIS, chunk_size=8).run(pool)
+        assert result.divergence.seq == 22 and "scar" in result.divergence.reason
+        assert result.verified_seq <= 21
+
+        bad_genesis = ChainAuditor(wal_path, genesis=scar(7), chunk_size=8).run(pool)
+        assert bad_genesis.divergence.seq == 1
+
+        # Rewrite record 6 with a different value (valid checksum, wrong math)
+        auditor = ChainAuditor(wal_path, chunk_size=8)
+        width = (auditor.N.bit_length() + 7) // 8
+        segment = f"{wal_path}.000001"
+        records = WALTailer(wal_path).poll()
+        forged = records[5].__class__(**{**records[5].__dict__, "value": records[5].value + 1})
+        with open(segment, 'r+b') as f:
+            f.seek(f.read().index(encode_record(records[5], width)))
+            f.write(encode_record(forged, width))
+        result = auditor.run(pool)
+        assert result.divergence.seq == 6
+
+
+@pytest.mark.asyncio
+async def test_audit_derives_primes_for_migrated_records(tmp_path):
+    """Test adds logged without an element (text WAL migration) against the scar source."""
+    wal_path, scars = await build_chain(tmp_path)
+    auditor = ChainAuditor(wal_path, chunk_size=8)
+    assert auditor.prime_scheme == "nonce"
+    width = (auditor.N.bit_length() + 7) // 8
+    segment = f"{wal_path}.000001"
+    records = WALTailer(wal_path).poll()
+    with open(segment, 'r+b') as f:
+        f.truncate(SEGMENT_HEADER.size)
+        f.seek(SEGMENT_HEADER.size)
+        for record in records:
+            if record.operation.startswith("ADD"):
+                record = record.__class__(**{**record.__dict__, "element": None})
+            data = encode_record(record, width)
+            f.write(data + encode_commit(1, len(data)))
+
+    with ThreadPoolExecutor(4) as pool:
+        result = ChainAuditor(wal_path, scars=scars, genesis=GENESIS, chunk_size=8).run(pool)
+        assert result.ok and result.verified_seq == 42
+
+        # Without a scar source there is nothing to check the adds against
+        result = ChainAuditor(wal_path, chunk_size=8).run(pool)
+        assert result.divergence.seq == 1 and "scar hash" in result.divergence.reason
@@ -0,0 +1,93 @@
+"""
+Tests for the read-replica accumulator follower.
+"""
+
+import glob
+import os
+
+import pytest
+
+from accumulator.follower import AccumulatorFollower
+from accumulator.params import AccumulatorParams
+from storage.wal_accumulator import AccumulatorWAL, read_durable_seq
+from storage.wal_format import WALRecord, encode_record
+
+
+PARAMS = AccumulatorParams(N=2 ** 127 - 1)
+
+
+async def open_writer(path: str) -> AccumulatorWAL:
+    wal = AccumulatorWAL(path)
+    await wal.initialize_cache()
+    return wal
+
+
+@pytest.mark.asyncio
+async def test_follower_skips_unsynced_write_lost_in_crash(tmp_path):
+    """Test that a write the writer never fsynced is not applied, and repair is followed."""
+    path = str(tmp_path / "chain.wal")
+    writer = await open_writer(path)
+    for value in (11, 12, 13):
+        await writer.append("ADD", value, f"scar{value}")
+    follower = AccumulatorFollower(path, params=PARAMS)
+    assert follower.catch_up() == 3
+    assert (follower.seq, follower.value) == (3, 13)
+
+    # Written to the page cache, then the writer dies before its fsync
+    record = encode_record(WALRecord(4, "ADD", 14, 0, "scar14"), writer.value_width)
+    start = writer._offset
+    writer._write(record, 4, 1)
+    assert read_durable_seq(path) == 3
+    assert follower.catch_up() == 0
+    assert (follower.seq, follower.value) == (3, 13)
+    assert follower.staleness < 1.0
+    writer._close_fd()
+    # ...and the write did not survive the crash
+    with open(f"{path}.000001", "r+b") as f:
+        f.seek(start)
+        f.write(b"\0" * 16)
+
+    restarted = await open_writer(path)
+    assert restarted.current_seq == 3
+    await restarted.append("ADD", 24, "scar24")
+    assert follower.catch_up() == 1
+    assert (follower.seq, follower.value) == (4, 24)
+    assert follower.status()["durable_seq"] == 4
+    await restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_follower_resyncs_after_log_is_replaced(tmp_path):
+    """Test that a shorter or rewritten log is re-synced instead of trusted."""
+    path = str(tmp_path / "chain.wal")
+    writer = await open_writer(path)
+    for value in range(1, 6):
+        await writer.append("ADD", value, f"scar{value}")
+    await writer.close()
+    follower = AccumulatorFollower(path, params=PARAMS)
+    follower.catch_up()
+    assert (follower.seq, follower.value) == (5, 5)
+
+    def replace_log():
+        for segment in glob.glob(f"{path}.0*"):
+            os.unlink(segment)
+        os.unlink(f"{path}.durable")
+
+    # Shorter than what was applied
+    replace_log()
+    writer = await open_writer(path)
+    for value in (21, 22):
+        await writer.append("ADD", value, f"scar{value}")
+    follower.catch_up()
+    assert (follower.seq, follower.value) == (2, 22)
+    await writer.close()
+
+    # Longer again, but not a continuation of it
+    replace_log()
+    writer = await open_writer(path)
+    for value in range(31, 37):
+        await writer.append("ADD", value, f"scar{value}")
+    follower.catch_up()
+    assert (follower.seq, follower.value) == (6, 36)
+    assert follower.staleness < 1.0
+    await writer.close()
@@ -0,0 +1,141 @@
+"""
+Tests for the Merkle mountain range over scar hashes.
+"""
+
+import hashlib
+
+import pytest
+
+from accumulator.incremental_proof import IncrementalChainProof
+from accumulator.mmr import (
+    MerkleMountainRange,
+    mmr_size,
+    verify_consistency,
+    verify_inclusion,
+    verify_range,
+)
+
+
+def scar(i) -> bytes:
+    return hashlib.sha256(f"scar_{i}".encode()).digest()
+
+
+def test_inclusion_proofs_for_every_size(tmp_path):
+    """Test inclusion of every leaf against every historical root."""
+    mmr = MerkleMountainRange(str(tmp_path / "history"))
+    for size in range(1, 20):
+        mmr.append(scar(size - 1))
+        assert mmr_size(size) * 32 == (tmp_path / "history.nodes").stat().st_size
+        root = mmr.root()
+        for i in range(size):
+            proof = mmr.inclusion_proof(i)
+            assert len(proof) <= 2 * size.bit_length()
+            assert verify_inclusion(root, size, i, scar(i), proof)
+            assert not verify_inclusion(root, size, i, scar(i + 1), proof)
+    mmr.close()
+
+
+def test_range_and_consistency_proofs(tmp_path):
+    """Test range proofs and consistency between two sizes."""
+    mmr = MerkleMountainRange(str(tmp_path / "history"))
+    mmr.extend([scar(i) for i in range(37)])
+    root = mmr.root()
+
+    for start, end in [(0, 37), (3, 9), (16, 32), (36, 37)]:
+        proof = mmr.range_proof(start, end)
+        leaves = [scar(i) for i in range(start, end)]
+        assert verify_range(root, 37, start, leaves, proof)
+        assert not verify_range(root, 37, start + 1, leaves[:-1] + [scar(99)], proof)
+
+    for old_size in (1, 5, 16, 30, 37):
+        proof = mmr.consistency_proof(old_size)
+        assert verify_consistency(mmr.root(old_size), old_size, root, 37, proof)
+        assert not verify_consistency(mmr.root(old_size), old_size, mmr.root(36), 36, proof)
+
+
+def test_peaks_persist_and_torn_tail_is_dropped(tmp_path):
+    """Test reopening from the checkpoint and from a partial node file."""
+    path = str(tmp_path / "history")
+    mmr = MerkleMountainRange(path)
+    mmr.extend([scar(i) for i in range(11)])
+    root = mmr.root()
+    mmr.close()
+
+    reopened = MerkleMountainRange(path)
+    assert len(reopened) == 11
+    assert reopened.root() == root
+
+    # A crash part way through appending leaves half a node
+    with open(f"{path}.nodes", "ab") as f:
+        f.write(b"\x00" * 40)
+    reopened.close()
+    recovered = MerkleMountainRange(path)
+    assert recovered.root() == root
+    recovered.close()
+
+
+@pytest.mark.asyncio
+async def test_chain_maintains_mmr(tmp_path):
+    """Test that the chain appends every scar, genesis first."""
+    genesis = hashlib.sha256(b"genesis").digest()
+    chain = IncrementalChainProof(
+        genesis_hash=genesis,
+        wal_path=str(tmp_path / "chain.wal"),
+        mmr_path=str(tmp_path / "chain.mmr")
+    )
+    await chain.initialize()
+    await chain.add_scar(scar(0))
+    await chain.add_scars([scar(i) for i in range(1, 6)])
+
+    history = chain.history
+    assert len(history) == 7
+    root = history.root()
+    assert verify_inclusion(root, 7, 0, genesis, history.inclusion_proof(0))
+    assert verify_range(root, 7, 2, [scar(1), scar(2)], history.range_proof(2, 4))
+    await chain.close()
+
+
+@pytest.mark.asyncio
+async def test_chain_checks_mmr_against_wal(tmp_path):
+    """Test leaves lost in a crash, and an MMR enabled on an existing chain."""
+    genesis = hashlib.sha256(b"genesis").digest()
+    wal_path, mmr_path = str(tmp_path / "chain.wal"), str(tmp_path / "chain.mmr")
+    scars = [genesis] + [scar(i) for i in range(8)]
+
+    chain = IncrementalChainProof(genesis_hash=genesis, wal_path=wal_path)
+    await chain.initialize()
+    await chain.add_scars(scars[1:4])
+    await chain.close()
+
+    # Scars added before the MMR existed cannot be recovered from the WAL
+    chain = IncrementalChainProof(genesis_hash=genesis, wal_path=wal_path, mmr_path=mmr_path)
+    with pytest.raises(ValueError, match="history_scars"):
+        await chain.initialize()
+    await chain.accumulator.close()
+    chain = IncrementalChainProof(genesis_hash=genesis, wal_path=wal_path, mmr_path=mmr_path)
+    await chain.initialize(history_scars=scars)
+    assert len(chain.history) == 4
+    await chain.add_scar(scars[4])
+    await chain.close()
+
+    # Crash after more scars: the unflushed MMR tail is lost, the WAL is not
+    chain = IncrementalChainProof(genesis_hash=genesis, wal_path=wal_path, mmr_path=mmr_path)
+    await chain.initialize()
+    await chain.add_scars(scars[5:])
+    root = chain.history.root()
+    chain.history.truncate(5)
+    await chain.accumulator.close()
+
+    chain = IncrementalChainProof(genesis_hash=genesis, wal_path=wal_path, mmr_path=mmr_path)
+    with pytest.raises(ValueError, match="4 leaves behind"):
+        await chain.initialize()
+    await chain.accumulator.close()
+    wrong = scars[:6] + [scar(100)] + scars[7:]
+    chain = IncrementalChainProof(genesis_hash=genesis, wal_path=wal_path, mmr_path=mmr_path)
+    with pytest.raises(ValueError, match="do not match"):
+        await chain.initialize(history_scars=wrong)
+    await chain.accumulator.close()
+    chain = IncrementalChainProof(genesis_hash=genesis, wal_path=wal_path, mmr_path=mmr_path)
+    await chain.initialize(history_scars=scars)
+    assert len(chain.history) == 9 and chain.history.root() == root
+    await chain.close()
@@ -0,0 +1,77 @@
+"""
+Tests for the exponentiation backends.
+"""
+
+import hashlib
+import random
+
+import pytest
+
+from accumulator.modexp import BACKENDS, FixedBaseBackend, get_backend
+from accumulator.rsa_accumulator import RSAAccumulator
+
+
+N = (2**127 - 1) * (2**89 - 1)
+
+
+@pytest.mark.parametrize("name", sorted(BACKENDS))
+def test_backends_match_pow(name):
+    """Test every backend against builtin pow, including inverses and long exponents."""
+    rng = random.Random(name)
+    backend = get_backend(name, N)
+    base = rng.randrange(2, N)
+    for _ in range(5):
+        exponent = rng.getrandbits(256) | 1
+        assert backend.pow(base, exponent) == pow(base, exponent, N)
+    assert backend.pow(base, 2**300 + 7) == pow(base, 2**300 + 7, N)
+    assert backend.pow(base, -3) == pow(base, -3, N)
+    assert backend.pow(base, 0) == 1
+
+
+def test_montgomery_without_gmpy2_warns_once(monkeypatch, caplog):
+    """Test that the pow() fallback of the montgomery backend is logged, once."""
+    from accumulator.modexp import MontgomeryBackend
+    import accumulator.modexp as modexp
+
+    monkeypatch.setattr(modexp, "gmpy2", None)
+    monkeypatch.setattr(MontgomeryBackend, "available", False)
+    monkeypatch.setattr(MontgomeryBackend, "_warned", False)
+    with caplog.at_level("WARNING", logger="accumulator.modexp"):
+        backends = [get_backend("montgomery", N) for _ in range(3)]
+    assert sum("gmpy2" in record.message for record in caplog.records) == 1
+    assert backends[0].pow(3, 65537) == pow(3, 65537, N)
+
+
+def test_fixed_base_tables_are_built_for_hot_bases():
+    """Test hotness tracking, LRU eviction and rebinding to a new modulus."""
+    backend = FixedBaseBackend(N, max_tables=2, hot_after=2)
+    backend.pow(3, 12345)
+    assert 3 not in backend._tables
+    backend.pow(3, 54321)
+    assert 3 in backend._tables
+
+    backend.precompute(5)
+    backend.precompute(7)
+    assert list(backend._tables) == [5, 7]
+    assert backend.pow(7, 2**255 + 1) == pow(7, 2**255 + 1, N)
+
+    backend.bind(2**61 - 1)
+    assert not backend._tables
+    assert backend.pow(7, 99) == pow(7, 99, 2**61 - 1)
+
+
+@pytest.mark.asyncio
+async def test_accumulator_with_fixed_base_backend(tmp_path):
+    """Test add, verify and remove through a pluggable backend."""
+    acc = RSAAccumulator(key_size=1024, wal_path=str(tmp_path / "acc.wal"), backend="fixed-base")
+    await acc.initialize()
+    assert acc.backend.N == acc.N
+
+    element = hashlib.sha256(b"element").digest()
+    before = acc.value
+    value, proof = await acc.add(element)
+    acc.backend.precompute(proof.witness)
+    for _ in range(3):
+        assert acc.verify(proof)
+    assert await acc.remove(element) == before
+    await acc.close()
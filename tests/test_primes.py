@@ -0,0 +1,67 @@
+"""
+Tests for hash-to-prime derivation.
+"""
+
+import hashlib
+
+from Crypto.Util import number
+
+from accumulator.primes import (
+    PrimeDeriver,
+    derive_prime,
+    is_probable_prime,
+    is_strong_probable_prime,
+)
+
+
+def _legacy_hash_to_prime(data: bytes) -> int:
+    candidate = int.from_bytes(hashlib.sha256(data).digest(), 'big')
+    while not number.isPrime(candidate):
+        candidate += 1
+    return candidate
+
+
+def test_probable_prime_matches_reference():
+    """Test the wheel + BPSW test against pycryptodome on small numbers."""
+    for n in range(1, 20000):
+        assert is_probable_prime(n) == bool(number.isPrime(n)), n
+
+
+def test_base2_pseudoprimes_rejected():
+    """Test that strong pseudoprimes to base 2 fail the Lucas stage."""
+    for n in [3215031751, 2152302898747, 3474749660383, 341550071728321]:
+        assert is_strong_probable_prime(n)
+        assert not is_probable_prime(n)
+
+
+def test_scan_scheme_matches_sequential_scan():
+    """Test that the sieved scan gives the same prime as the original scan."""
+    for i in range(20):
+        data = hashlib.sha256(f"element_{i}".encode()).digest()
+        assert derive_prime(data, "scan") == _legacy_hash_to_prime(data)
+
+
+def test_nonce_scheme_is_deterministic_256_bit_prime():
+    """Test nonce-based derivation."""
+    data = hashlib.sha256(b"scar").digest()
+    prime = derive_prime(data, "nonce")
+    assert prime == derive_prime(data, "nonce")
+    assert prime.bit_length() == 256
+    assert number.isPrime(prime)
+    assert prime != derive_prime(hashlib.sha256(b"other").digest(), "nonce")
+
+
+def test_lru_cache_bounded():
+    """Test cache hits and eviction."""
+    deriver = PrimeDeriver(cache_size=2)
+    a, b, c = (hashlib.sha256(x).digest() for x in (b"a", b"b", b"c"))
+
+    first = deriver.derive(a)
+    assert deriver.derive(a) == first
+    assert (deriver.hits, deriver.misses) == (1, 1)
+
+    deriver.derive(b)
+    deriver.derive(c)
+    assert len(deriver) == 2
+    deriver.derive(a)
+    assert deriver.misses == 4
@@ -0,0 +1,88 @@
+"""
+Tests for the columnar proof store.
+"""
+
+import hashlib
+import random
+
+import pytest
+
+from accumulator.incremental_proof import IncrementalChainProof
+from accumulator.rsa_accumulator import AccumulatorProof
+from storage.proof_store import ProofStore
+
+
+def scar(i) -> bytes:
+    return hashlib.sha256(f"scar_{i}".encode()).digest()
+
+
+def chain_of_proofs(count: int, rng: random.Random):
+    """Sequential adds, then one batch sharing an accumulator value."""
+    proofs, previous = [], rng.getrandbits(1024)
+    for seq in range(1, count + 1):
+        value = rng.getrandbits(1024)
+        proofs.append(AccumulatorProof(previous, value, rng.getrandbits(256), seq))
+        previous = value
+    batch_value = rng.getrandbits(1024)
+    proofs += [
+        AccumulatorProof(rng.getrandbits(1024), batch_value, rng.getrandbits(256), count + 1 + i)
+        for i in range(count)
+    ]
+    return proofs
+
+
+@pytest.mark.parametrize("persisted", [False, True])
+def test_views_match_proofs_and_share_values(tmp_path, persisted):
+    """Test views against the original proofs, value sharing and prefix trimming."""
+    proofs = chain_of_proofs(50, random.Random(1))
+    path = str(tmp_path / "proofs") if persisted else None
+    store = ProofStore(128, path, initial_capacity=4)
+    store.extend(proofs[:70])
+    for proof in proofs[70:]:
+        store.append(proof)
+
+    assert len(store) == 100
+    assert list(store) == proofs
+    assert store[-1] == proofs[-1] and store[10:12] == proofs[10:12]
+    assert store[3].to_proof() == proofs[3]
+    # 51 values for the sequential adds, then 50 witnesses and 1 shared accumulator
+    assert store._values.count == 102
+
+    del store[:-30]
+    assert list(store) == proofs[-30:]
+    store.truncate_after(proofs[-5].sequence)
+    assert list(store) == proofs[-30:-4]
+    store.append(proofs[-4])
+    assert store[-1] == proofs[-4]
+
+    if persisted:
+        store.close()
+        reopened = ProofStore(128, path)
+        assert list(reopened) == proofs[-30:-3]
+        reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_chain_with_persisted_proof_store(tmp_path):
+    """Test a chain keeping its proofs columnar across a restart."""
+    kwargs = dict(
+        genesis_hash=hashlib.sha256(b"genesis").digest(),
+        wal_path=str(tmp_path / "chain.wal"),
+        proof_path=str(tmp_path / "proofs"),
+        snapshot_every=1000
+    )
+    chain = IncrementalChainProof(**kwargs)
+    await chain.initialize()
+    await chain.add_scar(scar(0))
+    await chain.add_scars([scar(i) for i in range(1, 6)])
+    assert isinstance(chain.proofs, ProofStore)
+    assert chain.verify_all() and chain.verify_chain()
+    expected = [p.to_proof() for p in chain.proofs]
+    await chain.close()
+
+    restarted = IncrementalChainProof(**kwargs)
+    await restarted.initialize()
+    assert list(restarted.proofs) == expected
+    await restarted.add_scar(scar(6))
+    assert len(restarted.proofs) == 7 and restarted.verify_all()
+    await restarted.close()
@@ -0,0 +1,94 @@
+"""
+Tests for the sharded scar chain.
+"""
+
+import hashlib
+import os
+import uuid
+from datetime import datetime
+
+import pytest
+
+from accumulator.sharding import ShardedChainProof, shard_index, verify_shard_root
+from core.ontological_scar import OntologicalScar
+
+
+GENESIS = hashlib.sha256(b"genesis").digest()
+
+
+def scar(i) -> bytes:
+    return hashlib.sha256(f"scar_{i}".encode()).digest()
+
+
+def test_shard_index_is_stable():
+    """Test routing uses a process-independent hash."""
+    assert shard_index("operator-1", 16) == shard_index("operator-1", 16)
+    assert len({shard_index(f"operator-{i}", 4) for i in range(64)}) == 4
+
+
+@pytest.mark.asyncio
+async def test_scars_routed_and_committed(tmp_path):
+    """Test per-shard proofs, the top-level commitment and restart."""
+    wal_path = str(tmp_path / "chain.wal")
+    chain = ShardedChainProof(GENESIS, wal_path=wal_path, shard_count=3)
+    await chain.initialize()
+    assert len({shard.accumulator.N for shard in chain.shards}) == 1
+
+    before = chain.commitment()
+    index, proof = await chain.add_scar(scar(0), "operator-a")
+    assert index == chain.shard_for("operator-a")
+    assert chain.shards[index].accumulator.verify(proof)
+    assert chain.commitment() != before
+
+    results = await chain.add_scars([(scar(i), f"operator-{i % 5}") for i in range(1, 11)])
+    for i, (index, proof) in enumerate(results, start=1):
+        assert index == chain.shard_for(f"operator-{i % 5}")
+        assert chain.shards[index].accumulator.verify(proof)
+    assert chain.verify_chain()
+
+    ontological = OntologicalScar(
+        scar_id=uuid.uuid4(), genesis_ref="g", incident_type="failure", cognitive_basis="en",
+        collision_mode=False, pre_state_hash="a", post_state_hash="b", deformation_vector={},
+        entropy_score=0.5, ontological_drift=0.1, timestamp=datetime(2026, 1, 1), operator_id="operator-z"
+    )
+    index, proof = await chain.add_ontological_scar(ontological)
+    assert index == chain.shard_for("operator-z")
+
+    commitment = chain.commitment()
+    for i, value in enumerate(chain.shard_roots()):
+        path = chain.shard_proof(i)
+        assert verify_shard_root(commitment, i, value, path, 3, chain.value_width)
+        assert not verify_shard_root(commitment, i, value + 1, path, 3, chain.value_width)
+    await chain.close()
+
+    restarted = ShardedChainProof(GENESIS, wal_path=wal_path, shard_count=3)
+    await restarted.initialize()
+    assert restarted.commitment() == commitment
+    await restarted.close()
+
+    with pytest.raises(ValueError):
+        await ShardedChainProof(GENESIS, wal_path=wal_path, shard_count=4).initialize()
+
+
+@pytest.mark.asyncio
+async def test_shard_restart_keeps_prime_scheme(tmp_path):
+    """Test that shards keep their prime scheme across a restart and can remove."""
+    wal_path = str(tmp_path / "chain.wal")
+    chain = ShardedChainProof(GENESIS, wal_path=wal_path, shard_count=2)
+    await chain.initialize()
+    assert chain.params.prime_scheme == "nonce"
+    results = await chain.add_scars([(scar(i), f"operator-{i}") for i in range(6)])
+    await chain.close()
+
+    restarted = ShardedChainProof(GENESIS, wal_path=wal_path, shard_count=2)
+    await restarted.initialize()
+    assert all(shard.accumulator.primes.scheme == "nonce" for shard in restarted.shards)
+
+    index, _ = results[-1]
+    shard = restarted.shards[index]
+    before = shard.accumulator_value
+    value = await shard.remove_scars([scar(5)])
+    assert pow(value, shard.accumulator._hash_to_prime(scar(5)), shard.accumulator.N) == before
+    await shard.add_scar(scar(5))
+    assert shard.accumulator_value == before
+    await restarted.close()
@@ -0,0 +1,327 @@
+"""
+Tests for accumulator Write-Ahead Log.
+"""
+
+import asyncio
+import os
+
+import pytest
+
+import storage.wal_accumulator as wal_module
+import storage.wal_format as wal_format
+from storage.wal_accumulator import AccumulatorWAL, WALTailer, migrate_text_wal
+from storage.wal_format import (
+    SEGMENT_HEADER,
+    WALCorruptionError,
+    WALFormatError,
+    WALRecord,
+    encode_commit,
+    encode_record,
+)
+
+
+@pytest.mark.asyncio
+async def test_append_and_recover(tmp_path):
+    """Test that the last appended entry is recovered."""
+    wal = AccumulatorWAL(str(tmp_path / "chain.wal"))
+    await wal.append("ADD", 111, "aaaa")
+    await wal.append("ADD", 222, "bbbb")
+
+    seq, value, scar_id = await AccumulatorWAL(str(tmp_path / "chain.wal")).recover()
+    assert (seq, value, scar_id) == (2, 222, "bbbb")
+
+
+@pytest.mark.asyncio
+async def test_group_commit_single_fsync(tmp_path, monkeypatch):
+    """Test that concurrent appends share one fsync."""
+    fsyncs = []
+    real_sync = wal_module._datasync
+    monkeypatch.setattr(wal_module, "_datasync", lambda fd: fsyncs.append(fd) or real_sync(fd))
+
+    wal = AccumulatorWAL(str(tmp_path / "chain.wal"), group_commit=True, commit_window=0.05)
+    results = await asyncio.gather(*[
+        wal.append("ADD", i, f"scar{i}") for i in range(1, 21)
+    ])
+
+    assert all(results)
+    assert len(fsyncs) == 1
+    assert wal.current_seq == 20
+    assert wal.current_value == 20
+
+    seq, value, _ = await wal.recover()
+    assert (seq, value) == (20, 20)
+
+
+@pytest.mark.asyncio
+async def test_group_commit_byte_budget(tmp_path):
+    """Test that a full byte budget flushes without waiting for the window."""
+    wal = AccumulatorWAL(
+        str(tmp_path / "chain.wal"),
+        group_commit=True,
+        commit_window=10.0,
+        max_batch_bytes=1
+    )
+    await asyncio.wait_for(wal.append("ADD", 7, "scar"), timeout=5)
+    assert wal.current_value == 7
+
+
+@pytest.mark.asyncio
+async def test_segments_preallocated_and_rolled_over(tmp_path):
+    """Test that segments are preallocated and roll over at the size threshold."""
+    path = str(tmp_path / "chain.wal")
+    wal = AccumulatorWAL(path, segment_size=4096)
+    assert wal.segments() == [path + ".000001"]
+    assert os.path.getsize(path + ".000001") == 4096
+
+    for i in range(1, 81):
+        await wal.append("ADD", i * 10 ** 50, f"scar{i}")
+
+    assert len(wal.segments()) > 1
+    await wal.close()
+
+    reopened = AccumulatorWAL(path, segment_size=4096)
+    await reopened.initialize_cache()
+    assert reopened.current_seq == 80
+    assert reopened.current_value == 80 * 10 ** 50
+
+    await reopened.append("ADD", 1, "next")
+    await reopened.close()
+    seq, value, _ = await AccumulatorWAL(path, segment_size=4096).recover()
+    assert (seq, value) == (81, 1)
+
+
+@pytest.mark.asyncio
+async def test_archive_sealed_segments(tmp_path):
+    """Test that sealed segments can be moved away without touching the active one."""
+    path = str(tmp_path / "chain.wal")
+    wal = AccumulatorWAL(path, segment_size=4096)
+    for i in range(1, 81):
+        await wal.append("ADD", i * 10 ** 50, f"scar{i}")
+
+    active = wal.segments()[-1]
+    moved = wal.archive_sealed_segments(str(tmp_path / "archive"))
+    assert moved
+    assert wal.segments() == [active]
+
+    await wal.append("ADD", 5, "after")
+    seq, value, _ = await wal.recover()
+    assert (seq, value) == (81, 5)
+
+
+@pytest.mark.asyncio
+async def test_tailer_follows_rollover_and_partial_writes(tmp_path):
+    """Test that a tailer sees appends across segments and waits out a partial record."""
+    path = str(tmp_path / "chain.wal")
+    wal = AccumulatorWAL(path, segment_size=4096)
+    tailer = WALTailer(path)
+    assert tailer.poll() == []
+
+    for i in range(1, 11):
+        await wal.append("ADD", i * 10 ** 50, f"scar{i}")
+    assert [r.seq for r in tailer.poll()] == list(range(1, 11))
+    assert tailer.poll() == []
+
+    for i in range(11, 81):
+        await wal.append("ADD", i * 10 ** 50, f"scar{i}")
+    assert len(wal.segments()) > 1
+    assert [r.seq for r in tailer.poll(limit=30)] == list(range(11, 41))
+    assert [r.seq for r in tailer.poll()] == list(range(41, 81))
+
+    # Half of the next record is on disk: not returned until its write is committed
+    record = encode_record(WALRecord(81, "ADD", 81, 0, "scar81"), wal.value_width)
+    os.pwrite(wal._fd, record[:len(record) // 2], wal._offset)
+    assert tailer.poll() == []
+    os.pwrite(wal._fd, record, wal._offset)
+    assert tailer.poll() == []
+    os.pwrite(wal._fd, record + encode_commit(1, len(record)), wal._offset)
+    assert [r.value for r in tailer.poll()] == [81]
+    await wal.close()
+
+
+@pytest.mark.asyncio
+async def test_timestamps_increase_across_reopen(tmp_path, monkeypatch):
+    """Test that a reopened WAL continues after the last logged timestamp."""
+    path = str(tmp_path / "chain.wal")
+    wal = AccumulatorWAL(path)
+    await wal.append("ADD", 1, "scar1")
+    await wal.append("ADD", 2, "scar2")
+    await wal.close()
+    last = list(AccumulatorWAL(path).iter_records())[-1].timestamp_ns
+
+    # The clock went backwards while the process was down
+    monkeypatch.setattr(wal_module.time, "time_ns", lambda: 1)
+    reopened = AccumulatorWAL(path)
+    await reopened.initialize_cache()
+    await reopened.append("ADD", 3, "scar3")
+    await reopened.close()
+    assert list(AccumulatorWAL(path).iter_records())[-1].timestamp_ns == last + 1
+
+
+@pytest.mark.asyncio
+async def test_torn_final_record_truncated(tmp_path):
+    """Test that a partially written final record is detected and discarded."""
+    path = str(tmp_path / "chain.wal")
+    wal = AccumulatorWAL(path)
+    for i in range(1, 6):
+        await wal.append("ADD", i * 1000, f"scar{i}")
+    end = wal._offset
+    # Simulate a crash halfway through the sixth record
+    torn = encode_record(WALRecord(6, "ADD", 6000, 0, "scar6"), wal.value_width)
+    os.pwrite(wal._fd, torn[:len(torn) // 2], end)
+    await wal.close()
+
+    assert await AccumulatorWAL(path).recover() == (5, 5000, "scar5")
+
+    reopened = AccumulatorWAL(path)
+    assert reopened._offset == end
+    await reopened.initialize_cache()
+    await reopened.append("ADD", 6000, "scar6")
+    await reopened.close()
+
+    assert await AccumulatorWAL(path).recover() == (6, 6000, "scar6")
+
+
+@pytest.mark.asyncio
+async def test_torn_write_larger_than_repair_window(tmp_path):
+    """Test that a torn write is found however far it reaches back."""
+    path = str(tmp_path / "chain.wal")
+    wal = AccumulatorWAL(path)
+    for i in range(1, 4):
+        await wal.append("ADD", i, f"scar{i}")
+    end = wal._offset
+    os.pwrite(wal._fd, b"\x5a" * (wal.repair_window + 10000), end)
+    await wal.close()
+
+    reopened = AccumulatorWAL(path)
+    assert reopened._offset == end
+    assert (await reopened.recover())[:2] == (3, 3)
+    await reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_damaged_record_before_valid_records_raises(tmp_path):
+    """Test that repair never truncates records after a damaged one."""
+    path = str(tmp_path / "chain.wal")
+    wal = AccumulatorWAL(path)
+    for i in range(1, 6):
+        await wal.append("ADD", i, f"scar{i}")
+    second = SEGMENT_HEADER.size + len(encode_record(WALRecord(1, "ADD", 1, 0, "scar1"), wal.value_width))
+    os.pwrite(wal._fd, b"\xff", second + 20)
+    await wal.close()
+
+    with pytest.raises(WALCorruptionError):
+        AccumulatorWAL(path)
+
+
+@pytest.mark.asyncio
+async def test_hole_in_torn_final_write_drops_the_write(tmp_path):
+    """Test that a final write with a zero page inside it is dropped whole."""
+    path = str(tmp_path / "chain.wal")
+    wal = AccumulatorWAL(path)
+    for i in range(1, 11):
+        await wal.append("ADD", i, f"scar{i}")
+    end = wal._offset
+
+    # Crash during a group write: the commit marker and later pages made it
+    # to disk, one page in the middle did not
+    payload = b"".join(
+        encode_record(WALRecord(i, "ADD_BATCH", 40, 0, f"scar{i}"), wal.value_width)
+        for i in range(11, 41)
+    )
+    wal._write(payload, 11, 30)
+    written = wal._offset
+    hole = (end // AccumulatorWAL.PAGE_SIZE + 1) * AccumulatorWAL.PAGE_SIZE
+    assert hole + AccumulatorWAL.PAGE_SIZE < written
+    os.pwrite(wal._fd, b"\0" * AccumulatorWAL.PAGE_SIZE, hole)
+    await wal.close()
+
+    reopened = AccumulatorWAL(path)
+    assert reopened._offset == end
+    assert os.pread(reopened._fd, written - end, end).strip(b"\0") == b""
+    assert (await reopened.recover())[:2] == (10, 10)
+    await reopened.initialize_cache()
+    await reopened.append("ADD", 11, "scar11")
+    await reopened.close()
+
+    assert [r.seq for r in AccumulatorWAL(path).iter_records()] == list(range(1, 12))
+
+
+@pytest.mark.asyncio
+async def test_recover_reads_only_tail(tmp_path, monkeypatch):
+    """Test that recovery cost does not depend on chain length."""
+    path = str(tmp_path / "chain.wal")
+    wal = AccumulatorWAL(path, group_commit=True)
+    await asyncio.gather(*[wal.append("ADD", i, f"scar{i}") for i in range(1, 2001)])
+    await wal.close()
+
+    reopened = AccumulatorWAL(path)
+    reads = []
+    real_pread = os.pread
+    monkeypatch.setattr(os, "pread", lambda fd, n, off: reads.append(n) or real_pread(fd, n, off))
+
+    assert (await reopened.recover())[:2] == (2000, 2000)
+    assert sum(reads) < 32 * AccumulatorWAL.PAGE_SIZE
+
+
+@pytest.mark.asyncio
+async def test_iter_records_streams_in_order(tmp_path):
+    """Test the streaming reader across segments and from a start sequence."""
+    path = str(tmp_path / "chain.wal")
+    wal = AccumulatorWAL(path, segment_size=4096)
+    for i in range(1, 31):
+        await wal.append("ADD", i, f"scar{i}", element=1000 + i)
+    assert len(wal.segments()) > 1
+
+    records = list(wal.iter_records())
+    assert [r.seq for r in records] == list(range(1, 31))
+    assert records[4].element == 1005
+    assert records[4].scar_id == "scar5"
+    assert all(a.timestamp_ns < b.timestamp_ns for a, b in zip(records, records[1:]))
+
+    assert [r.seq for r in wal.iter_records(start_seq=25)] == list(range(25, 31))
+
+
+@pytest.mark.asyncio
+async def test_corruption_detected(tmp_path):
+    """Test that a flipped byte inside a record fails its checksum."""
+    path = str(tmp_path / "chain.wal")
+    wal = AccumulatorWAL(path)
+    for i in range(1, 4):
+        await wal.append("ADD", i * 7, f"scar{i}")
+
+    first = SEGMENT_HEADER.size
+    os.pwrite(wal._fd, b"\xff", first + 40)
+
+    with pytest.raises(WALCorruptionError) as excinfo:
+        list(wal.iter_records())
+    assert excinfo.value.offset == first
+    assert list(wal.iter_records(strict=False)) == []
+
+
+def test_crc32c_fallback_matches_reference():
+    """Test the pure-Python CRC32C against the standard check value."""
+    assert wal_format._crc32c_py(b"123456789") == 0xE3069283
+    assert wal_format.checksum(b"123456789") == 0xE3069283
+
+
+@pytest.mark.asyncio
+async def test_migrate_text_wal(tmp_path):
+    """Test conversion of a legacy text WAL."""
+    path = str(tmp_path / "chain.wal")
+    with open(path, "w") as f:
+        f.write("# ACCUMULATOR WAL\n")
+        f.write("# seq:operation:value:timestamp:scar_id\n")
+        f.write("1:ADD:12345:2026-03-17T09:43:21.606548:aaaa\n")
+        f.write("2:ADD:67890:2026-03-17T09:43:22.000001:bbbb\n")
+        f.write("3:ADD:111")
+
+    with pytest.raises(WALFormatError):
+        AccumulatorWAL(path)
+
+    assert migrate_text_wal(path) == 2
+    assert os.path.exists(os.path.join(path + ".text", "chain.wal"))
+
+    wal = AccumulatorWAL(path)
+    records = list(wal.iter_records())
+    assert [(r.seq, r.value, r.scar_id) for r in records] == [(1, 12345, "aaaa"), (2, 67890, "bbbb")]
+    assert await wal.recover() == (2, 67890, "bbbb")
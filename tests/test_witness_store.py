@@ -0,0 +1,174 @@
+"""
+Tests for the persistent witness store.
+"""
+
+import asyncio
+import hashlib
+import math
+import threading
+
+import pytest
+
+from accumulator.incremental_proof import IncrementalChainProof
+from storage.witness_store import WitnessStore
+
+
+def scar(i) -> bytes:
+    return hashlib.sha256(f"scar_{i}".encode()).digest()
+
+
+@pytest.mark.asyncio
+async def test_historical_scars_prove_against_current_value(tmp_path):
+    """Test that old witnesses are brought forward to the current value."""
+    chain = IncrementalChainProof(
+        genesis_hash=hashlib.sha256(b"genesis").digest(),
+        wal_path=str(tmp_path / "chain.wal"),
+        witness_path=str(tmp_path / "witnesses")
+    )
+    await chain.initialize()
+    await chain.add_scar(scar(0))
+    await chain.add_scars([scar(i) for i in range(1, 6)])
+    await chain.add_scar(scar(6))
+
+    for i in range(7):
+        proof = chain.prove_membership(scar(i))
+        assert proof.accumulator == chain.accumulator_value
+        assert chain.accumulator.verify(proof)
+    assert chain.prove_membership(scar(99)) is None
+
+    chain.witnesses.flush()
+    assert chain.witnesses.synced_seq == chain.accumulator.current_sequence
+    assert chain.accumulator.verify(chain.prove_membership(scar(0)))
+    await chain.close()
+
+
+@pytest.mark.asyncio
+async def test_restart_catches_up_from_wal(tmp_path):
+    """Test that unflushed witness updates are replayed from the WAL."""
+    kwargs = dict(
+        genesis_hash=hashlib.sha256(b"genesis").digest(),
+        wal_path=str(tmp_path / "chain.wal"),
+        witness_path=str(tmp_path / "witnesses")
+    )
+    chain = IncrementalChainProof(**kwargs)
+    await chain.initialize()
+    await chain.add_scar(scar(0))
+    chain.witnesses.flush()
+    await chain.add_scars([scar(i) for i in range(1, 4)])
+    # Simulated crash: the pending primes were never flushed
+    await chain.accumulator.close()
+
+    restarted = IncrementalChainProof(**kwargs)
+    await restarted.initialize()
+    assert restarted.witnesses.seq == restarted.accumulator.current_sequence
+
+    proof = restarted.prove_membership(scar(0))
+    assert proof.accumulator == chain.accumulator_value
+    assert restarted.accumulator.verify(proof)
+    await restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_removal_updates_remaining_witnesses(tmp_path):
+    """Test Bezout witness updates after a removal."""
+    chain = IncrementalChainProof(
+        genesis_hash=hashlib.sha256(b"genesis").digest(),
+        wal_path=str(tmp_path / "chain.wal"),
+        witness_path=str(tmp_path / "witnesses")
+    )
+    await chain.initialize()
+    await chain.add_scars([scar(i) for i in range(4)])
+
+    accumulator = chain.accumulator
+    value = await accumulator.remove(scar(2))
+    chain.witnesses.apply_removal([accumulator._hash_to_prime(scar(2))], value, accumulator.current_sequence)
+
+    assert chain.prove_membership(scar(2)) is None
+    for i in (0, 1, 3):
+        proof = chain.prove_membership(scar(i))
+        assert proof.accumulator == value
+        assert accumulator.verify(proof)
+    await chain.close()
+
+
+@pytest.mark.asyncio
+async def test_flush_runs_off_the_event_loop(tmp_path, monkeypatch):
+    """Test that witness flushes leave the loop and members are synced before the ack."""
+    kwargs = dict(
+        genesis_hash=hashlib.sha256(b"genesis").digest(),
+        wal_path=str(tmp_path / "chain.wal"),
+        witness_path=str(tmp_path / "witnesses")
+    )
+    chain = IncrementalChainProof(**kwargs)
+    await chain.initialize()
+    chain.witnesses.flush_primes = 4
+    calls = []
+    for name in ("flush", "sync"):
+        real = getattr(WitnessStore, name)
+        monkeypatch.setattr(WitnessStore, name, lambda self, real=real, name=name: (
+            calls.append((name, threading.current_thread() is threading.main_thread())), real(self)
+        )[1])
+
+    await asyncio.gather(*[chain.add_scar(scar(i)) for i in range(6)])
+    assert ("flush", False) in calls and ("sync", False) in calls
+    assert all(not on_loop for _, on_loop in calls)
+    # Concurrent adders share syncs
+    assert len(calls) < 6
+    # Simulated crash right after the acks
+    await chain.accumulator.close()
+
+    restarted = IncrementalChainProof(**kwargs)
+    await restarted.initialize()
+    for i in range(6):
+        assert restarted.accumulator.verify(restarted.prove_membership(scar(i)))
+    await restarted.close()
+
+
+def test_index_grows_and_reopens(tmp_path):
+    """Test fixed-width records and index rebuilds past the initial capacity."""
+    N = 2**127 - 1
+    path = str(tmp_path / "witnesses")
+    store = WitnessStore(path, N, initial_capacity=4, flush_primes=8)
+    for i in range(50):
+        store.add([(scar(i), 3 + 2 * i, i + 2)], [3 + 2 * i], i + 1, value=i)
+    store.close()
+
+    reopened = WitnessStore(path, N)
+    assert len(reopened) == 50
+    assert reopened.synced_seq == 50
+    prime, witness, seq = reopened.get(scar(49))
+    assert (prime, witness, seq) == (101, 51, 50)
+    # The first witness was raised by every later prime
+    prime, witness, seq = reopened.get(scar(0))
+    assert (prime, seq) == (3, 50)
+    assert witness == pow(2, math.prod(3 + 2 * i for i in range(1, 50)), N)
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_remove_scars_restart_replays_batch_removal(tmp_path):
+    """Test that a REMOVE_BATCH group is replayed into the witness store."""
+    kwargs = dict(
+        genesis_hash=hashlib.sha256(b"genesis").digest(),
+        wal_path=str(tmp_path / "chain.wal"),
+        witness_path=str(tmp_path / "witnesses")
+    )
+    chain = IncrementalChainProof(**kwargs)
+    await chain.initialize()
+    await chain.add_scars([scar(i) for i in range(5)])
+    chain.witnesses.flush()
+    await chain.accumulator.remove_many([scar(1), scar(3)])
+    # Crash before the witness store saw the removal
+    await chain.accumulator.close()
+
+    restarted = IncrementalChainProof(**kwargs)
+    await restarted.initialize()
+    assert restarted.prove_membership(scar(1)) is None
+    for i in (0, 2, 4):
+        proof = restarted.prove_membership(scar(i))
+        assert proof.accumulator == chain.accumulator_value
+        assert restarted.accumulator.verify(proof)
+
+    await restarted.remove_scars([scar(0)])
+    assert restarted.accumulator.verify(restarted.prove_membership(scar(4)))
+    await restarted.close()